@@ -1,20 +1,63 @@
 import json
+import os
 import re
 import asyncio
-import aiohttp
+import hashlib
+import time
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Optional
 from urllib import request
-from jinja2 import Environment, FileSystemLoader
 from ..models.app_data import AppData
 from ..utils import write_file
+from . import llm_session, prompt_templates
+from .llm_session import get_session
+from .model_race import ModelRacePolicy
+from .response_cache import ResponseCache
+from .telemetry import CallRecord, LLMTelemetry
+
+DEFAULT_SERVER_URL = "http://localhost:11434"
+
+
+@dataclass
+class AgentRequest:
+    '''State of a single LLM call, so one agent can serve several requests at once.'''
+    prompt: str
+    response: str = ''
+    model: Optional[str] = None  # defaults to the agent model
+    format: Optional[dict[str, Any]] = None  # JSON schema constraining the response (Ollama structured output)
+    prefix_hash: Optional[str] = None  # hash of the stable prompt prefix (PromptMetrics.prefix_hash)
+    metadata: dict[str, Any] = field(default_factory=dict)
+    queued_at: float = field(default_factory=time.perf_counter)  # perf_counter when the request was queued
+    retries: int = 0  # earlier attempts of the same request
+    telemetry: Optional[CallRecord] = None  # filled by run_async
+    cache_key: Optional[str] = None  # response cache key of the request, set by run_async
+    use_cache: bool = True  # False bypasses the response cache (race candidates)
+
 
 class Agent:
-    def __init__(self, model:str = "gpt-4o-mini", server_url: str = "http://localhost:11434"):
+    # other prompt templates rendered by the agent (part of template_version)
+    extra_templates: tuple[str, ...] = ()
+
+    # last prompt prefix sent per (server, model); Ollama reuses the evaluated
+    # state of the longest common prompt prefix while the model stays loaded
+    _server_prefixes: dict[tuple[str, str], str] = {}
+
+    def __init__(self, model:str = "gpt-4o-mini", server_url: Optional[str] = None):
         self.app_data = AppData()
         self.model = model
-        self.server_url = server_url
+        # OLLAMA_URL points every agent to another server (e.g. backend.benchmarks.fake_ollama)
+        self.server_url = server_url or os.environ.get("OLLAMA_URL", DEFAULT_SERVER_URL)
         self._last_response = ''
         self._context = ''
         self._thinking = False
+        self.options: dict[str, Any] = {}  # ollama generation options (temperature, num_ctx, ...); changing num_ctx reloads the model
+        self.keep_alive: Optional[str] = "30m"  # keep the model (and its prompt cache) loaded between calls
+        self.use_response_cache = True  # set to False to always call the model
+        self.response_cache = ResponseCache(self.app_data.cache_folder)
+        self.last_prompt_metrics: Optional[prompt_templates.PromptMetrics] = None
+        self.race_models: list[str] = []  # when set, race_async sends requests to these models concurrently
+        self.race_width = 3  # models raced per request (the policy picks the likeliest winners)
+        self.race_policy = ModelRacePolicy(self.app_data.cache_folder)
 
     def get_models(self) -> list[str]:
         '''Get a list of model names from ollama server'''
@@ -27,14 +70,25 @@ class Agent:
             raise ValueError(f"Error fetching models from Ollama: {e}")
         return []
 
-    def parse_context(self, **args) -> str:
-        # parse jinja template for inherited class (e.g. EffectTranslator -> effect_translator.j2)
-        # jinja folder is app_data.prompts_folder
+    @property
+    def template_name(self) -> str:
+        '''Jinja template for inherited class (e.g. EffectTranslator -> effect_translator.j2)'''
         class_name = self.__class__.__name__
-        template_name = re.sub(r'(?<!^)(?=[A-Z])', '_', class_name).lower() + ".j2"
+        return re.sub(r'(?<!^)(?=[A-Z])', '_', class_name).lower() + ".j2"
 
-        env = Environment(loader=FileSystemLoader(self.app_data.prompts_folder))
-        template = env.get_template(template_name)
+    def template_version(self) -> str:
+        '''Hash of the agent templates source and every template they include.'''
+        digest = hashlib.sha256()
+        for template_name in (self.template_name, *self.extra_templates):
+            for name, source in prompt_templates.referenced_templates(self.app_data.prompts_folder, template_name):
+                digest.update(name.encode('utf-8'))
+                digest.update(source.encode('utf-8'))
+        return digest.hexdigest()
+
+    def render_context(self, template: Optional[str] = None, **args) -> str:
+        '''Render the agent template (or another prompt `template`) without touching the agent state (safe for concurrent requests).'''
+        # parse jinja template for inherited class (e.g. EffectTranslator -> effect_translator.j2)
+        # jinja folder is app_data.prompts_folder; compiled templates are shared process-wide
 
         # Add common template vars
         if 'song' not in args:
@@ -42,84 +96,218 @@ class Agent:
         if 'fixtures' not in args:
             args['fixtures'] = self.app_data.fixtures
         
-        context = template.render(agent=self, **args)
+        context, self.last_prompt_metrics = prompt_templates.render(self.app_data.prompts_folder, template or self.template_name, agent=self, **args)
+        return context
+
+    def parse_context(self, **args) -> str:
+        context = self.render_context(**args)
         self._context = context
         return context
 
-    async def run_async(self):
-        """Call the ollama server async with streaming and display partial results."""
-        if self._context == '':
-            raise ValueError("Context is empty. Please call parse_context() first.")
-        
+    async def run_async(self, request: Optional[AgentRequest] = None, echo: bool = True, on_chunk: Optional[Callable[[str], None]] = None) -> str:
+        """Call the ollama server async with streaming and display partial results.
+
+        Without a request, the context from parse_context() is used and the
+        response is kept in the agent (_last_response). With a request, all
+        state lives in the request object, so several calls can run at once.
+        `on_chunk` receives every response chunk as it arrives (a cached
+        response is passed as a single chunk).
+        """
+        implicit = request is None
+        if implicit:
+            if self._context == '':
+                raise ValueError("Context is empty. Please call parse_context() first.")
+            request = AgentRequest(prompt=self._context, prefix_hash=self.last_prompt_metrics.prefix_hash if self.last_prompt_metrics else None)
+
+        model = request.model or self.model
         payload = {
-            "model": self.model,
-            "prompt": self._context,
+            "model": model,
+            "prompt": request.prompt,
             "stream": True
         }
+        if self.options:
+            payload["options"] = self.options
+        if request.format:
+            payload["format"] = request.format
+        if self.keep_alive:
+            payload["keep_alive"] = self.keep_alive
+
+        record = CallRecord(
+            agent=self.__class__.__name__,
+            model=model,
+            timestamp=time.time(),
+            queue_wait=time.perf_counter() - request.queued_at,
+            prefix_hash=request.prefix_hash,
+            retries=request.retries,
+        )
+        request.telemetry = record
+
+        cache_key = ResponseCache.key(payload)
+        request.cache_key = cache_key
+        use_cache = self.use_response_cache and request.use_cache
+        cached = self.response_cache.get(cache_key) if use_cache else None
+        if cached is not None:
+            record.cached = True
+            LLMTelemetry().record_call(record)
+            if echo:
+                print(f"♻️ AI Response ({model} | cached)")
+            if on_chunk:
+                on_chunk(cached)
+            return self._finish_request(request, cached, implicit)
         
-        print(f"🤖 AI Response ({self.model} | streaming):")
-        print("-" * 50)
-        print("🧠 Model is thinking...", end='', flush=True)
+        if echo:
+            print(f"🤖 AI Response ({model} | streaming):")
+            print("-" * 50)
+            print("🧠 Model is thinking...", end='', flush=True)
         
         full_response = ""
+        chunks = 0
+        final: dict[str, Any] = {}  # last stream record (token counts and durations)
+        started = time.perf_counter()
+        first_token: Optional[float] = None
         thinking_dots = 0
-        self._thinking = True  # Agent is now thinking
+        thinking = True  # Agent is now thinking
+        if implicit:
+            self._thinking = True
         
+        if request.prefix_hash:
+            server_key = (self.server_url, model)
+            record.prefix_reused = Agent._server_prefixes.get(server_key) == request.prefix_hash
+            Agent._server_prefixes[server_key] = request.prefix_hash
+
         try:
-            # Set longer timeout and disable read timeout for initial connection
-            timeout = aiohttp.ClientTimeout(total=None, sock_read=600)
-            connector = aiohttp.TCPConnector(keepalive_timeout=600)
-            
-            async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
-                async with session.post(
-                    f"{self.server_url}/api/generate",
-                    json=payload
-                ) as response:
-                    if response.status == 200:
-                        async for line in response.content:
-                            if line:
-                                try:
-                                    data = json.loads(line.decode('utf-8'))
-                                    if 'response' in data and data['response']:
-                                        if self._thinking:
+            session = get_session()
+            async with session.post(
+                f"{self.server_url}/api/generate",
+                json=payload
+            ) as response:
+                if response.status == 200:
+                    async for line in response.content:
+                        if line:
+                            try:
+                                data = json.loads(line.decode('utf-8'))
+                                if 'response' in data and data['response']:
+                                    if thinking:
+                                        first_token = time.perf_counter()
+                                        if echo:
                                             print("\n" + "-" * 50)
-                                            self._thinking = False  # Agent has started responding
-                                        
-                                        chunk = data['response']
+                                        thinking = False  # Agent has started responding
+                                    
+                                    chunk = data['response']
+                                    if echo:
                                         print(chunk, end='', flush=True)
-                                        full_response += chunk
-                                        
-                                    if data.get('done', False):
-                                        break
-                                except json.JSONDecodeError:
-                                    continue
-                            else:
-                                # Show thinking animation while waiting
-                                if self._thinking:
-                                    thinking_dots = (thinking_dots + 1) % 4
-                                    print('\r🧠 Model is thinking' + '.' * thinking_dots + ' ' * (3 - thinking_dots), end='', flush=True)
-                                    await asyncio.sleep(0.5)
-                    else:
-                        error_text = await response.text()
-                        raise ValueError(f"Error from Ollama server: {response.status} - {error_text}")
+                                    full_response += chunk
+                                    chunks += 1
+                                    if on_chunk:
+                                        on_chunk(chunk)
+                                    
+                                if data.get('done', False):
+                                    final = data
+                                    break
+                            except json.JSONDecodeError:
+                                continue
+                        else:
+                            # Show thinking animation while waiting
+                            if thinking and echo:
+                                thinking_dots = (thinking_dots + 1) % 4
+                                print('\r🧠 Model is thinking' + '.' * thinking_dots + ' ' * (3 - thinking_dots), end='', flush=True)
+                                await asyncio.sleep(0.5)
+                else:
+                    error_text = await response.text()
+                    raise ValueError(f"Error from Ollama server: {response.status} - {error_text}")
+        except asyncio.CancelledError:
+            # a model that lost a race
+            record.error = "cancelled"
+            LLMTelemetry().record_call(record)
+            raise
         except asyncio.TimeoutError:
+            record.error = "timeout"
+            LLMTelemetry().record_call(record)
             raise ValueError("Request to Ollama server timed out")
         except Exception as e:
+            record.error = str(e)
+            LLMTelemetry().record_call(record)
             raise ValueError(f"Error calling Ollama: {e}")
+
+        record.finish(started, first_token, final, chunks)
+        LLMTelemetry().record_call(record)
         
-        if not self._thinking:
-            print("\n" + "-" * 50)
-        else:
-            print("\n❌ No response received from model")
+        if echo:
+            if not thinking:
+                print("\n" + "-" * 50)
+            else:
+                print("\n❌ No response received from model")
             
-        self._last_response = full_response
+        if implicit:
+            self._thinking = thinking
+        if full_response and use_cache:
+            self.response_cache.put(cache_key, full_response, model)
+
+        return self._finish_request(request, full_response, implicit)
+
+    async def race_async(self, request: AgentRequest, accept: Callable[[AgentRequest], Any], models: Optional[list[str]] = None) -> Any:
+        """Send a request to several models at once and keep the first valid response.
+
+        `accept(candidate)` parses a finished candidate request and returns
+        the parsed result, or a falsy value when the response is unusable.
+        The first accepted candidate wins: the other generations are
+        cancelled, `request` takes the winner's response, model and
+        telemetry, and the accepted result is returned.
+        """
+        agent = self.__class__.__name__
+        models = self.race_policy.candidates(agent, models or self.race_models or [self.model], self.race_width)
+
+        async def attempt(candidate: AgentRequest) -> AgentRequest:
+            await self.run_async(candidate, echo=False)
+            return candidate
+
+        pending = {
+            # candidates bypass the response cache: a cached answer would win the race without racing
+            asyncio.create_task(attempt(replace(request, model=model, response='', telemetry=None, use_cache=False,
+                                                metadata=dict(request.metadata))))
+            for model in models
+        }
+        winner: Optional[AgentRequest] = None
+        result: Any = None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception():
+                        print(f"⚠️ {agent}.race_async -> {task.exception()}")
+                        continue
+                    candidate = task.result()
+                    result = accept(candidate)
+                    if result:
+                        winner = candidate
+                        break
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        self.race_policy.record(agent, models, winner.model if winner else None)
+        if winner is None:
+            raise ValueError(f"No valid response from models: {', '.join(models)}")
+        print(f"🏁 {agent}: {winner.model} won the race ({len(models)} models)")
+        request.response, request.model, request.telemetry = winner.response, winner.model, winner.telemetry
+        return result
+
+    def forget_response(self, request: AgentRequest):
+        '''Drop the cached response of a request (e.g. one that could not be used), so the model is asked again next time.'''
+        if request.cache_key:
+            self.response_cache.discard(request.cache_key)
+
+    def _finish_request(self, request: AgentRequest, response: str, implicit: bool) -> str:
+        request.response = response
+        if implicit:
+            self._last_response = response
         
         # Write the response to a file
-        write_file(str(self.app_data.logs_folder / f"{self.__class__.__name__}.response.txt"), full_response)
+        write_file(str(self.app_data.logs_folder / f"{self.__class__.__name__}.response.txt"), response)
 
-        return full_response
+        return response
 
     def run(self):
         """Synchronous wrapper for async run."""
-        return asyncio.run(self.run_async())
-        
\ No newline at end of file
+        return llm_session.run(self.run_async())
@@ -0,0 +1,72 @@
+"""Incremental parser of the ```actions block of a streamed LLM response.
+
+The response arrives in arbitrary chunks (tokens). The parser buffers
+text until a line is complete and, once inside the first ```actions
+fence (found anywhere in a line), turns every completed line into an ActionEntry right away, so
+actions can be validated and rendered while the model keeps generating.
+"""
+
+from typing import Callable, List, Optional, Tuple
+
+from ...models.lighting.action_list import ActionEntry
+
+FENCE = "```"
+ACTIONS_FENCE = "```actions"
+
+
+class ActionStreamParser:
+    """Turns response chunks into ActionEntry objects as action lines complete."""
+
+    def __init__(self, parse_line: Callable[[str], Optional[ActionEntry]]):
+        self._parse_line = parse_line
+        self._buffer = ""
+        self._inside_block = False
+        self.found_block = False  # an ```actions fence was opened
+        self.closed = False  # the actions block ended, later text is ignored
+        self.actions: List[ActionEntry] = []
+        self.lines: List[str] = []  # source line of each parsed action
+        self.errors: List[Tuple[str, str]] = []  # (line, error message)
+
+    def feed(self, chunk: str) -> List[ActionEntry]:
+        """Consume a chunk and return the actions of the lines it completed."""
+        if self.closed or not chunk:
+            return []
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split("\n")
+        return self._consume(lines)
+
+    def close(self) -> List[ActionEntry]:
+        """Flush the last (unterminated) line at the end of the stream."""
+        if self.closed:
+            return []
+        lines, self._buffer = [self._buffer], ""
+        emitted = self._consume(lines)
+        self.closed = True
+        return emitted
+
+    def _consume(self, lines: List[str]) -> List[ActionEntry]:
+        emitted = []
+        for line in lines:
+            line = line.strip()
+            if not self._inside_block:
+                # the fence may follow other text on its line (e.g. `agent: "```actions`)
+                if ACTIONS_FENCE not in line:
+                    continue
+                self._inside_block = self.found_block = True
+                line = line.split(ACTIONS_FENCE, 1)[1].strip()
+            if line.startswith(FENCE):
+                self._inside_block = False
+                self.closed = True
+                break
+            if not line:
+                continue
+            try:
+                action = self._parse_line(line)
+            except Exception as e:
+                self.errors.append((line, str(e)))
+                continue
+            if action:
+                self.actions.append(action)
+                self.lines.append(line)
+                emitted.append(action)
+        return emitted
@@ -1,124 +1,422 @@
+import asyncio
+import json
 import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from ...models.app_data import AppData
-from ..agent import Agent
+from .. import llm_session
+from ..agent import Agent, AgentRequest
+from ..telemetry import LLMTelemetry
 from ...models.lighting.plan import PlanEntry
 from ...models.lighting.action_list import ActionEntry
+from ...models.lighting.action_validator import ValidationReport, validate_actions
 from ...utils import write_file
+from ..rule_based.rule_translator import RuleBasedTranslator
+from .action_stream_parser import ActionStreamParser
+from .translation_cache import TranslationCache
+
+# tokens of an action command line: key=value (list, quoted or bare value) or a bare word
+COMMAND_TOKEN = re.compile(r"""(\w+)=(\[[^\]]*\]|"[^"]*"|'[^']*'|\S+)|(\S+)""")
+NUMBER = re.compile(r"[-+]?(\d+\.?\d*|\.\d+)")
+
+# an invalid action sent back to the model: {"source": text the model produced, "error": why it was rejected}
+InvalidAction = Dict[str, str]
+
 
 class EffectTranslator(Agent):
-    def __init__(self, model:str = "cogito:8b"):
+    extra_templates = ("effect_translator_retry.j2",)
+
+    def __init__(self, model:str = "cogito:8b", use_cache: bool = True, beat_relative: bool = True, live_render: bool = True,
+                 structured: bool = False, max_retries: int = 1, deadline: Optional[float] = None, fallback: bool = True):
         self._model = model
         super().__init__(model=self._model)
+        self.use_cache = use_cache
+        self.beat_relative = beat_relative  # anchor new actions to the beat grid so they survive re-analysis
+        self.live_render = live_render  # render actions on the canvas as soon as the model emits them
+        self.structured = structured  # constrain the response to the fixture actions JSON schema (Ollama `format`)
+        self.max_retries = max_retries  # follow-up requests for the invalid actions only
+        self.deadline = deadline  # seconds allowed for the LLM translation of one entry (None = no limit)
+        self.fallback = fallback  # use RuleBasedTranslator when the LLM misses the deadline or fails
+        self.last_validation = None
+        self.translation_cache = TranslationCache(self.app_data.cache_folder)
 
-    def translate_plan_entry(self, plan_entry:PlanEntry):
-        user_prompt = plan_entry.description
-        beats_array = self.app_data.song.get_beats_array(plan_entry.start, plan_entry.end)
-        actions_reference = {action.name: action for fixture in self.app_data.fixtures for action in fixture.actions}
-        self.parse_context(
-            beats=beats_array,
-            actions_reference=actions_reference,
-            user_prompt=user_prompt
+    def _context_args(self, plan_entry: PlanEntry) -> dict:
+        return dict(
+            beats=self.app_data.song.get_beats_array(plan_entry.start, plan_entry.end),
+            actions_reference=self.app_data.fixtures.actions_reference,
+            user_prompt=plan_entry.description,
+            structured=self.structured
         )
 
+    def translate_plan_entry(self, plan_entry:PlanEntry):
+        self.parse_context(**self._context_args(plan_entry))
+
         write_file(str(self.app_data.logs_folder / "effect_translator.context.txt"), self._context)
-        
+
+    def build_request(self, plan_entry: PlanEntry) -> AgentRequest:
+        """Build an independent LLM request for a plan entry (does not touch the agent context)."""
+        prompt = self.render_context(**self._context_args(plan_entry))
+        return AgentRequest(
+            prompt=prompt,
+            format=self.app_data.fixtures.actions_json_schema if self.structured else None,
+            prefix_hash=self.last_prompt_metrics.prefix_hash,
+            metadata={'plan_entry': plan_entry}
+        )
+
+    def build_retry_request(self, plan_entry: PlanEntry, invalid: List[InvalidAction], attempt: int) -> AgentRequest:
+        """Build a short follow-up request asking to correct only the invalid actions."""
+        prompt = self.render_context(
+            template="effect_translator_retry.j2",
+            invalid_actions=invalid,
+            **self._context_args(plan_entry)
+        )
+        return AgentRequest(
+            prompt=prompt,
+            format=self.app_data.fixtures.actions_json_schema if self.structured else None,
+            prefix_hash=self.last_prompt_metrics.prefix_hash,
+            retries=attempt,
+            metadata={'plan_entry': plan_entry}
+        )
+
+    def translation_key(self, plan_entry: PlanEntry) -> str:
+        """Return the cache key for translating a plan entry with the current inputs."""
+        return self.translation_cache.key(
+            plan_entry,
+            beats=self.app_data.song.get_beats_array(plan_entry.start, plan_entry.end),
+            fixtures=self.app_data.fixtures,
+            model=self.model if not self.race_models else "race:" + ",".join(sorted(self.race_models)),
+            template_version=self.template_version()
+        )
+
+    async def _translate_entry(self, plan_entry: PlanEntry, echo: bool = True, on_action: Optional[Callable[[ActionEntry], None]] = None, queued_at: Optional[float] = None) -> List[ActionEntry]:
+        """Translate a plan entry without applying it, reusing a cached translation when the inputs are unchanged.
+
+        Actions are parsed and validated while the response streams in;
+        `on_action` is called with each valid action as soon as its line completes.
+        `queued_at` (perf_counter) is when the entry started waiting for a slot.
+        When the LLM misses `deadline`, fails or returns no valid action, the
+        rule-based translation is used instead (unless `fallback` is off).
+        """
+        key = self.translation_key(plan_entry)
+        actions = self.translation_cache.get(key) if self.use_cache else None
+        if actions is not None:
+            print(f"♻️ EffectTranslator: reusing cached translation for '{plan_entry.name}' ({len(actions)} actions)")
+            if on_action:
+                for action in actions:
+                    on_action(action)
+            return actions
+
+        try:
+            actions = await asyncio.wait_for(self._llm_translate(plan_entry, echo, on_action, queued_at), self.deadline)
+        except (asyncio.TimeoutError, ValueError) as e:
+            if not self.fallback:
+                raise
+            reason = f"missed the {self.deadline}s deadline" if isinstance(e, asyncio.TimeoutError) else str(e)
+            return self._fallback_translate(plan_entry, reason, on_action)
+        if not actions and self.fallback:
+            return self._fallback_translate(plan_entry, "no valid actions", on_action)
+
+        if actions:
+            self.translation_cache.put(key, actions, plan_entry)
+        return actions
+
+    def _fallback_translate(self, plan_entry: PlanEntry, reason: str, on_action: Optional[Callable[[ActionEntry], None]]) -> List[ActionEntry]:
+        """Rule-based translation of a plan entry.
+
+        Neither the rule-based actions nor the unusable LLM responses are cached
+        (see `_generate_actions`), so the LLM is tried again next time.
+        """
+        print(f"⏱️ EffectTranslator: '{plan_entry.name}' -> {reason}; using the rule-based translation")
+        actions = RuleBasedTranslator(self.app_data.song, self.app_data.fixtures).translate(plan_entry)
+        if on_action:
+            for action in actions:
+                on_action(action)
+        return actions
+
+    async def _llm_translate(self, plan_entry: PlanEntry, echo: bool, on_action: Optional[Callable[[ActionEntry], None]], queued_at: Optional[float]) -> List[ActionEntry]:
+        """Translate a plan entry with the LLM, re-requesting the invalid actions up to max_retries times."""
+        request = self.build_request(plan_entry)
+        if queued_at is not None:
+            request.queued_at = queued_at
+        actions, invalid = await self._generate_actions(request, echo, on_action)
+
+        attempt = 0
+        while invalid and attempt < self.max_retries:
+            attempt += 1
+            print(f"🔁 EffectTranslator: re-requesting {len(invalid)} invalid action(s) of '{plan_entry.name}' (attempt {attempt})")
+            retry = self.build_retry_request(plan_entry, invalid, attempt)
+            retry.model = request.model  # the model that won the race, if any
+            fixed, invalid = await self._generate_actions(retry, echo, on_action)
+            actions.extend(fixed)
+        if attempt:
+            actions.sort(key=lambda action: action.start_time)
+        return actions
+
+    async def _generate_actions(self, request: AgentRequest, echo: bool, on_action: Optional[Callable[[ActionEntry], None]]) -> Tuple[List[ActionEntry], List[InvalidAction]]:
+        """Run a request and return its valid actions and the rejected ones.
+
+        Command lines are parsed and validated while the response streams in;
+        structured (JSON) responses are parsed once complete. With race_models,
+        the first model returning at least one valid action wins.
+        """
+        if self.race_models and request.model is None:
+            actions, invalid = await self.race_async(request, self._accept_candidate)
+            if on_action:
+                for action in actions:
+                    on_action(action)
+            return actions, invalid
+
+        if request.format:
+            await self.run_async(request, echo=echo)
+            actions, invalid = self._parse_structured(request.response, request.model)
+            if not actions:
+                self.forget_response(request)
+            if on_action:
+                for action in actions:
+                    on_action(action)
+            return actions, invalid
+
+        actions: List[ActionEntry] = []
+        validation = ValidationReport()
+        parser = ActionStreamParser(self._parse_action_line)
+
+        def accept(parsed: List[ActionEntry]):
+            for action in parsed:
+                clean, report = validate_actions([action], self.app_data.fixtures)
+                validation.merge(report)
+                for valid_action in clean:
+                    actions.append(valid_action)
+                    if on_action:
+                        on_action(valid_action)
+
+        await self.run_async(request, echo=echo, on_chunk=lambda chunk: accept(parser.feed(chunk)))
+        accept(parser.close())
+        if not actions:
+            # a response without valid actions must not be replayed from the response cache
+            self.forget_response(request)
+
+        self._report_stream(parser, validation, request.response)
+        return actions, self._invalid_lines(parser, validation)
+
+    def _accept_candidate(self, candidate: AgentRequest) -> Optional[Tuple[List[ActionEntry], List[InvalidAction]]]:
+        """Parse a finished race candidate; None unless it produced valid actions."""
+        if candidate.format:
+            actions, invalid = self._parse_structured(candidate.response, candidate.model)
+        else:
+            parser = ActionStreamParser(self._parse_action_line)
+            parser.feed(candidate.response)
+            parser.close()
+            actions, validation = validate_actions(parser.actions, self.app_data.fixtures)
+            self._report_stream(parser, validation, candidate.response, candidate.model)
+            invalid = self._invalid_lines(parser, validation)
+        return (actions, invalid) if actions else None
+
+    @staticmethod
+    def _invalid_lines(parser: ActionStreamParser, validation: ValidationReport) -> List[InvalidAction]:
+        invalid = [{'source': line, 'error': error} for line, error in parser.errors]
+        invalid += [{'source': parser.lines[error.index], 'error': error.message} for error in validation.errors if error.fatal]
+        return invalid
+
+    def _live_renderer(self) -> Callable[[ActionEntry], None]:
+        """Return an on_action callback that previews actions on the DMX canvas."""
+        fixtures = self.app_data.fixtures
+        armed = False
+
+        def render(action: ActionEntry):
+            nonlocal armed
+            if not armed:
+                fixtures.arm_all_fixtures()
+                armed = True
+            fixtures.render_action(action)
+        return render
+
+    async def translate_async(self, plan_entry: PlanEntry) -> List[ActionEntry]:
+        """Translate a plan entry into actions and apply them to the action list."""
+        actions = await self._translate_entry(plan_entry, on_action=self._live_renderer() if self.live_render else None)
+        self.apply_actions(actions, plan_entry=plan_entry)
+        return actions
+
+    def translate(self, plan_entry: PlanEntry) -> List[ActionEntry]:
+        """Synchronous wrapper for translate_async."""
+        return llm_session.run(self.translate_async(plan_entry))
+
+    async def translate_plan_async(self, plan_entries: List[PlanEntry], concurrency: int = 4) -> List[ActionEntry]:
+        """Translate many plan entries with at most `concurrency` LLM calls in flight.
+
+        Results are applied in plan order once all entries are translated,
+        so the final action list does not depend on completion order.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        on_action = self._live_renderer() if self.live_render else None
+
+        async def translate_bounded(plan_entry: PlanEntry) -> List[ActionEntry]:
+            queued_at = time.perf_counter()
+            async with semaphore:
+                print(f"🔄 EffectTranslator: translating '{plan_entry.name}'")
+                return await self._translate_entry(plan_entry, echo=False, on_action=on_action, queued_at=queued_at)
+
+        results = await asyncio.gather(*(translate_bounded(plan_entry) for plan_entry in plan_entries))
+
+        merged: List[ActionEntry] = []
+        for plan_entry, actions in zip(plan_entries, results):
+            self.apply_actions(actions, save=False, plan_entry=plan_entry)
+            merged.extend(actions)
+        self.app_data.action_list.save()
+        return merged
+
+    def translate_plan(self, plan_entries: List[PlanEntry], concurrency: int = 4) -> List[ActionEntry]:
+        """Synchronous wrapper for translate_plan_async."""
+        return llm_session.run(self.translate_plan_async(plan_entries, concurrency))
+
     def parse_response(self):
         """Parse the last response and extract action commands."""
-        
-        if not self._last_response:
+        self.apply_actions(self.parse_actions(self._last_response))
+
+    def parse_actions(self, response: str) -> List[ActionEntry]:
+        """Extract the action commands of a response into ActionEntry objects."""
+        if self.structured:
+            return self._parse_structured(response)[0]
+
+        parser = ActionStreamParser(self._parse_action_line)
+        parser.feed(response or '')
+        parser.close()
+
+        actions, self.last_validation = validate_actions(parser.actions, self.app_data.fixtures)
+        self._report_stream(parser, self.last_validation, response)
+        return actions
+
+    def _report_stream(self, parser: ActionStreamParser, validation: ValidationReport, response: str, model: Optional[str] = None):
+        """Print the parse and validation problems of a translated response."""
+        self.last_validation = validation
+        LLMTelemetry().record_parse(self.__class__.__name__, model or self.model, parser.found_block and validation.valid > 0)
+        if not response:
             print("⚠️ No response to parse")
             return
-            
-        # Extract actions block from the response
-        actions_match = re.search(r'```actions\s*\n(.*?)\n```', self._last_response, re.DOTALL)
-        if not actions_match:
+        if not parser.found_block:
             print("⚠️ No actions block found in response")
             return
-            
-        actions_text = actions_match.group(1).strip()
-        if not actions_text:
-            print("⚠️ Empty actions block")
-            return
-            
-        action_lines = [line.strip() for line in actions_text.split('\n') if line.strip()]
-        
-        if not action_lines:
+        for line, error in parser.errors:
+            print(f"⚠️ EffectTranslator.parse_actions -> Error parsing action line '{line}': {error}")
+        if not parser.actions and not parser.errors:
             print("⚠️ No action commands found")
+        if not validation.ok:
+            print(f"⚠️ EffectTranslator.parse_actions -> {validation}")
+
+    def _parse_structured(self, response: str, model: Optional[str] = None) -> Tuple[List[ActionEntry], List[InvalidAction]]:
+        """Parse a JSON `{"actions": [...]}` response; returns the valid actions and the rejected items."""
+        model = model or self.model
+        if not response:
+            print("⚠️ No response to parse")
+            LLMTelemetry().record_parse(self.__class__.__name__, model, False)
+            return [], []
+        try:
+            items = json.loads(response)["actions"]
+            if not isinstance(items, list):
+                raise ValueError("'actions' is not a list")
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ EffectTranslator.parse_actions -> Invalid JSON response: {e}")
+            LLMTelemetry().record_parse(self.__class__.__name__, model, False)
+            return [], []
+
+        invalid: List[InvalidAction] = []
+        parsed: List[ActionEntry] = []
+        sources: List[str] = []
+        for item in items:
+            source = json.dumps(item)
+            try:
+                parsed.append(ActionEntry(
+                    float(item["start_time"]),
+                    str(item["action"]),
+                    float(item.get("duration", 0.0)),
+                    str(item["fixture_id"]),
+                    dict(item.get("parameters") or {}),
+                ))
+                sources.append(source)
+            except (KeyError, TypeError, ValueError, AttributeError) as e:
+                invalid.append({'source': source, 'error': f"Malformed action: {e}"})
+
+        actions, self.last_validation = validate_actions(parsed, self.app_data.fixtures)
+        invalid += [{'source': sources[error.index], 'error': error.message} for error in self.last_validation.errors if error.fatal]
+        if invalid or not self.last_validation.ok:
+            print(f"⚠️ EffectTranslator.parse_actions -> {self.last_validation} ({len(invalid)} invalid)")
+        LLMTelemetry().record_parse(self.__class__.__name__, model, bool(actions))
+        return actions, invalid
+
+    def apply_actions(self, actions: List[ActionEntry], save: bool = True, plan_entry: Optional[PlanEntry] = None):
+        """Replace the actions of a plan entry (or, without one, the time range covered by `actions`) and save the action list.
+
+        Clearing by the plan entry range keeps the actions that neighbouring
+        entries placed outside of it, whatever order the entries are applied in.
+        """
+        if not actions:
             return
-            
-        # Find time range to clear existing actions
-        times = []
-        for line in action_lines:
-            time_match = re.search(r'at\s+([\d.]+)', line)
-            if time_match:
-                times.append(float(time_match.group(1)))
-                
-        if times:
-            min_time = min(times)
-            max_time = max(times)
-            # Clear existing actions in this time range
+
+        # Clear existing actions in this time range
+        if plan_entry is not None:
+            self.app_data.action_list.clear_range(plan_entry.start, plan_entry.end)
+        else:
+            min_time = min(action.start_time for action in actions)
+            max_time = max(action.start_time for action in actions)
             self.app_data.action_list.clear_range(min_time, max_time + 0.001)  # Add small buffer for end time
-            
-        # Parse each action line
-        for line in action_lines:
-            try:
-                action_entry = self._parse_action_line(line)
-                if action_entry:
-                    self.app_data.action_list.add_action(action_entry)
-            except Exception as e:
-                print(f"⚠️ EffectTranslator.parse_response -> Error parsing action line '{line}': {e}")
-                
+
+        # songs without a usable beat grid have no tempo map: actions keep absolute times
+        tempo_map = self.app_data.song.tempo_map if self.beat_relative else None
+        for action_entry in actions:
+            if tempo_map and not action_entry.is_beat_relative:
+                action_entry.anchor_to_beats(tempo_map)
+            self.app_data.action_list.add_action(action_entry)
+
         # Save the updated action list
-        self.app_data.action_list.save()
-        
+        if save:
+            self.app_data.action_list.save()
+
     def _parse_action_line(self, line: str) -> ActionEntry:
-        """Parse a single action command line into an ActionEntry."""
-        # Pattern to match: action_name fixture_id at time [for duration] [parameters...]
-        # Examples:
-        # flash parcan_pl at 0.371 channels=[blue] initial_value=1.0 end_value=0.0 duration=2.5
-        # fade_channel parcan_l at 0.720 for 3.0 channel=[blue] start_value=1.0 end_value=0.0
-        
-        # Basic pattern: action fixture at time
-        basic_match = re.match(r'(\w+)\s+(\w+)\s+at\s+([\d.]+)', line)
-        if not basic_match:
+        """Parse a single action command line into an ActionEntry.
+
+        Format: `action fixture_id at start_time [for duration] [name=value ...]`
+        e.g. `fade_channel parcan_l at 0.720 for 3.0 channel=[blue] start_value=1.0 end_value=0.0`
+
+        The line is tokenized once; values are lists (`[a, b]`), quoted or
+        bare strings, or numbers. `duration=X` is the same as `for X`.
+        """
+        words: List[str] = []
+        parameters: Dict[str, Any] = {}
+        for match in COMMAND_TOKEN.finditer(line):
+            name, value, word = match.groups()
+            if word is not None:
+                words.append(word)
+            else:
+                parameters[name] = self._parse_value(value)
+
+        if len(words) < 4 or words[2] != 'at' or not NUMBER.fullmatch(words[3]):
             raise ValueError(f"Invalid action format: {line}")
-            
-        action_name = basic_match.group(1)
-        fixture_id = basic_match.group(2)
-        start_time = float(basic_match.group(3))
-        
-        # Extract duration - either "for X" or "duration=X"
+        action_name, fixture_id, start_time = words[0], words[1], float(words[3])
+
         duration = 0.0
-        duration_match = re.search(r'for\s+([\d.]+)', line)
-        if duration_match:
-            duration = float(duration_match.group(1))
+        if len(words) >= 6 and words[4] == 'for' and NUMBER.fullmatch(words[5]):
+            duration = float(words[5])
+            words = words[6:]
         else:
-            duration_param_match = re.search(r'duration=([\d.]+)', line)
-            if duration_param_match:
-                duration = float(duration_param_match.group(1))
-                
-        # Extract all parameters
-        parameters = {}
-        
-        # Extract channel/channels parameter
-        channels_match = re.search(r'channels?=\[([^\]]+)\]', line)
-        if channels_match:
-            channels_str = channels_match.group(1)
-            # Remove quotes and split by comma
-            channels = [ch.strip().strip('"\'') for ch in channels_str.split(',')]
-            parameters['channel'] = channels
-            
-        # Extract other numeric parameters
-        param_patterns = [
-            r'(\w+)=([\d.]+)',  # numeric parameters like value=1.0
-        ]
-        
-        for pattern in param_patterns:
-            for match in re.finditer(pattern, line):
-                param_name = match.group(1)
-                param_value = float(match.group(2))
-                # Skip already processed parameters
-                if param_name not in ['duration']:
-                    parameters[param_name] = param_value
-                    
-        return ActionEntry(start_time, action_name, duration, fixture_id, parameters)
\ No newline at end of file
+            words = words[4:]
+        if words:
+            raise ValueError(f"Unexpected text '{' '.join(words)}' in: {line}")
+
+        if 'duration' in parameters:
+            value = parameters.pop('duration')
+            if not isinstance(value, float):
+                raise ValueError(f"Invalid duration '{value}' in: {line}")
+            duration = value
+        parameters.pop('start_time', None)
+
+        return ActionEntry(start_time, action_name, duration, fixture_id, parameters)
+
+    @staticmethod
+    def _parse_value(value: str) -> Any:
+        if value.startswith('['):
+            return [item.strip().strip('"\'') for item in value[1:-1].split(',') if item.strip()]
+        if value[0] in '"\'' and value[-1] == value[0] and len(value) > 1:
+            return value[1:-1]
+        if NUMBER.fullmatch(value):
+            return float(value)
+        return value
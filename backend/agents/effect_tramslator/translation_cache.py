@@ -0,0 +1,106 @@
+"""Persistent cache of plan-entry translations.
+
+Translating a PlanEntry is a full LLM round-trip. The result only
+depends on the inputs that reach the prompt and the model, so the
+parsed actions are stored on disk under a hash of:
+
+- the plan entry description and start/end times
+- the beat times sent to the model
+- the fixture profile (ids, types, channels and action signatures)
+- the model name
+- the prompt template version (hash of the template sources)
+
+Entries live as one JSON file per key in
+"{AppData.cache_folder}/translations/{key}.json".
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, List, Optional
+
+from ...models.fixtures.fixture_list import FixtureList
+from ...models.lighting.action_list import ActionEntry
+from ...models.lighting.plan import PlanEntry
+
+
+def fixture_profile(fixtures: FixtureList) -> List[dict[str, Any]]:
+    """Return the parts of the fixture setup that can change a translation."""
+    return [
+        {
+            "id": fixture.id,
+            "type": fixture.type,
+            "channels": fixture.channels,
+            "actions": [
+                {"name": action.name, "parameters": [param.name for param in action.parameters]}
+                for action in fixture.actions
+            ],
+        }
+        for fixture in fixtures
+    ]
+
+
+class TranslationCache:
+    """On-disk cache of parsed ActionEntry lists keyed by translation inputs."""
+
+    def __init__(self, cache_folder: Path):
+        self._folder = Path(cache_folder) / "translations"
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, plan_entry: PlanEntry, beats: List[float], fixtures: FixtureList, model: str, template_version: str) -> str:
+        """Return the content hash identifying a translation."""
+        payload = {
+            "description": plan_entry.description,
+            "start": plan_entry.start,
+            "end": plan_entry.end,
+            "beats": beats,
+            "fixtures": fixture_profile(fixtures),
+            "model": model,
+            "template_version": template_version,
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _entry_file(self, key: str) -> Path:
+        return self._folder / f"{key}.json"
+
+    def get(self, key: str) -> Optional[List[ActionEntry]]:
+        """Return the cached actions for a key, or None on a miss."""
+        entry_file = self._entry_file(key)
+        if not entry_file.exists():
+            self.misses += 1
+            return None
+        try:
+            with open(entry_file, "r") as f:
+                data = json.load(f)
+            actions = [ActionEntry(**entry) for entry in data["actions"]]
+        except Exception as e:
+            print(f"⚠️ TranslationCache.get -> Ignoring unreadable cache entry {entry_file.name}: {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return actions
+
+    def put(self, key: str, actions: List[ActionEntry], plan_entry: Optional[PlanEntry] = None) -> None:
+        """Store the parsed actions for a key."""
+        os.makedirs(self._folder, exist_ok=True)
+        data = {
+            "plan_entry": plan_entry.name if plan_entry else None,
+            "created": time.time(),
+            "actions": [entry.__dict__ for entry in actions],
+        }
+        # write to a temp file first so a crash never leaves a truncated entry
+        tmp_file = self._entry_file(key).with_suffix(".tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_file, self._entry_file(key))
+
+    def clear(self) -> None:
+        """Remove all cached translations."""
+        if not self._folder.exists():
+            return
+        for entry_file in self._folder.glob("*.json"):
+            entry_file.unlink()
@@ -0,0 +1,259 @@
+"""Compact, token-budgeted summary of the song analysis for planner prompts.
+
+The raw analysis ("{song}.analysis.json") holds thousands of points per
+curve, far too much for a local model context. The summarizer turns it
+into per-section statistics (energy level and trend, brightness, drum
+density, vocal coverage, events and mood), a downsampled energy profile
+and the strongest energy peaks, all computed with vectorized numpy ops.
+Sections that cross the segment boundaries are described over their
+part inside the segment only.
+
+Section statistics are computed once per song; summaries are memoized
+per (segment, token budget). Detail is reduced step by step until the
+summary fits the budget: first the profile points, sampled beats and
+peaks, then the per-section events, mood and emotion, then adjacent
+sections are merged (shortest pairs first) down to a single one. The
+size is measured on the summary rendered with SUMMARY_TEMPLATE, the
+text that actually goes into the prompt.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from common.models.song.analysis import SongAnalysis
+from .. import prompt_templates
+
+# prompt fragment rendering a summary (as `analysis_summary`)
+SUMMARY_TEMPLATE = "_analysis_summary.j2"
+PROMPTS_FOLDER = str(Path(__file__).resolve().parent.parent / "prompts")
+
+# (energy profile points, sampled beats, energy peaks) from richest to smallest
+DETAIL_LEVELS: List[Tuple[int, int, int]] = [
+    (64, 48, 8),
+    (48, 32, 6),
+    (32, 24, 4),
+    (24, 16, 3),
+    (16, 8, 2),
+    (0, 4, 0),
+]
+
+# per-section fields dropped (cumulatively) once the detail levels are exhausted
+SECTION_DROPS: List[Tuple[str, ...]] = [("events",), ("mood", "emotion")]
+
+# spectral centroid (Hz) thresholds for the brightness label
+BRIGHTNESS_LEVELS = [(1500.0, "dark"), (3000.0, "warm"), (5000.0, "bright")]
+
+
+def _brightness(centroid: float) -> str:
+    for threshold, label in BRIGHTNESS_LEVELS:
+        if centroid < threshold:
+            return label
+    return "harsh"
+
+
+def trend(values: np.ndarray) -> str:
+    if len(values) < 2:
+        return "flat"
+    slope = np.polyfit(np.arange(len(values)), values, 1)[0] * len(values)
+    if slope > 0.15:
+        return "rising"
+    if slope < -0.15:
+        return "falling"
+    return "flat"
+
+
+def downsample(values: np.ndarray, times: np.ndarray, start: float, end: float, points: int) -> np.ndarray:
+    """Mean of `values` over `points` equal time bins between start and end."""
+    if points <= 0 or len(values) == 0 or end <= start:
+        return np.empty(0)
+    edges = np.searchsorted(times, np.linspace(start, end, points + 1))
+    edges = np.clip(edges, 0, len(values) - 1)
+    # bins narrower than one sample take the sample at their start
+    lower, upper = edges[:-1], np.maximum(edges[1:], edges[:-1] + 1)
+    sums = np.concatenate(([0.0], np.cumsum(values)))
+    return (sums[upper] - sums[lower]) / (upper - lower)
+
+
+def pick_peaks(values: np.ndarray, times: np.ndarray, count: int, min_distance: float) -> List[Tuple[float, float]]:
+    """Return up to `count` (time, value) local maxima, strongest first, at least `min_distance` seconds apart."""
+    if count <= 0 or len(values) < 3:
+        return []
+    inner = values[1:-1]
+    candidates = np.flatnonzero((inner >= values[:-2]) & (inner > values[2:])) + 1
+    candidates = candidates[np.argsort(values[candidates])[::-1]]
+    picked: List[int] = []
+    for index in candidates:
+        if all(abs(times[index] - times[other]) >= min_distance for other in picked):
+            picked.append(index)
+            if len(picked) == count:
+                break
+    return [(round(float(times[i]), 3), round(float(values[i]), 2)) for i in picked]
+
+
+class AnalysisSummarizer:
+    """Summarizes one song analysis; reuse the instance for every prompt of the song."""
+
+    def __init__(self, analysis: SongAnalysis, prompts_folder: str = PROMPTS_FOLDER):
+        self._analysis = analysis
+        self._prompts_folder = prompts_folder
+        self._duration = analysis.duration
+        self._summaries: Dict[Tuple[float, float, int], Dict[str, Any]] = {}
+
+        energy = analysis.curve("energy_curve")
+        self._energy_peak = float(energy.max()) if len(energy) else 0.0
+        self._energy = energy / self._energy_peak if self._energy_peak > 0 else energy
+        self._energy_times = analysis.curve_times("energy_curve")
+
+        drums = self._analysis.get("drums", {})
+        self._kicks = np.sort(np.asarray(drums.get("kick_onsets", []), dtype=float))
+        self._snares = np.sort(np.asarray(drums.get("snare_onsets", []), dtype=float))
+        self._beats = np.sort(np.asarray(self._analysis.get("beats", []), dtype=float))
+
+        vocals = self._analysis.get("vocals", {}).get("active_sections", [])
+        self._vocal_starts = np.asarray([v["start"] for v in vocals], dtype=float)
+        self._vocal_ends = np.asarray([v["end"] for v in vocals], dtype=float)
+        self._events = self._analysis.get("events", [])
+
+        self._sections = self._section_stats()
+
+    def _count(self, onsets: np.ndarray, start: float, end: float) -> int:
+        return int(np.searchsorted(onsets, end) - np.searchsorted(onsets, start))
+
+    def _vocal_coverage(self, start: float, end: float) -> float:
+        if end <= start or len(self._vocal_starts) == 0:
+            return 0.0
+        overlap = np.clip(np.minimum(self._vocal_ends, end) - np.maximum(self._vocal_starts, start), 0, None)
+        return float(overlap.sum() / (end - start))
+
+    def _event_labels(self, start: float, end: float) -> List[str]:
+        return [f"{event['type']}@{round(event['time'], 2)}" for event in self._events if start <= event["time"] < end]
+
+    def _stats(self, name: str, start: float, end: float) -> Dict[str, Any]:
+        """Statistics of the curves and onsets between start and end."""
+        _, energy = self._analysis.window("energy_curve", start, end)
+        if self._energy_peak > 0:
+            energy = energy / self._energy_peak
+        _, centroid = self._analysis.window("spectral_centroid", start, end)
+        beats = self._count(self._beats, start, end)
+        return {
+            "section": name,
+            "start": start,
+            "end": end,
+            "energy": round(float(energy.mean()), 2) if len(energy) else None,
+            "energy_peak": round(float(energy.max()), 2) if len(energy) else None,
+            "energy_trend": trend(energy),
+            "brightness": _brightness(float(np.median(centroid))) if len(centroid) else None,
+            "kicks_per_beat": round(self._count(self._kicks, start, end) / beats, 2) if beats else None,
+            "snares": self._count(self._snares, start, end),
+            "vocals": round(self._vocal_coverage(start, end), 2),
+        }
+
+    def _section_stats(self) -> List[Dict[str, Any]]:
+        moods = self._analysis.get("spectral_emotion", {}).get("section_moods", [])
+        mood_by_start = {round(m["start"], 2): m.get("mood_analysis", {}) for m in moods}
+        stats = []
+        for section in self._analysis.get("structure", []):
+            start, end = section["start"], section["end"]
+            mood = mood_by_start.get(round(start, 2), {})
+            stats.append({
+                **self._stats(section["section"], start, end),
+                "mood": mood.get("mood"),
+                "emotion": mood.get("emotion"),
+                "events": self._event_labels(start, end),
+            })
+        return stats
+
+    def _clip(self, section: Dict[str, Any], start_time: float, end_time: float) -> Dict[str, Any]:
+        """A section restricted to the segment (statistics recomputed over the part inside it)."""
+        if section["start"] >= start_time and section["end"] <= end_time:
+            return section
+        start, end = max(section["start"], start_time), min(section["end"], end_time)
+        return {
+            **self._stats(section["section"], round(start, 3), round(end, 3)),
+            "mood": section["mood"],
+            "emotion": section["emotion"],
+            "events": self._event_labels(start, end),
+        }
+
+    def _merge(self, sections: List[Dict[str, Any]], count: int) -> List[Dict[str, Any]]:
+        """Merge adjacent sections, shortest pairs first, down to `count` sections (statistics recomputed)."""
+        groups = [(index, index) for index in range(len(sections))]
+        while len(groups) > max(count, 1):
+            pair = min(range(len(groups) - 1),
+                       key=lambda i: sections[groups[i + 1][1]]["end"] - sections[groups[i][0]]["start"])
+            groups[pair:pair + 2] = [(groups[pair][0], groups[pair + 1][1])]
+        merged = []
+        for first, last in groups:
+            name = sections[first]["section"]
+            if last != first:
+                name += f"-{sections[last]['section']}"
+            merged.append(self._stats(name, sections[first]["start"], sections[last]["end"]))
+        return merged
+
+    def _levels(self, sections: List[Dict[str, Any]]) -> Iterator[Tuple[int, int, int, List[Dict[str, Any]]]]:
+        """(profile points, sampled beats, peaks, sections) from richest to smallest."""
+        for detail in DETAIL_LEVELS:
+            yield (*detail, sections)
+        smallest = DETAIL_LEVELS[-1]
+        for fields in SECTION_DROPS:
+            sections = [{key: value for key, value in section.items() if key not in fields} for section in sections]
+            yield (*smallest, sections)
+        count = len(sections)
+        while count > 1:
+            count //= 2
+            yield (*smallest, self._merge(sections, count))
+
+    def summarize(self, start_time: float = 0, end_time: Optional[float] = None, token_budget: int = 800) -> Dict[str, Any]:
+        """Return the summary of a segment that fits within `token_budget` (estimated) tokens.
+
+        When even the smallest summary (one merged section) is over the
+        budget, it is returned anyway with a warning.
+        """
+        end_time = self._duration if end_time is None else end_time
+        key = (round(start_time, 3), round(end_time, 3), token_budget)
+        if key not in self._summaries:
+            sections = [self._clip(s, start_time, end_time) for s in self._sections if s["end"] > start_time and s["start"] < end_time]
+            summary: Dict[str, Any] = {}
+            for profile_points, beat_samples, peak_count, level_sections in self._levels(sections):
+                summary = self._build(start_time, end_time, profile_points, beat_samples, peak_count, level_sections)
+                if self.estimate_tokens(summary) <= token_budget:
+                    break
+            else:
+                print(f"⚠️ AnalysisSummarizer: summary of {start_time}s - {end_time}s is ~{self.estimate_tokens(summary)} tokens, "
+                      f"over the budget of {token_budget}")
+            self._summaries[key] = summary
+        return self._summaries[key]
+
+    def estimate_tokens(self, summary: Dict[str, Any]) -> int:
+        """Estimated tokens of a summary as rendered in the prompt (SUMMARY_TEMPLATE)."""
+        _, metrics = prompt_templates.render(self._prompts_folder, SUMMARY_TEMPLATE, analysis_summary=summary)
+        return metrics.tokens
+
+    def _build(self, start_time: float, end_time: float, profile_points: int, beat_samples: int, peak_count: int,
+               sections: List[Dict[str, Any]]) -> Dict[str, Any]:
+        segment_beats = self._beats[(self._beats >= start_time) & (self._beats <= end_time)]
+        if len(segment_beats) > beat_samples:
+            sampled = segment_beats[np.unique(np.linspace(0, len(segment_beats) - 1, beat_samples).round().astype(int))]
+        else:
+            sampled = segment_beats
+
+        in_segment = (self._energy_times >= start_time) & (self._energy_times <= end_time)
+        beat_length = 60.0 / float(self._analysis["tempo"]) if self._analysis.get("tempo") else 0.5
+        profile = downsample(self._energy, self._energy_times, start_time, end_time, profile_points)
+
+        return {
+            "tempo": self._analysis.get("tempo", "Unknown"),
+            "key": self._analysis.get("key", "Unknown"),
+            "duration": self._duration,
+            "target_segment": f"{start_time}s - {end_time}s",
+            "sections": sections,
+            "energy_profile": "".join(str(int(v)) for v in np.minimum(profile * 10, 9)),
+            "energy_step": round((end_time - start_time) / profile_points, 2) if profile_points else None,
+            "energy_peaks": pick_peaks(self._energy[in_segment], self._energy_times[in_segment], peak_count, min_distance=4 * beat_length),
+            "beat_count": len(segment_beats),
+            "first_beat": round(float(segment_beats[0]), 3) if len(segment_beats) else start_time,
+            "last_beat": round(float(segment_beats[-1]), 3) if len(segment_beats) else end_time,
+            "sampled_beats": [round(float(beat), 3) for beat in sampled],
+        }
@@ -1,61 +1,33 @@
+import asyncio
 import re
-from typing import Optional
+from typing import List, Optional
 from ...models.app_data import AppData
+from .. import llm_session
 from ..agent import Agent
 from ...models.lighting.plan import PlanEntry
 from ...utils import write_file
+from ..telemetry import LLMTelemetry
+from ..rule_based.rule_planner import RuleBasedPlanner
+from .analysis_summarizer import AnalysisSummarizer
 
 class LightingPlanner(Agent):
-    def __init__(self, model: str = "cogito:8b"):
+    def __init__(self, model: str = "cogito:8b", analysis_token_budget: int = 800):
         self._model = model
         super().__init__(model=self._model)
+        self.analysis_token_budget = analysis_token_budget  # estimated tokens of the analysis summary in the prompt
+        self._summarizer: Optional[AnalysisSummarizer] = None
+        self._summarizer_version: Optional[str] = None  # song version the summarizer was built for
 
     def _extract_analysis_summary(self, start_time: float = 0, end_time: Optional[float] = None) -> dict:
-        """Extract relevant analysis data for a specific time segment."""
-        analysis = self.app_data.song_analysis
-        
-        if not analysis:
-            return {}
-        
-        # Get segment boundaries
-        if end_time is None:
-            end_time = self.app_data.song.duration
-        
-        # Extract key musical elements
-        summary = {
-            "tempo": analysis.get("tempo", "Unknown"),
-            "key": analysis.get("key", "Unknown"),
-            "duration": self.app_data.song.duration,
-            "target_segment": f"{start_time}s - {end_time}s"
-        }
-        
-        # Get relevant structure sections
-        structure = analysis.get("structure", [])
-        relevant_sections = [
-            section for section in structure 
-            if section["end"] > start_time and section["start"] < end_time
-        ]
-        summary["structure"] = relevant_sections
-        
-        # Get beat times for the segment
-        beats = analysis.get("beats", [])
-        segment_beats = [beat for beat in beats if start_time <= beat <= end_time]
-        summary["beat_count"] = len(segment_beats)
-        summary["first_beat"] = segment_beats[0] if segment_beats else start_time
-        summary["last_beat"] = segment_beats[-1] if segment_beats else end_time
-        
-        # Sample beats (first 10, last 10, and every 10th in between)
-        if len(segment_beats) > 20:
-            sampled_beats = (
-                segment_beats[:10] + 
-                segment_beats[10:-10:10] + 
-                segment_beats[-10:]
-            )
-            summary["sampled_beats"] = sampled_beats
-        else:
-            summary["sampled_beats"] = segment_beats
-        
-        return summary
+        """Summarize the song analysis for a time segment within the prompt token budget."""
+        song = self.app_data.song
+        if self._summarizer is None or self._summarizer_version != song.version:
+            analysis = self.app_data.song_analysis
+            if not analysis:
+                return {}
+            self._summarizer = AnalysisSummarizer(analysis, self.app_data.prompts_folder)
+            self._summarizer_version = song.version
+        return self._summarizer.summarize(start_time, end_time, self.analysis_token_budget)
 
     def parse_song_context(self, song_name: str, start_time: float = 0, end_time: Optional[float] = None):
         """Parse song context for lighting planning with smart analysis extraction."""
@@ -76,11 +48,37 @@ class LightingPlanner(Agent):
         
         write_file(str(self.app_data.logs_folder / "lighting_planner.context.txt"), self._context)
         
-    def parse_response(self):
-        """Parse the last response and extract plan entries."""
+    async def create_plan_async(self, song_name: str, deadline: Optional[float] = None, fallback: bool = True) -> List[PlanEntry]:
+        """Plan the song with the LLM and replace the song plan.
+
+        When the LLM misses `deadline` (seconds), fails or returns no plan
+        entries, the rule-based plan is used instead (unless `fallback` is off).
+        """
+        self.parse_song_context(song_name)
+        try:
+            await asyncio.wait_for(self.run_async(echo=False), deadline)
+            entries = self.parse_response()
+        except (asyncio.TimeoutError, ValueError) as e:
+            if not fallback:
+                raise
+            reason = f"missed the {deadline}s deadline" if isinstance(e, asyncio.TimeoutError) else str(e)
+            entries = []
+        else:
+            reason = "no plan entries"
+        if not entries and fallback:
+            print(f"⏱️ LightingPlanner -> {reason}; using the rule-based plan")
+            entries = RuleBasedPlanner().create_plan()
+        return entries
+
+    def create_plan(self, song_name: str, deadline: Optional[float] = None, fallback: bool = True) -> List[PlanEntry]:
+        """Synchronous wrapper for create_plan_async."""
+        return llm_session.run(self.create_plan_async(song_name, deadline, fallback))
+
+    def parse_response(self) -> List[PlanEntry]:
+        """Parse the last response, replace the song plan and return its entries."""
         if not self._last_response:
             print("⚠️ No response to parse")
-            return
+            return []
             
         write_file(str(self.app_data.logs_folder / "lighting_planner.response.txt"), self._last_response)
         
@@ -89,7 +87,8 @@ class LightingPlanner(Agent):
         
         if not plan_lines:
             print("⚠️ No plan entries found in response")
-            return
+            LLMTelemetry().record_parse(self.__class__.__name__, self.model, False)
+            return []
             
         # Clear existing plan entries
         self.app_data.plan.clear_plan()
@@ -104,6 +103,8 @@ class LightingPlanner(Agent):
             except Exception as e:
                 print(f"⚠️ LightingPlanner.parse_response -> Error parsing plan line '{line}': {e}")
         
+        LLMTelemetry().record_parse(self.__class__.__name__, self.model, bool(parsed_entries))
+
         # Sort entries by start time and assign IDs
         parsed_entries.sort(key=lambda x: x.start)
         
@@ -124,6 +125,7 @@ class LightingPlanner(Agent):
                     
         # Save the updated plan
         self.app_data.plan.save_plan()
+        return parsed_entries
 
     def _parse_plan_line(self, line: str) -> PlanEntry:
         """Parse a single plan entry line into a PlanEntry."""
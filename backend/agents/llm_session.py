@@ -0,0 +1,52 @@
+"""Shared keep-alive HTTP sessions for LLM calls.
+
+aiohttp sessions are bound to the event loop they were created on, so
+one pooled session is kept per running loop and reused by every agent
+request on that loop: connections to the Ollama server stay open
+between calls instead of being re-established for each generation.
+
+Use `run()` instead of `asyncio.run()` to execute agent coroutines from
+synchronous code; it closes the loop's session before the loop ends.
+"""
+
+import asyncio
+from typing import Any, Coroutine, Dict, TypeVar
+
+import aiohttp
+
+T = TypeVar("T")
+
+# maximum simultaneous connections per session (per event loop)
+CONNECTION_LIMIT = 16
+
+_sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Return the pooled session of the running event loop (created on first use)."""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        # No total timeout: generations can take minutes; only guard stalled reads
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=600)
+        connector = aiohttp.TCPConnector(limit=CONNECTION_LIMIT, keepalive_timeout=600)
+        session = aiohttp.ClientSession(timeout=timeout, connector=connector)
+        _sessions[loop] = session
+    return session
+
+
+async def close_session() -> None:
+    """Close the pooled session of the running event loop."""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def run(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine on a new event loop and close its pooled session afterwards."""
+    async def _run() -> T:
+        try:
+            return await coro
+        finally:
+            await close_session()
+    return asyncio.run(_run())
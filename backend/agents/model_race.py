@@ -0,0 +1,73 @@
+"""Win statistics of models racing for the same request.
+
+When an agent races several models (Agent.race_async), the first valid
+response wins and the others are cancelled. The policy keeps wins and
+races per agent class and model in "{AppData.cache_folder}/race_policy.json"
+and orders the candidates by smoothed win rate, so a limited race width
+keeps racing the models most likely to win while new models still get
+a chance (unseen models rank with a neutral prior). When the width is
+smaller than the model list, its last slot goes to the least raced of
+the remaining models, so a model ranked out after a bad run is raced
+again and its statistics can recover.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class ModelRacePolicy:
+    """Learns which model wins the races of each agent type."""
+
+    def __init__(self, cache_folder: Path):
+        self._file = Path(cache_folder) / "race_policy.json"
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Dict[str, int]]] = {}
+        if self._file.exists():
+            try:
+                with open(self._file, "r") as f:
+                    self._stats = json.load(f)
+            except (OSError, ValueError):
+                print(f"⚠️ ModelRacePolicy: ignoring unreadable {self._file}")
+
+    def win_rate(self, agent: str, model: str) -> float:
+        """Win rate with a Laplace prior (an unseen model scores 0.5)."""
+        stats = self._stats.get(agent, {}).get(model, {})
+        return (stats.get("wins", 0) + 1) / (stats.get("races", 0) + 2)
+
+    def races(self, agent: str, model: str) -> int:
+        return self._stats.get(agent, {}).get(model, {}).get("races", 0)
+
+    def candidates(self, agent: str, models: List[str], width: Optional[int] = None) -> List[str]:
+        """Return the `width` models most likely to win, best first (the last slot explores, see module doc)."""
+        ranked = sorted(models, key=lambda model: self.win_rate(agent, model), reverse=True)
+        if not width or width >= len(ranked):
+            return ranked
+        if width < 2:
+            return ranked[:width]
+        rest = ranked[width - 1:]
+        return ranked[:width - 1] + [min(rest, key=lambda model: self.races(agent, model))]
+
+    def record(self, agent: str, models: List[str], winner: Optional[str]):
+        """Count a race between `models` and persist the statistics."""
+        with self._lock:
+            agent_stats = self._stats.setdefault(agent, {})
+            for model in models:
+                stats = agent_stats.setdefault(model, {"wins": 0, "races": 0})
+                stats["races"] += 1
+                if model == winner:
+                    stats["wins"] += 1
+            self._save()
+
+    def _save(self):
+        os.makedirs(self._file.parent, exist_ok=True)
+        tmp_file = self._file.with_suffix(".tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(self._stats, f, indent=2)
+        os.replace(tmp_file, self._file)
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        return self._stats
@@ -0,0 +1,155 @@
+"""Process-wide prompt template cache and memoized prompt fragments.
+
+One Jinja Environment is kept per prompts folder, so templates are
+parsed and compiled once and recompiled only when their file changes
+(Jinja checks the source mtime on every get_template with auto_reload).
+
+Static prompt fragments (fixture list, action reference, song info)
+only depend on the loaded song and fixtures. Templates render them with
+`{{ fragment('_fixtures_info.j2') }}` instead of `{% include %}`; the
+output is memoized per (fragment, fragment mtime, song version,
+fixtures version) and reused by every later prompt.
+
+Templates mark where their stable prefix ends with
+`{{ variable_suffix() }}`. Everything before the mark must only depend
+on the song and fixtures, so consecutive prompts share it byte for byte
+and the LLM server can reuse its evaluated state (see Agent.keep_alive).
+The mark is removed from the rendered prompt; its position and the hash
+of the prefix are reported in PromptMetrics.
+"""
+
+import hashlib
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from jinja2 import Environment, FileSystemLoader, Template, meta, pass_context
+
+_environments: Dict[str, Environment] = {}
+_fragments: Dict[Tuple[Any, ...], str] = {}
+
+# fragment('name.j2') calls inside template sources
+FRAGMENT_PATTERN = re.compile(r"""fragment\(\s*['"]([^'"]+)['"]\s*\)""")
+
+# placeholder rendered by variable_suffix(), removed from the final prompt
+SUFFIX_MARKER = "\x1e<variable-suffix>\x1e"
+
+# rough chars-per-token ratio of the local models, used for size metrics
+CHARS_PER_TOKEN = 4
+
+_stats = {
+    "fragment_hits": 0,
+    "fragment_misses": 0,
+}
+
+
+@dataclass
+class PromptMetrics:
+    """Cost and size of building one prompt."""
+    template: str
+    build_time: float  # seconds
+    chars: int
+    tokens: int  # estimated
+    prefix_chars: int = 0  # length of the stable prefix (0 = template has no variable_suffix mark)
+    prefix_hash: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.__dict__.copy()
+
+
+def _version(value: Any) -> Optional[str]:
+    return getattr(value, "version", None)
+
+
+@pass_context
+def _fragment(context, name: str) -> str:
+    env = context.environment
+    song = context.get("song")
+    fixtures = context.get("fixtures")
+    template = env.get_template(name)
+    variables = {
+        "song": song,
+        "fixtures": fixtures,
+        "actions_reference": getattr(fixtures, "actions_reference", None),
+    }
+
+    song_version, fixtures_version = _version(song), _version(fixtures)
+    if (song is not None and song_version is None) or (fixtures is not None and fixtures_version is None):
+        # unversioned inputs cannot be memoized safely
+        return template.render(**variables)
+
+    key = (id(env), name, os.path.getmtime(template.filename), song_version, fixtures_version)
+    rendered = _fragments.get(key)
+    if rendered is None:
+        _stats["fragment_misses"] += 1
+        rendered = template.render(**variables)
+        _fragments[key] = rendered
+    else:
+        _stats["fragment_hits"] += 1
+    return rendered
+
+
+def get_environment(prompts_folder: str) -> Environment:
+    """Return the shared Jinja environment of a prompts folder."""
+    env = _environments.get(prompts_folder)
+    if env is None:
+        env = Environment(loader=FileSystemLoader(prompts_folder), auto_reload=True)
+        env.globals["fragment"] = _fragment
+        env.globals["variable_suffix"] = lambda: SUFFIX_MARKER
+        _environments[prompts_folder] = env
+    return env
+
+
+def get_template(prompts_folder: str, template_name: str) -> Template:
+    """Return a compiled template (recompiled only when the file changed)."""
+    return get_environment(prompts_folder).get_template(template_name)
+
+
+def referenced_templates(prompts_folder: str, template_name: str) -> List[Tuple[str, str]]:
+    """Return (name, source) of a template and every template it includes or renders as a fragment."""
+    env = get_environment(prompts_folder)
+    result = []
+    pending = [template_name]
+    seen = set()
+    while pending:
+        name = pending.pop(0)
+        if name in seen:
+            continue
+        seen.add(name)
+        source, _, _ = env.loader.get_source(env, name)
+        result.append((name, source))
+        referenced = {n for n in meta.find_referenced_templates(env.parse(source)) if n}
+        referenced.update(FRAGMENT_PATTERN.findall(source))
+        pending.extend(sorted(referenced))
+    return result
+
+
+def render(prompts_folder: str, template_name: str, **variables: Any) -> Tuple[str, PromptMetrics]:
+    """Render a template and measure the build cost and prompt size."""
+    started = time.perf_counter()
+    prompt = get_template(prompts_folder, template_name).render(**variables)
+    prefix, marked, suffix = prompt.partition(SUFFIX_MARKER)
+    if marked:
+        prompt = prefix + suffix
+    metrics = PromptMetrics(
+        template=template_name,
+        build_time=time.perf_counter() - started,
+        chars=len(prompt),
+        tokens=len(prompt) // CHARS_PER_TOKEN,
+        prefix_chars=len(prefix) if marked else 0,
+        prefix_hash=hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:16] if marked else None,
+    )
+    return prompt, metrics
+
+
+def stats() -> Dict[str, int]:
+    """Fragment memoization counters."""
+    return dict(_stats, fragments_cached=len(_fragments))
+
+
+def clear() -> None:
+    """Drop all compiled templates and memoized fragments."""
+    _environments.clear()
+    _fragments.clear()
@@ -0,0 +1,119 @@
+"""Content-addressed on-disk cache of LLM responses.
+
+A generation is fully determined by its request payload (model, rendered
+prompt and generation options), so responses are stored under the hash
+of that payload in "{AppData.cache_folder}/responses/{key}.json".
+
+Entries are evicted least-recently-used first once the cache grows past
+`max_entries` or `max_bytes`, and dropped when older than `max_age`
+seconds. The file modification time records the last use.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class ResponseCache:
+    """LRU cache of LLM responses keyed by the request payload."""
+
+    def __init__(self, cache_folder: Path, max_entries: int = 1000, max_bytes: int = 256 * 1024 * 1024, max_age: float = 30 * 24 * 3600):
+        self._folder = Path(cache_folder) / "responses"
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(payload: Dict[str, Any]) -> str:
+        """Return the hash of a generate payload (transport settings like streaming and keep_alive excluded)."""
+        relevant = {k: v for k, v in payload.items() if k not in ("stream", "keep_alive")}
+        encoded = json.dumps(relevant, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _entry_file(self, key: str) -> Path:
+        return self._folder / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None on a miss."""
+        entry_file = self._entry_file(key)
+        try:
+            if time.time() - entry_file.stat().st_mtime > self.max_age:
+                entry_file.unlink()
+                self.evictions += 1
+                raise FileNotFoundError(entry_file)
+            with open(entry_file, "r") as f:
+                response = json.load(f)["response"]
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        # mark as recently used
+        os.utime(entry_file)
+        self.hits += 1
+        return response
+
+    def put(self, key: str, response: str, model: str = "") -> None:
+        """Store a response and evict old entries if the cache is over budget."""
+        os.makedirs(self._folder, exist_ok=True)
+        tmp_file = self._entry_file(key).with_suffix(".tmp")
+        with open(tmp_file, "w") as f:
+            json.dump({"model": model, "created": time.time(), "response": response}, f)
+        os.replace(tmp_file, self._entry_file(key))
+        self.evict()
+
+    def discard(self, key: str) -> None:
+        """Remove the cached response of a key, if any."""
+        self._entry_file(key).unlink(missing_ok=True)
+
+    def evict(self) -> int:
+        """Remove expired entries, then least recently used ones until within budget."""
+        if not self._folder.exists():
+            return 0
+        now = time.time()
+        entries = []
+        removed = 0
+        for entry_file in self._folder.glob("*.json"):
+            try:
+                stat = entry_file.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age:
+                entry_file.unlink(missing_ok=True)
+                removed += 1
+            else:
+                entries.append((stat.st_mtime, stat.st_size, entry_file))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, entry_file = entries.pop(0)
+            entry_file.unlink(missing_ok=True)
+            total_bytes -= size
+            removed += 1
+
+        self.evictions += removed
+        return removed
+
+    def clear(self) -> None:
+        """Remove all cached responses."""
+        if not self._folder.exists():
+            return
+        for entry_file in self._folder.glob("*.json"):
+            entry_file.unlink(missing_ok=True)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size of the cache."""
+        files = list(self._folder.glob("*.json")) if self._folder.exists() else []
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(files),
+            "bytes": sum(f.stat().st_size for f in files),
+        }
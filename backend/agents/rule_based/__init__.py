@@ -0,0 +1 @@
+# Rule-based (non-LLM) planner and translator
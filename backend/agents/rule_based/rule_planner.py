@@ -0,0 +1,120 @@
+"""Deterministic lighting plan derived from the song structure.
+
+Entries start at every section, key moment and analysis event (drop,
+climax) that leaves at least `min_entry_beats` beats on each side. Each
+entry gets a description in the vocabulary of RuleBasedTranslator, picked
+from its mean energy and energy trend, so the draft can be translated
+right away, with or without an LLM.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from common.models.song.analysis import SongAnalysis
+from ...models.lighting.plan import PlanEntry
+from ..lighting_planner.analysis_summarizer import trend
+
+# normalized mean energy thresholds of the (low, mid) levels, above is high
+ENERGY_LEVELS = (0.35, 0.65)
+
+# colors rotated over the entries of each energy level
+PALETTES = {
+    "low": ["blue", "violet", "red"],
+    "mid": ["purple", "cyan", "amber"],
+    "high": ["white", "red", "magenta"],
+}
+
+
+class RuleBasedPlanner:
+    """Builds a plan from sections, key moments and analysis events in milliseconds."""
+
+    def __init__(self, song=None, analysis: Optional[SongAnalysis] = None, min_entry_beats: int = 8):
+        from ...models.app_data import AppData
+        self.song = song or AppData().song
+        self.analysis = self.song.analysis if analysis is None else analysis
+        self.min_entry_beats = min_entry_beats
+
+        energy = self.analysis.curve("energy_curve")
+        self._energy_peak = float(energy.max()) if len(energy) else 0.0
+
+    def plan(self) -> List[PlanEntry]:
+        """Return the plan entries of the whole song."""
+        boundaries = self._boundaries()
+        entries = []
+        used: Dict[str, int] = {}
+        for index, (start, name, note) in enumerate(boundaries):
+            end = boundaries[index + 1][0] if index + 1 < len(boundaries) else self.song.duration
+            level, direction = self._energy_level(start, end)
+            color_index = used.get(level, 0)
+            used[level] = color_index + 1
+            description = self._describe(level, direction, name, color_index)
+            if note:
+                description += f" ({note})"
+            entries.append(PlanEntry(id=index + 1, start=round(start, 3), end=round(end, 3), name=name, description=description))
+        return entries
+
+    def create_plan(self, save: bool = True) -> List[PlanEntry]:
+        """Replace the song plan with the rule-based plan."""
+        from ...models.app_data import AppData
+        entries = self.plan()
+        plan = AppData().plan
+        plan.clear_plan()
+        for entry in entries:
+            plan.add_plan(entry)
+        if save:
+            plan.save_plan()
+        print(f"📐 RuleBasedPlanner: {len(entries)} plan entries")
+        return entries
+
+    def _boundaries(self) -> List[Tuple[float, str, str]]:
+        """(start, name, note) of every entry, in time order."""
+        beat_length = 60.0 / self.song.bpm if self.song.bpm else 0.5
+        min_gap = self.min_entry_beats * beat_length
+
+        # sections first, then key moments and events, each only where it leaves room
+        candidates = [(section.start, section.name, section.prompt) for section in self.song.sections]
+        candidates += [(moment.start, moment.name, moment.description) for moment in self.song.key_moments]
+        candidates += [(self.song.snap_to_beat(event["time"]), event["type"].capitalize(), "")
+                       for event in self.analysis.get("events", [])]
+
+        boundaries: List[Tuple[float, str, str]] = []
+        for start, name, note in candidates:
+            if start >= self.song.duration - min_gap:
+                continue
+            close = [index for index, (other, _, _) in enumerate(boundaries) if abs(other - start) < min_gap]
+            if not close:
+                boundaries.append((start, name, note))
+            elif abs(boundaries[close[0]][0] - start) < 0.01:
+                # a key moment at a section start names the entry
+                boundaries[close[0]] = (boundaries[close[0]][0], name, note or boundaries[close[0]][2])
+        if not boundaries or boundaries[0][0] > min_gap:
+            boundaries.append((0.0, "Intro", ""))
+        return sorted(boundaries)
+
+    def _energy_level(self, start: float, end: float) -> Tuple[str, str]:
+        _, values = self.analysis.window("energy_curve", start, end)
+        if not len(values):
+            return "mid", "flat"
+        if self._energy_peak > 0:
+            values = values / self._energy_peak
+        mean = float(values.mean())
+        level = "low" if mean < ENERGY_LEVELS[0] else "mid" if mean < ENERGY_LEVELS[1] else "high"
+        return level, trend(values)
+
+    @staticmethod
+    def _describe(level: str, direction: str, name: str, color_index: int) -> str:
+        palette = PALETTES[level]
+        color = palette[color_index % len(palette)]
+        accent = palette[(color_index + 1) % len(palette)]
+        if name.lower() in ("drop", "climax"):
+            return "full white strobe flashes on all fixtures every beat"
+        if level == "low":
+            if direction == "rising":
+                return f"dim {color} pulses every 2 beats"
+            return f"dim {color} wash"
+        if level == "mid":
+            if direction == "falling":
+                return f"{color} pulses every 2 beats"
+            return f"{color} and {accent} chase left to right every beat"
+        if direction == "falling":
+            return f"bright {color} and {accent} chase left to right every beat"
+        return f"bright {color} and {accent} strobe flashes every beat"
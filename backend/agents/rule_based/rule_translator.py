@@ -0,0 +1,174 @@
+"""Deterministic translation of plan entry descriptions into actions.
+
+Recognizes the common vocabulary of lighting plan descriptions:
+
+  colors     - red, blue, purple, amber, ... (mixed from the RGB channels)
+  intensity  - dim / subtle / half / bright / full
+  pattern    - strobe / flash, pulse, chase / sweep / left to right, or a
+               steady wash (the default)
+  rate       - every beat, every 2 beats, every bar, "2b", slow (every 2 beats)
+  fixtures   - fixture names or ids ("Proton L", "parcan_r"), "all fixtures"
+
+Unknown words are ignored, so any description yields a usable (if plain)
+sequence on the beat grid of the entry, in milliseconds and without an LLM.
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+from ...models.fixtures.fixture import Fixture
+from ...models.lighting.action_list import ActionEntry
+from ...models.lighting.action_validator import validate_actions
+from ...models.lighting.plan import PlanEntry
+
+# color name -> RGB channel levels
+COLORS: Dict[str, Dict[str, float]] = {
+    "red": {"red": 1.0},
+    "green": {"green": 1.0},
+    "blue": {"blue": 1.0},
+    "white": {"red": 1.0, "green": 1.0, "blue": 1.0},
+    "purple": {"red": 0.6, "blue": 1.0},
+    "violet": {"red": 0.5, "blue": 1.0},
+    "magenta": {"red": 1.0, "blue": 1.0},
+    "pink": {"red": 1.0, "green": 0.3, "blue": 0.6},
+    "cyan": {"green": 1.0, "blue": 1.0},
+    "yellow": {"red": 1.0, "green": 0.9},
+    "amber": {"red": 1.0, "green": 0.5},
+    "orange": {"red": 1.0, "green": 0.35},
+    "gold": {"red": 1.0, "green": 0.7},
+}
+
+# intensity words, checked in order (the first match wins)
+INTENSITIES: List[Tuple[str, float]] = [
+    ("full", 1.0), ("high-intensity", 1.0), ("intense", 1.0), ("bright", 1.0),
+    ("half", 0.5), ("medium", 0.6),
+    ("dim", 0.3), ("subtle", 0.3), ("low", 0.3), ("soft", 0.4), ("dark", 0.25),
+]
+DEFAULT_INTENSITY = 0.8
+
+PATTERNS: List[Tuple[str, List[str]]] = [
+    ("strobe", ["strobe", "flash", "flashes", "hit", "hits", "impact"]),
+    ("chase", ["chase", "chaser", "sweep", "sweeps", "left to right", "right to left", "alternating", "transitioning between", "rotating"]),
+    ("pulse", ["pulse", "pulses", "pulsing", "breathing", "throb"]),
+]
+
+WORD = re.compile(r"[a-z0-9_-]+")
+BEAT_INTERVAL = re.compile(r"\b(?:every\s+)?(\d+)\s*(?:b|beats?)\b")
+PAIRED_SIDES = re.compile(r"(\w+) ([lr])/([lr])\b")
+
+
+def _normalize(text: str) -> str:
+    # "Proton L/R" names both fixtures
+    text = PAIRED_SIDES.sub(r"\1 \2 \1 \3", text.lower().replace("_", " "))
+    return " ".join(WORD.findall(text))
+
+
+class RuleBasedTranslator:
+    """Maps plan entry descriptions to fixture actions with fixed rules."""
+
+    def __init__(self, song=None, fixtures=None):
+        from ...models.app_data import AppData
+        app_data = AppData()
+        self.song = song or app_data.song
+        self.fixtures = fixtures or app_data.fixtures
+
+    def translate(self, plan_entry: PlanEntry) -> List[ActionEntry]:
+        """Translate a plan entry into validated actions on its beats."""
+        text = _normalize(plan_entry.description + " " + plan_entry.name)
+        beats = self.song.get_beats_array(plan_entry.start, plan_entry.end) or [plan_entry.start]
+        beat_length = self._beat_length(beats)
+
+        colors = self._colors(text)
+        intensity = next((value for word, value in INTENSITIES if self._has(text, word)), DEFAULT_INTENSITY)
+        pattern = next((name for name, words in PATTERNS if any(self._has(text, word) for word in words)), "wash")
+        fixtures = self._fixtures(text)
+        if self._has(text, "right to left"):
+            fixtures.reverse()
+
+        interval = self._interval(text)
+        steps = beats[::interval]
+        step_length = beat_length * interval
+
+        actions: List[ActionEntry] = []
+        if pattern == "wash":
+            # fade in over a bar, then hold until the end of the entry
+            fade_in = min(4 * beat_length, plan_entry.end - plan_entry.start)
+            hold = plan_entry.end - plan_entry.start - fade_in
+            for fixture in fixtures:
+                actions += self._fade(fixture, plan_entry.start, fade_in, colors[0], 0.0, intensity)
+                if hold > 0:
+                    actions += self._set(fixture, plan_entry.start + fade_in, hold, colors[0], intensity)
+        elif pattern == "chase":
+            for index, time in enumerate(steps):
+                fixture = fixtures[index % len(fixtures)]
+                actions += self._flash(fixture, time, step_length, colors[index % len(colors)], intensity)
+        else:
+            # strobe hits every step at full length, pulses decay over the step
+            duration = min(0.15, step_length / 2) if pattern == "strobe" else step_length * 0.9
+            for index, time in enumerate(steps):
+                color = colors[index % len(colors)]
+                for fixture in fixtures:
+                    actions += self._flash(fixture, time, duration, color, intensity)
+
+        clean, _ = validate_actions(actions, self.fixtures)
+        return clean
+
+    @staticmethod
+    def _has(text: str, phrase: str) -> bool:
+        return re.search(rf"\b{re.escape(phrase)}\b", text) is not None
+
+    @staticmethod
+    def _beat_length(beats: List[float]) -> float:
+        if len(beats) >= 2:
+            return (beats[-1] - beats[0]) / (len(beats) - 1)
+        return 0.5
+
+    def _colors(self, text: str) -> List[Dict[str, float]]:
+        found = sorted((match.start(), name) for name in COLORS for match in re.finditer(rf"\b{name}\b", text))
+        return [COLORS[name] for _, name in found] or [COLORS["white"]]
+
+    @staticmethod
+    def _interval(text: str) -> int:
+        match = BEAT_INTERVAL.search(text)
+        if match:
+            return max(1, int(match.group(1)))
+        if re.search(r"\b(every|each|per) bar\b", text):
+            return 4
+        if re.search(r"\b(slow|slowly|half-time|half time)\b", text):
+            return 2
+        return 1
+
+    def _fixtures(self, text: str) -> List[Fixture]:
+        """Fixtures mentioned by name or id (all color fixtures by default), ordered left to right."""
+        mentioned = []
+        for fixture in self.fixtures:
+            names = {_normalize(fixture.name), _normalize(fixture.id)}
+            if any(self._has(text, name) for name in names if name):
+                mentioned.append(fixture)
+        if self._has(text, "all fixtures") or self._has(text, "all lights"):
+            mentioned = list(self.fixtures)
+        if not mentioned:
+            mentioned = [fixture for fixture in self.fixtures if "red" in fixture.channels] or list(self.fixtures)
+        return sorted(mentioned, key=lambda fixture: fixture.position.x)
+
+    @staticmethod
+    def _channels(fixture: Fixture, color: Dict[str, float], intensity: float) -> Dict[str, float]:
+        """Channel levels of a color on a fixture (dimmer only fixtures use 'dim')."""
+        levels = {channel: round(level * intensity, 2) for channel, level in color.items() if channel in fixture.channels}
+        if not levels and "dim" in fixture.channels:
+            levels = {"dim": round(intensity, 2)}
+        return levels
+
+    def _flash(self, fixture: Fixture, time: float, duration: float, color: Dict[str, float], intensity: float) -> List[ActionEntry]:
+        return self._fade(fixture, time, duration, color, intensity, 0.0)
+
+    def _fade(self, fixture: Fixture, time: float, duration: float, color: Dict[str, float], start: float, end: float) -> List[ActionEntry]:
+        actions = []
+        for channel, level in self._channels(fixture, color, 1.0).items():
+            actions.append(ActionEntry(round(time, 3), "fade_channel", round(duration, 3), fixture.id, {
+                "channel": [channel], "start_value": round(start * level, 2), "end_value": round(end * level, 2)}))
+        return actions
+
+    def _set(self, fixture: Fixture, time: float, duration: float, color: Dict[str, float], intensity: float) -> List[ActionEntry]:
+        return [ActionEntry(round(time, 3), "set_channel", round(duration, 3), fixture.id, {"channel": [channel], "value": value})
+                for channel, value in self._channels(fixture, color, intensity).items()]
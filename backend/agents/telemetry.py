@@ -0,0 +1,204 @@
+"""Per-call LLM telemetry aggregated per agent class and model.
+
+Agent.run_async records one CallRecord per generation: queue wait, time
+to first token, total duration, prompt/eval token counts and prompt
+evaluation time (from Ollama's final stream record), the resulting
+tokens/sec and whether the stable prompt prefix was reused. Agents that parse
+responses report whether parsing succeeded.
+
+Records are aggregated into fixed-bucket histograms per (agent, model);
+`LLMTelemetry().summary()` is sent to the frontend as 'llm_telemetry'
+(see websocket_manager.handle_get_llm_telemetry).
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# histogram bucket upper bounds per metric (the last bucket is open ended)
+BUCKETS: Dict[str, List[float]] = {
+    "queue_wait": [0.01, 0.1, 0.5, 1, 5, 10, 30, 60],  # seconds
+    "ttft": [0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60],  # seconds
+    "duration": [0.5, 1, 2, 5, 10, 30, 60, 120, 300],  # seconds
+    "tokens_per_sec": [1, 5, 10, 20, 40, 80, 160, 320],
+    "prompt_tokens": [256, 512, 1024, 2048, 4096, 8192, 16384],
+    "prompt_eval_time": [0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10],  # seconds
+    "eval_tokens": [64, 128, 256, 512, 1024, 2048, 4096],
+}
+
+# number of recent calls kept for inspection
+RECENT_CALLS = 200
+
+
+@dataclass
+class CallRecord:
+    """Telemetry of a single LLM call."""
+    agent: str
+    model: str
+    timestamp: float = 0.0  # unix time of the request
+    queue_wait: float = 0.0  # seconds between creating the request and sending it
+    ttft: Optional[float] = None  # seconds until the first response chunk
+    duration: float = 0.0  # seconds until the last chunk
+    prompt_tokens: Optional[int] = None  # prompt tokens evaluated (tokens reused from the server cache excluded)
+    prompt_eval_time: Optional[float] = None  # seconds spent evaluating the prompt
+    eval_tokens: Optional[int] = None
+    tokens_per_sec: Optional[float] = None
+    cached: bool = False
+    prefix_hash: Optional[str] = None  # stable prompt prefix (see prompt_templates.variable_suffix)
+    prefix_reused: bool = False  # the previous call to this server and model sent the same prefix
+    retries: int = 0
+    error: Optional[str] = None
+
+    def finish(self, started: float, first_token: Optional[float], final: Dict[str, Any], chunks: int):
+        """Fill timings and token counts from perf_counter marks and the final stream record."""
+        ended = time.perf_counter()
+        self.duration = ended - started
+        self.ttft = first_token - started if first_token is not None else None
+        self.prompt_tokens = final.get("prompt_eval_count")
+        if final.get("prompt_eval_duration"):
+            self.prompt_eval_time = final["prompt_eval_duration"] / 1e9
+        self.eval_tokens = final.get("eval_count", chunks if chunks else None)
+        eval_duration = final.get("eval_duration")  # nanoseconds
+        if self.eval_tokens and eval_duration:
+            self.tokens_per_sec = self.eval_tokens / (eval_duration / 1e9)
+        elif self.eval_tokens and first_token is not None and ended > first_token:
+            self.tokens_per_sec = self.eval_tokens / (ended - first_token)
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum, min and max."""
+
+    def __init__(self, bounds: List[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate quantile (upper bound of the bucket holding it, max for the open bucket)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "buckets": [{"le": bound, "count": count} for bound, count in zip(self.bounds + [None], self.counts)],
+        }
+
+
+class _AgentModelStats:
+    def __init__(self):
+        self.calls = 0
+        self.cached = 0
+        self.prefix_reused = 0
+        self.errors = 0
+        self.retries = 0
+        self.parse_ok = 0
+        self.parse_failed = 0
+        self.histograms = {metric: Histogram(bounds) for metric, bounds in BUCKETS.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        parsed = self.parse_ok + self.parse_failed
+        return {
+            "calls": self.calls,
+            "cached": self.cached,
+            "prefix_reused": self.prefix_reused,
+            "errors": self.errors,
+            "retries": self.retries,
+            "parse_ok": self.parse_ok,
+            "parse_failed": self.parse_failed,
+            "parse_success_rate": self.parse_ok / parsed if parsed else None,
+            "histograms": {metric: histogram.to_dict() for metric, histogram in self.histograms.items()},
+        }
+
+
+class LLMTelemetry:
+    """Singleton collecting telemetry of every agent call in the process."""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], _AgentModelStats] = {}
+        self._recent: Deque[CallRecord] = deque(maxlen=RECENT_CALLS)
+
+    def _get(self, agent: str, model: str) -> _AgentModelStats:
+        key = (agent, model)
+        if key not in self._stats:
+            self._stats[key] = _AgentModelStats()
+        return self._stats[key]
+
+    def record_call(self, record: CallRecord):
+        """Aggregate one finished (or failed) call."""
+        with self._lock:
+            stats = self._get(record.agent, record.model)
+            stats.calls += 1
+            stats.retries += record.retries
+            self._recent.append(record)
+            if record.error:
+                stats.errors += 1
+                return
+            if record.cached:
+                # cached responses say nothing about the model speed
+                stats.cached += 1
+                return
+            if record.prefix_reused:
+                stats.prefix_reused += 1
+            for metric in BUCKETS:
+                value = getattr(record, metric)
+                if value is not None:
+                    stats.histograms[metric].add(value)
+
+    def record_parse(self, agent: str, model: str, ok: bool):
+        """Count a parsed response as successful (usable output) or failed."""
+        with self._lock:
+            stats = self._get(agent, model)
+            if ok:
+                stats.parse_ok += 1
+            else:
+                stats.parse_failed += 1
+
+    def summary(self, recent: int = 20) -> Dict[str, Any]:
+        """Aggregated telemetry per agent and model, plus the last `recent` calls."""
+        with self._lock:
+            return {
+                "agents": [{"agent": agent, "model": model, **stats.to_dict()} for (agent, model), stats in self._stats.items()],
+                "recent_calls": [asdict(record) for record in list(self._recent)[-recent:]] if recent else [],
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._recent.clear()
@@ -20,7 +20,12 @@ from backend.services.websocket_manager import (
     handle_play_audio, 
     handle_pause_audio, 
     handle_stop_audio, 
-    handle_seek_audio
+    handle_seek_audio,
+    handle_get_llm_telemetry,
+    handle_suggest_plan,
+    handle_list_songs,
+    handle_load_song,
+    handle_set_setlist
 )
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'frontend', 'dist'), static_url_path='')
@@ -74,6 +79,16 @@ def handle_message(data):
             handle_stop_audio()
         elif action == 'seek_audio':
             handle_seek_audio(params)
+        elif action == 'get_llm_telemetry':
+            handle_get_llm_telemetry(params)
+        elif action == 'suggest_plan':
+            handle_suggest_plan(params)
+        elif action == 'list_songs':
+            handle_list_songs(params)
+        elif action == 'load_song':
+            handle_load_song(params)
+        elif action == 'set_setlist':
+            handle_set_setlist(params)
         else:
             print(f"⚠️ Unknown action: {action}")
             emit('error', {'error': f'Unknown action: {action}'})
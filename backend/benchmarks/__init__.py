@@ -0,0 +1 @@
+# Local LLM stand-in and agent benchmarks
@@ -0,0 +1,203 @@
+"""End-to-end latency benchmark of the agent pipeline against FakeOllama.
+
+For every plan entry of a song the EffectTranslator pipeline is timed
+stage by stage:
+
+  prompt   - rendering the prompt (EffectTranslator.build_request)
+  generate - streaming the response from the (fake) server
+  parse    - extracting and validating the actions
+  render   - drawing the actions on the DMX canvas
+  total    - wall time of the whole entry
+
+The fake server answers with synthetic actions on the entry beats, so
+the workload scales with the song like a real translation. Caches are
+disabled and nothing is written to the song data files.
+
+    python -m backend.benchmarks.agent_benchmark --song born_slippy --save bench.json
+    python -m backend.benchmarks.agent_benchmark --baseline bench.json  # exit 1 on regression
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ..agents import llm_session
+from ..agents.effect_tramslator.effect_translator import EffectTranslator
+from ..agents.lighting_planner.lighting_planner import LightingPlanner
+from ..models.app_data import AppData
+from ..models.lighting.plan import PlanEntry
+from .fake_ollama import FakeOllama
+
+STAGES = ["prompt", "generate", "parse", "render", "total"]
+
+
+@dataclass
+class EntryTiming:
+    """Stage timings (seconds) of one benchmarked item."""
+    name: str
+    prompt: float = 0.0
+    generate: float = 0.0
+    parse: float = 0.0
+    render: float = 0.0
+    total: float = 0.0
+    actions: int = 0
+
+
+@dataclass
+class BenchmarkReport:
+    song: str
+    token_rate: float
+    ttft: float
+    planner: Optional[EntryTiming] = None
+    entries: List[EntryTiming] = field(default_factory=list)
+
+    def stage_stats(self) -> Dict[str, Dict[str, float]]:
+        """Mean / median / max of every stage over the plan entries."""
+        stats = {}
+        for stage in STAGES:
+            values = [getattr(entry, stage) for entry in self.entries]
+            if values:
+                stats[stage] = {"mean": statistics.mean(values), "median": statistics.median(values), "max": max(values)}
+        return stats
+
+    def to_dict(self) -> dict:
+        result = asdict(self)
+        result["stats"] = self.stage_stats()
+        return result
+
+    def __str__(self) -> str:
+        lines = [f"## Agent benchmark: {self.song} (ttft {self.ttft}s, {self.token_rate} tokens/s)"]
+        header = f"{'entry':<28}" + "".join(f"{stage:>10}" for stage in STAGES) + f"{'actions':>9}"
+        lines.append(header)
+        rows = ([self.planner] if self.planner else []) + self.entries
+        for row in rows:
+            lines.append(f"{row.name[:27]:<28}" + "".join(f"{getattr(row, stage) * 1000:>8.1f}ms" for stage in STAGES) + f"{row.actions:>9}")
+        for name, values in self.stage_stats().items():
+            lines.append(f" - {name:<9} mean {values['mean'] * 1000:8.1f}ms | median {values['median'] * 1000:8.1f}ms | max {values['max'] * 1000:8.1f}ms")
+        return "\n".join(lines)
+
+
+def synthetic_actions_response(beats: List[float], fixture_ids: List[str]) -> str:
+    """A plausible EffectTranslator answer: one action per beat, rotating over the fixtures."""
+    lines = []
+    for index, beat in enumerate(beats):
+        fixture_id = fixture_ids[index % len(fixture_ids)]
+        if index % 2:
+            lines.append(f"fade_channel {fixture_id} at {beat:.3f} for 0.4 channel=[blue] start_value=1.0 end_value=0.0")
+        else:
+            lines.append(f"set_channel {fixture_id} at {beat:.3f} for 0.2 channel=[red] value=0.8")
+    return "Here is the lighting sequence:\n```actions\n" + "\n".join(lines) + "\n```\n"
+
+
+def synthetic_plan_response(plan_entries: List[PlanEntry]) -> str:
+    """A plausible LightingPlanner answer replaying the given plan entries."""
+    return "\n".join(f'#plan add at {entry.start} "{entry.name}" "{entry.description}"' for entry in plan_entries)
+
+
+def _benchmark_entry(translator: EffectTranslator, plan_entry: PlanEntry) -> EntryTiming:
+    app_data = translator.app_data
+    timing = EntryTiming(name=plan_entry.name)
+    started = time.perf_counter()
+
+    request = translator.build_request(plan_entry)
+    timing.prompt = time.perf_counter() - started
+
+    mark = time.perf_counter()
+    llm_session.run(translator.run_async(request, echo=False))
+    timing.generate = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    actions = translator.parse_actions(request.response)
+    timing.parse = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    app_data.fixtures.render_actions(actions)
+    timing.render = time.perf_counter() - mark
+
+    timing.total = time.perf_counter() - started
+    timing.actions = len(actions)
+    return timing
+
+
+def run_benchmark(song_name: str = "born_slippy", token_rate: float = 200.0, ttft: float = 0.05, limit: Optional[int] = None, prompt_rate: float = 0.0) -> BenchmarkReport:
+    """Benchmark the planner prompt and every plan entry translation of a song."""
+    app_data = AppData()
+    app_data.load_song(song_name)
+    plan_entries = app_data.plan.get_plans()[:limit]
+    fixture_ids = [fixture.id for fixture in app_data.fixtures if fixture.type == "rgb_parcan"] or [fixture.id for fixture in app_data.fixtures]
+
+    report = BenchmarkReport(song=song_name, token_rate=token_rate, ttft=ttft)
+    with FakeOllama(token_rate=token_rate, ttft=ttft, prompt_rate=prompt_rate, default_response=synthetic_plan_response(plan_entries)) as server:
+        translator = EffectTranslator(use_cache=False, live_render=False)
+        translator.server_url = server.url
+        translator.use_response_cache = False
+        for plan_entry in plan_entries:
+            beats = app_data.song.get_beats_array(plan_entry.start, plan_entry.end)
+            server.add_response(translator.build_request(plan_entry).prompt, synthetic_actions_response(beats, fixture_ids))
+
+        # planner: prompt and generation only (parsing would overwrite the song plan)
+        planner = LightingPlanner()
+        planner.server_url = server.url
+        planner.use_response_cache = False
+        timing = EntryTiming(name="LightingPlanner")
+        started = time.perf_counter()
+        planner.parse_song_context(song_name)
+        timing.prompt = time.perf_counter() - started
+        mark = time.perf_counter()
+        llm_session.run(planner.run_async(echo=False))
+        timing.generate = time.perf_counter() - mark
+        timing.total = time.perf_counter() - started
+        report.planner = timing
+
+        for plan_entry in plan_entries:
+            report.entries.append(_benchmark_entry(translator, plan_entry))
+
+    return report
+
+
+def compare(report: BenchmarkReport, baseline: dict, tolerance: float = 0.2) -> List[str]:
+    """Return the stages whose mean regressed more than `tolerance` (fraction) against a saved report."""
+    regressions = []
+    for stage, values in report.stage_stats().items():
+        reference = baseline.get("stats", {}).get(stage, {}).get("mean")
+        if reference and values["mean"] > reference * (1 + tolerance):
+            regressions.append(f"{stage}: {reference * 1000:.1f}ms -> {values['mean'] * 1000:.1f}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the agent pipeline against a local fake Ollama server.")
+    parser.add_argument("--song", default="born_slippy")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="fake server tokens per second (0 = unthrottled)")
+    parser.add_argument("--ttft", type=float, default=0.05, help="fake server time to first token (seconds)")
+    parser.add_argument("--prompt-rate", type=float, default=0.0, help="fake server prompt evaluation tokens per second (0 = free)")
+    parser.add_argument("--limit", type=int, help="benchmark only the first N plan entries")
+    parser.add_argument("--save", type=Path, help="write the report as JSON")
+    parser.add_argument("--baseline", type=Path, help="compare with a saved report and exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown against the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.song, args.token_rate, args.ttft, args.limit, args.prompt_rate)
+    print(report)
+
+    if args.save:
+        args.save.write_text(json.dumps(report.to_dict(), indent=2))
+        print(f"💾 Report saved to {args.save}")
+
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+        if regressions:
+            print("❌ Regressions against baseline:")
+            for regression in regressions:
+                print(f" - {regression}")
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
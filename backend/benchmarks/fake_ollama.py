@@ -0,0 +1,235 @@
+"""Local stand-in for the Ollama HTTP API.
+
+Implements `/api/tags` and streaming `/api/generate` with a configurable
+time to first token and token rate, so agents can be exercised and
+benchmarked without a GPU or network. Like Ollama, the prompt prefix
+shared with the previous request to the same model is not evaluated
+again; with `prompt_rate` the remaining prompt tokens add to the time
+to first token.
+
+The response to a generate request is resolved in this order:
+  1. a response registered for the exact prompt (`add_response`)
+  2. a recorded response from a ResponseCache folder (`recordings_folder`),
+     i.e. any generation previously made with the response cache enabled
+  3. the next scripted response (`script`, cycled)
+  4. `default_response`
+
+Use it in-process:
+
+    with FakeOllama(script=["```actions\\n...\\n```"]) as server:
+        agent = EffectTranslator()
+        agent.server_url = server.url
+
+or as a standalone server (agents pick it up through OLLAMA_URL):
+
+    python -m backend.benchmarks.fake_ollama --port 11435 --token-rate 40
+    OLLAMA_URL=http://127.0.0.1:11435 python backend/create_show.py
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from aiohttp import web
+
+from ..agents.prompt_templates import CHARS_PER_TOKEN
+from ..agents.response_cache import ResponseCache
+
+# words with their trailing whitespace, or whitespace runs (newlines, indentation)
+TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+Responder = Callable[[Dict[str, Any]], str]
+
+
+def tokenize(text: str) -> List[str]:
+    """Split a response into the chunks streamed as tokens."""
+    return TOKEN_PATTERN.findall(text)
+
+
+class FakeOllama:
+    """In-process fake Ollama server running on a background event loop."""
+
+    def __init__(self,
+                 script: Optional[Union[List[str], Responder]] = None,
+                 recordings_folder: Optional[Path] = None,
+                 token_rate: float = 50.0,
+                 ttft: float = 0.2,
+                 prompt_rate: float = 0.0,
+                 models: Optional[List[str]] = None,
+                 default_response: str = "",
+                 host: str = "127.0.0.1",
+                 port: int = 0):
+        self.script = script
+        self.recordings = ResponseCache(recordings_folder) if recordings_folder else None
+        self.token_rate = token_rate  # tokens per second (0 = no delay)
+        self.ttft = ttft  # seconds before the first token
+        self.prompt_rate = prompt_rate  # evaluated prompt tokens per second (0 = free)
+        self.models = models or ["cogito:8b"]
+        self.default_response = default_response
+        self.host = host
+        self.port = port
+        self.requests: List[Dict[str, Any]] = []  # payloads received by /api/generate
+        self._prompts: Dict[str, str] = {}
+        self._last_prompt: Dict[str, str] = {}  # per model, for prefix reuse
+        self._script_index = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def add_response(self, prompt: str, response: str):
+        """Answer `response` whenever exactly `prompt` is requested."""
+        self._prompts[prompt] = response
+
+    def resolve(self, payload: Dict[str, Any]) -> str:
+        """Return the response text for a generate payload."""
+        prompt = payload.get("prompt", "")
+        if prompt in self._prompts:
+            return self._prompts[prompt]
+        if self.recordings:
+            recorded = self.recordings.get(ResponseCache.key(payload))
+            if recorded is not None:
+                return recorded
+        if callable(self.script):
+            return self.script(payload)
+        if self.script:
+            response = self.script[self._script_index % len(self.script)]
+            self._script_index += 1
+            return response
+        return self.default_response
+
+    async def _tags(self, request: web.Request) -> web.Response:
+        return web.json_response({"models": [{"name": name, "model": name} for name in self.models]})
+
+    async def _generate(self, request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        self.requests.append(payload)
+        started = time.perf_counter()
+        tokens = tokenize(self.resolve(payload))
+        model = payload.get("model", self.models[0])
+        prompt = payload.get("prompt", "")
+        reused = len(os.path.commonprefix([self._last_prompt.get(model, ""), prompt]))
+        self._last_prompt[model] = prompt
+        prompt_tokens = (len(prompt) - reused) // CHARS_PER_TOKEN
+        prompt_time = prompt_tokens / self.prompt_rate if self.prompt_rate else 0.0
+
+        def record(**fields) -> bytes:
+            return (json.dumps({"model": model, **fields}) + "\n").encode("utf-8")
+
+        if not payload.get("stream", True):
+            await asyncio.sleep(self.ttft + prompt_time + (len(tokens) / self.token_rate if self.token_rate else 0))
+            return web.json_response({"model": model, "response": "".join(tokens), "done": True,
+                                      "prompt_eval_count": prompt_tokens, "eval_count": len(tokens)})
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        await asyncio.sleep(self.ttft + prompt_time)
+        first_token = time.perf_counter()
+        delay = 1.0 / self.token_rate if self.token_rate else 0.0
+        try:
+            for token in tokens:
+                await response.write(record(response=token, done=False))
+                if delay:
+                    await asyncio.sleep(delay)
+            ended = time.perf_counter()
+            await response.write(record(
+                response="",
+                done=True,
+                total_duration=int((ended - started) * 1e9),
+                prompt_eval_count=prompt_tokens,
+                prompt_eval_duration=int((first_token - started) * 1e9),
+                eval_count=len(tokens),
+                eval_duration=int((ended - first_token) * 1e9),
+            ))
+            await response.write_eof()
+        except ConnectionResetError:
+            pass  # the client gave up (cancelled race candidate, missed deadline)
+        return response
+
+    def _app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/api/tags", self._tags)
+        app.router.add_post("/api/generate", self._generate)
+        return app
+
+    async def _start(self):
+        self._runner = web.AppRunner(self._app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # resolve the ephemeral port when port=0
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def start(self) -> str:
+        """Start serving on a background thread and return the server url."""
+        ready = threading.Event()
+
+        def serve():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self._start())
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._runner.cleanup())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=serve, name="fake-ollama", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.url
+
+    def stop(self):
+        """Stop the server thread."""
+        if self._loop and self._thread:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = self._thread = None
+
+    def __enter__(self) -> "FakeOllama":
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake Ollama API for local testing and benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--token-rate", type=float, default=50.0, help="tokens per second (0 = unthrottled)")
+    parser.add_argument("--ttft", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--prompt-rate", type=float, default=0.0, help="evaluated prompt tokens per second (0 = free)")
+    parser.add_argument("--recordings", type=Path, help="cache folder with recorded responses (e.g. cache/)")
+    parser.add_argument("--script", type=Path, nargs="*", default=[], help="text files answered in turn")
+    parser.add_argument("--model", action="append", dest="models", help="model name listed by /api/tags")
+    args = parser.parse_args()
+
+    server = FakeOllama(
+        script=[path.read_text() for path in args.script],
+        recordings_folder=args.recordings,
+        token_rate=args.token_rate,
+        ttft=args.ttft,
+        prompt_rate=args.prompt_rate,
+        models=args.models,
+        host=args.host,
+        port=args.port,
+    )
+    server.start()
+    print(f"🧪 Fake Ollama listening on {server.url} (ttft {server.ttft}s, {server.token_rate} tokens/s)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
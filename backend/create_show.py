@@ -12,6 +12,7 @@ from backend.models.dmx.dmx_canvas import DMXCanvas
 from backend.models.lighting.action_list import ActionEntry
 from backend.agents.effect_tramslator.effect_translator import EffectTranslator
 from backend.agents.agent import Agent
+from backend.agents.rule_based.rule_planner import RuleBasedPlanner
 from backend.models.app_data import AppData
 from backend.models.lighting.plan import PlanEntry
 from backend.utils import read_file
@@ -95,35 +96,37 @@ action_list.add_action(ActionEntry(
 dmx_canvas.init_canvas()
 print_canvas()
 
+report = action_list.validate()
+for error in report.errors:
+    print(f" - {error.code}: {error.message}")
+
 app_data.fixtures.render_actions(action_list=app_data.action_list.action_list)
 
 print("-- rendered actions")
+print(f" - {app_data.fixtures.last_compaction}")
 print_canvas()
 ####################################################################################################################################
 agent = Agent()
 print("\n## Agents")
 print(f" - Server URL: {agent.server_url}")
 print(f" - Available Models:")
-for model in agent.get_models():
-    print(f"   - {model}")
+try:
+    for model in agent.get_models():
+        print(f"   - {model}")
+except ValueError as e:
+    print(f"   ⚠️ {e} (rule-based fallback will be used)")
 
-## 2. Create Lighting Plan
-# lighting_planner = LightingPlanner()
-# lighting_planner.parse_song_context("born_slippy")
-# lighting_planner.run()
-# app_data.plan.clear_plan()
-# lighting_planner.parse_response()
+## 2. Create Lighting Plan (instant rule-based draft, or the LLM plan within a deadline)
+# RuleBasedPlanner().create_plan()
+# LightingPlanner().create_plan("born_slippy", deadline=300)
 
 # 3. Translate Effects into Actions
 
-effect_translator = EffectTranslator()
+effect_translator = EffectTranslator(deadline=120)
 print("\n## EffectTranslator")
 print(f" - Model: {effect_translator.model}")
-for plan_entry in app_data.plan:
-    print(f"\n   - Plan Entry: {plan_entry.name}")
-    effect_translator.translate_plan_entry(plan_entry)
-    asyncio.run(effect_translator.run_async())
-    effect_translator.parse_response()
+effect_translator.translate_plan(app_data.plan.get_plans(), concurrency=4)
+print(f" - Translation cache: {effect_translator.translation_cache.hits} hits, {effect_translator.translation_cache.misses} misses")
 
 
 # effect_translator._last_response = read_file(str(app_data.logs_folder / "EffectTranslator.response.txt"))
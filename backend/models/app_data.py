@@ -6,6 +6,9 @@ from .dmx.dmx_canvas import DMXCanvas
 from .fixtures.fixture_list import FixtureList
 from .lighting.action_list import ActionList
 from .lighting.plan import Plan
+from .library.song_catalog import LoadedSong, SongCatalog
+from .library.song_index import SongIndex
+from common.models.song.analysis import SongAnalysis
 from common.models.song.song import Song
 
 class AppData:
@@ -30,6 +33,7 @@ class AppData:
         self._data_folder = os.path.join(self._base_folder, "data")
         self._mp3_folder = os.path.join(self._base_folder, "songs")
         self._logs_folder = os.path.join(self._base_folder, "logs")
+        self._cache_folder = os.path.join(self._base_folder, "cache")
         self._fixtures_file = os.path.join(self._base_folder, "backend", "fixtures", "fixtures.json")
         self._prompts_folder = os.path.join(self._base_folder, "backend", "agents", "prompts")
 
@@ -38,7 +42,9 @@ class AppData:
         self._plan = Plan()
         self._action_list = ActionList()
         self._dmx_canvas = DMXCanvas()
-        self._song_analysis = {}
+        self._song_index: SongIndex | None = None
+        self._song_catalog: SongCatalog | None = None
+        self._song: Song | None = None
         
         # performance state
         self._is_playing = False
@@ -60,10 +66,29 @@ class AppData:
         self._current_time = value
 
     def load_song(self, song_name: str):
-        self._song = Song(song_name, base_folder=str(self._base_folder))
-        self._plan.load_plan()
-        self._action_list.load()
-        self._dmx_canvas.init_canvas(duration=self._song.duration)
+        catalog = self.song_catalog
+        if self._song is not None:
+            # keep the current song (with its edits and rendered canvas) in the catalog LRU
+            catalog.store(LoadedSong(song=self._song, plan=self._plan.plans, actions=self._action_list.action_list,
+                                     validation=self._action_list.validation_report, canvas=self._dmx_canvas.snapshot()))
+        loaded = catalog.get(song_name)
+        self._song = loaded.song
+        self._plan.plans = list(loaded.plan)
+        self._action_list.action_list = list(loaded.actions)
+        if loaded.validation is not None:
+            self._action_list.validation_report = loaded.validation
+        else:
+            self._action_list.validate()
+        # beat-anchored plan entries and actions follow the current beat grid
+        tempo_map = self._song.tempo_map
+        if tempo_map is not None:
+            self._plan.resolve_timing(tempo_map)
+            self._action_list.resolve_timing(tempo_map)
+        if loaded.canvas is not None:
+            self._dmx_canvas.restore(loaded.canvas)
+        else:
+            self._dmx_canvas.init_canvas(duration=self._song.duration)
+        catalog.preload_next(song_name)
         print("--AppData.load_song()")
 
     @property
@@ -75,19 +100,30 @@ class AppData:
         return Path(self._data_folder)
 
     @property
-    def song_analysis(self) -> dict:
-        if self._song_analysis is None:
-            # load json
-            _file = os.path.join(self._data_folder, f"{self.song_name}.analysis.json")
-            if os.path.exists(_file):
-                with open(_file, "r") as f:
-                    self._song_analysis = json.load(f)
-        return self._song_analysis
+    def song_analysis(self) -> SongAnalysis | dict:
+        # fields are loaded on first access and reloaded when the analysis file changes
+        return self._song.analysis if self._song else {}
+
+    @property
+    def song_index(self) -> SongIndex:
+        if self._song_index is None:
+            self._song_index = SongIndex(self._base_folder, self.cache_folder)
+        return self._song_index
+
+    @property
+    def song_catalog(self) -> SongCatalog:
+        if self._song_catalog is None:
+            self._song_catalog = SongCatalog(self._base_folder)
+        return self._song_catalog
 
     @property
     def logs_folder(self) -> Path:
         return Path(self._logs_folder)
 
+    @property
+    def cache_folder(self) -> Path:
+        return Path(self._cache_folder)
+
     @property
     def base_folder(self) -> Path:
         return self._base_folder
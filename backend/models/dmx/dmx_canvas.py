@@ -1,5 +1,5 @@
 import inspect
-from typing import Callable, Dict, Optional
+from typing import Any, Callable, Dict, Optional
 
 class DMXCanvas:
     """
@@ -32,6 +32,16 @@ class DMXCanvas:
         """Return the duration of the DMX canvas."""
         return self._duration
 
+    @property
+    def fps(self) -> int:
+        """Return the frame rate of the DMX canvas."""
+        return self._fps
+
+    @property
+    def frame_count(self) -> int:
+        """Return the number of frames on the canvas grid."""
+        return len(self._frames)
+
     @property
     def frames(self) -> dict[float, bytearray]:
         """Return all DMX frames"""
@@ -52,6 +62,19 @@ class DMXCanvas:
             # Initialize with a default DMX frame
             self._frames[frame_time] = bytearray(512)
 
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the rendered frames with duration and fps, to be restored later (see restore).
+        The frames are shared, not copied: init_canvas replaces the frame dictionary,
+        so the snapshot is left untouched once the canvas is initialized for another song.
+        """
+        return {"duration": self._duration, "fps": self._fps, "frames": self._frames}
+
+    def restore(self, snapshot: Dict[str, Any]):
+        """Make a snapshot the current canvas, without re-rendering."""
+        self._duration = snapshot["duration"]
+        self._fps = snapshot["fps"]
+        self._frames = snapshot["frames"]
+
     def get_frame(self, frame_time: float) -> bytearray:
         """Return the DMX frame at a specific or nearest time."""
         if frame_time in self._frames:
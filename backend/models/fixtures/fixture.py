@@ -23,7 +23,7 @@ class Fixture:
                 ActionParameter(name="duration", type=float, description="Hold the value for the specified duration (default: remain until the end)", optional=True),
                 ActionParameter(name="channel", type=List[str], description="List of channel names to set"),
                 ActionParameter(name="value", type=float, description="Value to set the channel to (0.0 - 1.0)"),
-            ], hidden=False))
+            ], hidden=False, channel_resolver=lambda params: params.get('channel')))
         self._actions.append(
             Action(name="fade_channel", handler=self.fade_channel, description="Fade the channel value from start_value to end_value over the specified time range.", parameters=[
                 ActionParameter(name="start_time", type=float, description="Start time for the fade, channels value will be set to start_value"),
@@ -31,7 +31,7 @@ class Fixture:
                 ActionParameter(name="channel", type=List[str], description="List of channel names to fade ('red', 'green', 'blue', 'white')"),
                 ActionParameter(name="start_value", type=float, description="Starting value for the fade (0.0 - 1.0)"),
                 ActionParameter(name="end_value", type=float, description="Ending value for the fade (0.0 - 1.0)"),
-        ], hidden=False))
+        ], hidden=False, channel_resolver=lambda params: params.get('channel')))
 
     @property
     def id(self) -> str:
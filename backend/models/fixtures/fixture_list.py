@@ -1,8 +1,11 @@
 from __future__ import annotations
 import json
-from typing import List
+import os
+from typing import Any, Dict, List, Tuple
 
 from ..lighting.action_list import ActionEntry
+from ..lighting.action_compactor import CompactionReport, compact_actions
+from ..lighting.action_validator import ActionSchema, actions_json_schema, compile_action_schemas
 from .fixture import Fixture
 from .moving_head import MovingHead
 from .par_can import RgbParCan
@@ -10,15 +13,22 @@ from .meta.position import Position
 from .meta.meta import Meta
 from .meta.position_constraints import PositionConstraints
 from .meta.constraint import Constraint
+from .meta.action import Action
 
 class FixtureList:
     def __init__(self, fixtures_file: str):
         self._fixtures: List[Fixture] = []
+        self._last_compaction: CompactionReport | None = None
+        self._action_schemas: Dict[Tuple[str, str], ActionSchema] | None = None
+        self._actions_reference: Dict[str, Action] | None = None
+        self._actions_json_schema: Dict[str, Any] | None = None
+        self._version: str = ''
         self.load_fixtures(fixtures_file)
 
     def load_fixtures(self, fixtures_file: str):
         with open(fixtures_file, 'r') as f:
             fixtures_data = json.load(f)
+        self._version = f"{os.path.basename(fixtures_file)}@{os.path.getmtime(fixtures_file)}"
 
         for fixture_data in fixtures_data:
             position_data = fixture_data['position']
@@ -59,6 +69,11 @@ class FixtureList:
 
             self._fixtures.append(fixture)
 
+        self._fixtures_by_id = {fixture.id: fixture for fixture in self._fixtures}
+        self._action_schemas = None
+        self._actions_reference = None
+        self._actions_json_schema = None
+
     @property
     def fixtures(self) -> List[Fixture]:
         return self._fixtures
@@ -68,38 +83,85 @@ class FixtureList:
             fixture.set_arm(True)
 
     def get_fixture_by_id(self, fixture_id: str) -> Fixture | None:
-        return next((f for f in self._fixtures if f.id == fixture_id), None)
+        return self._fixtures_by_id.get(fixture_id)
+
+    @property
+    def version(self) -> str:
+        '''Identifies the loaded fixture setup (changes when the fixtures file changes).'''
+        return self._version
+
+    @property
+    def actions_reference(self) -> Dict[str, Action]:
+        '''Action name -> action metadata across all fixtures (used in prompts).'''
+        if self._actions_reference is None:
+            self._actions_reference = {action.name: action for fixture in self._fixtures for action in fixture.actions}
+        return self._actions_reference
+
+    @property
+    def action_schemas(self) -> Dict[Tuple[str, str], ActionSchema]:
+        '''Compiled parameter schemas of every fixture action, keyed by (fixture_id, action).'''
+        if self._action_schemas is None:
+            self._action_schemas = compile_action_schemas(self)
+        return self._action_schemas
+
+    @property
+    def actions_json_schema(self) -> Dict[str, Any]:
+        '''JSON schema of an action list for structured LLM output.'''
+        if self._actions_json_schema is None:
+            self._actions_json_schema = actions_json_schema(self)
+        return self._actions_json_schema
+
+    @property
+    def last_compaction(self) -> CompactionReport | None:
+        '''Report of the redundant actions skipped by the last render_actions call.'''
+        return self._last_compaction
 
     def render_actions(self, action_list: List[ActionEntry]) -> bool:
+        '''
+        Render actions to the DMX canvas.
+        Actions are expected to be validated (see ActionList.validate), so no per-action checks are done here.
+        '''
         from ..app_data import AppData
         app_data = AppData()
-        app_data.dmx_canvas.init_canvas()
+        dmx_canvas = app_data.dmx_canvas
+        dmx_canvas.init_canvas()
 
-        self.arm_all_fixtures()
-        for action in action_list:
-            fixture = self.get_fixture_by_id(action.fixture_id)
-            if not fixture:
-                print(f"❌ render_actions: Could not find fixture_id {action.fixture_id}")
-                continue
+        # beat-relative actions follow the current beat grid (kept at their stored times without one)
+        tempo_map = app_data.song.tempo_map if any(action.is_beat_relative for action in action_list) else None
+        if tempo_map is not None:
+            for action in action_list:
+                action.resolve_timing(tempo_map)
 
-            fixture_action = next((a for a in fixture.actions if a.name == action.action), None)
-            if not fixture_action:
-                print(f"❌ render_actions: Could not find action '{action.action}' on fixture {fixture.name}")
-                continue
+        # skip actions whose frames are fully overwritten before touching the canvas
+        action_list, self._last_compaction = compact_actions(action_list, self, dmx_canvas.fps, dmx_canvas.frame_count)
 
-            _action_params = [a.name for a in fixture_action.parameters]
+        handlers = {(fixture.id, action.name): action.handler for fixture in self._fixtures for action in fixture.actions}
 
-            _handler_params = {}
-            for param in action.parameters.keys():
-                if param in _action_params:
-                    _handler_params[param] = action.parameters[param]
-                    continue
-                print(f"⚠️ render_actions: Could not find parameter '{param}' for action '{action.action}' on fixture {fixture.name}")
-
-            fixture_action.handler(**_handler_params)
+        self.arm_all_fixtures()
+        for action in action_list:
+            handlers[(action.fixture_id, action.action)](**action.parameters)
 
         return True
 
+    def render_action(self, action: ActionEntry) -> bool:
+        '''
+        Render a single validated action on top of the current canvas (no canvas reset, no compaction).
+        Used to preview actions while they are still being generated; fixtures must be armed by the caller.
+        '''
+        fixture = self._fixtures_by_id.get(action.fixture_id)
+        if fixture is None:
+            return False
+        if action.is_beat_relative:
+            from ..app_data import AppData
+            tempo_map = AppData().song.tempo_map
+            if tempo_map is not None:
+                action.resolve_timing(tempo_map)
+        for fixture_action in fixture.actions:
+            if fixture_action.name == action.action:
+                fixture_action.handler(**action.parameters)
+                return True
+        return False
+
     def __iter__(self):
         return iter(self._fixtures)
     
@@ -12,5 +12,6 @@ class Action:
     description: str
     parameters: list[ActionParameter]
     hidden: bool
+    channel_resolver: Any = None #callable(parameters) -> channel names written by the action (None if unknown)
     def __str__(self) -> str:
         return f"{self.name} | {self.description}"
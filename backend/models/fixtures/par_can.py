@@ -19,11 +19,11 @@ class RgbParCan(Fixture):
                 description="Flash effect with a post fade+out effect.", 
                 parameters=[
                     ActionParameter(name="start_time", type=float, description="Time when the flash effect is fired"),
-                    ActionParameter(name="duration", type=List[str], description="Fade out duration (default 1 beat)", optional=True),
+                    ActionParameter(name="duration", type=float, description="Fade out duration (default 1 beat)", optional=True),
                     ActionParameter(name="initial_value", type=float, description="Initial brightness value (default Max = 1.0)", optional=True),
                     ActionParameter(name="end_value", type=float, description="End brightness value (default Min = 0.0)", optional=True),
-                    ActionParameter(name="channels", type=float, description="list of channels to flash (default: 'white')", optional=True),
-            ], hidden=False))
+                    ActionParameter(name="channels", type=List[str], description="list of channels to flash (default: 'white')", optional=True),
+            ], hidden=False, channel_resolver=lambda params: self._flash_channels(params.get('channels', ['white']))))
 
         super().__init__(id, name, fixture_type, channels, arm, meta, position, actions=self._actions)
 
@@ -31,17 +31,20 @@ class RgbParCan(Fixture):
         """
         Render the flash action for the RGB Par Can fixture.
         """
+        self.fade_channel(
+            channel=self._flash_channels(channels),
+            start_value=initial_value,
+            end_value=end_value,
+            start_time=start_time,
+            duration=duration
+        )
+
+    def _flash_channels(self, channels: List[str] | str) -> List[str]:
+        """Resolve the channel names written by a flash."""
         if type(channels) is str:
             channels = [channels]
 
         # If no channels are specified, default to all three RGB channels
         if channels == ['white'] or channels == ['rgb']:
             channels = ['red', 'green', 'blue']
-
-        self.fade_channel(
-            channel=channels,
-            start_value=initial_value,
-            end_value=end_value,
-            start_time=start_time,
-            duration=duration
-        )
\ No newline at end of file
+        return channels
@@ -0,0 +1,4 @@
+from .song_catalog import CatalogEntry, LoadedSong, SongCatalog
+from .song_index import PlanSuggestion, SongIndex
+
+__all__ = ["CatalogEntry", "LoadedSong", "PlanSuggestion", "SongCatalog", "SongIndex"]
@@ -0,0 +1,231 @@
+"""Catalog of the song library with an LRU of loaded songs.
+
+The catalog scans "songs/*.mp3" and "data/*.meta.json" once and keeps the
+metadata of every song (CatalogEntry). Fully loaded songs (LoadedSong: the
+Song with its lazy analysis, plan, validated actions and, once shown, the
+rendered DMX canvas) are kept in an LRU under a memory budget: when the
+estimated size of the loaded songs exceeds it, the least recently used
+ones are evicted (never the song that was just requested).
+
+With a setlist, `preload_next()` loads the following song on a background
+thread, analysis included, so that switching to it is a lookup. Preloading
+does not render: the DMX canvas is shared by all fixtures, so it is only
+snapshotted when the app leaves a song (see AppData.load_song) and
+restored when it comes back. A loaded song is dropped as soon as one of its data files changes
+on disk behind the catalog's back.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from common.models.song.song import Song
+from ..lighting.action_list import ActionEntry, ActionList
+from ..lighting.action_validator import ValidationReport, validate_actions
+from ..lighting.plan import Plan, PlanEntry
+
+DEFAULT_MEMORY_BUDGET = 512 * 1024 * 1024
+DATA_FILES = ("meta", "beats", "chords", "analysis", "plan", "actions")
+
+# rough per-object sizes of parsed JSON and rendered frames (CPython, 64 bit)
+FRAME_BYTES = 512 + 120  # bytearray(512) plus its dict slot and float key
+ACTION_BYTES = 600
+PLAN_ENTRY_BYTES = 400
+
+
+@dataclass
+class CatalogEntry:
+    """Metadata of a song of the library (nothing of it is loaded)."""
+    name: str
+    audio_file: Optional[str] = None  # file name in songs/
+    duration: Optional[float] = None
+    bpm: Optional[float] = None
+    genre: Optional[str] = None
+    sections: int = 0
+    has_analysis: bool = False
+    has_plan: bool = False
+    has_actions: bool = False
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+@dataclass
+class LoadedSong:
+    """Everything AppData needs to switch to a song without touching the disk."""
+    song: Song
+    plan: List[PlanEntry] = field(default_factory=list)
+    actions: List[ActionEntry] = field(default_factory=list)
+    validation: Optional[ValidationReport] = None  # report of the actions validation (see ActionList.validate)
+    canvas: Optional[Dict[str, Any]] = None  # DMXCanvas.snapshot() of the rendered song
+    stamp: Tuple = ()
+    nbytes: int = 0
+
+
+def _object_bytes(value: Any) -> int:
+    """Approximate heap size of a parsed JSON document (memory-mapped arrays count as resident)."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes + 100
+    if isinstance(value, dict):
+        return 100 + sum(50 + len(key) + _object_bytes(item) for key, item in value.items())
+    if isinstance(value, list):
+        if value and isinstance(value[0], (int, float)):
+            return 60 + 32 * len(value)  # pointer plus float object
+        return 60 + sum(8 + _object_bytes(item) for item in value)
+    if isinstance(value, str):
+        return 50 + len(value)
+    return 32
+
+
+class SongCatalog:
+    """Metadata of all songs plus an LRU of loaded songs under a memory budget."""
+
+    def __init__(self, base_folder: Path, memory_budget: int = DEFAULT_MEMORY_BUDGET):
+        self._base_folder = Path(base_folder)
+        self._data_folder = self._base_folder / "data"
+        self._songs_folder = self._base_folder / "songs"
+        self._memory_budget = memory_budget
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._loaded: "OrderedDict[str, LoadedSong]" = OrderedDict()
+        self._loading: Dict[str, threading.Thread] = {}
+        self._lock = threading.RLock()
+        self.setlist: List[str] = []
+        self.scan()
+
+    def scan(self) -> int:
+        """Index the songs found in songs/ and data/; returns the number of songs."""
+        entries: Dict[str, CatalogEntry] = {}
+        if self._songs_folder.exists():
+            for path in sorted(self._songs_folder.glob("*.mp3")):
+                entries[path.stem] = CatalogEntry(name=path.stem, audio_file=path.name)
+        for path in sorted(self._data_folder.glob("*.meta.json")):
+            name = path.name[:-len(".meta.json")]
+            entry = entries.setdefault(name, CatalogEntry(name=name))
+            try:
+                with open(path, "r") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ SongCatalog: unreadable {path.name}: {e}")
+                meta = {}
+            entry.duration = meta.get("duration")
+            entry.bpm = meta.get("bpm")
+            entry.genre = meta.get("genre")
+            entry.sections = len(meta.get("sections", []))
+        for name, entry in entries.items():
+            entry.has_analysis = (self._data_folder / f"{name}.analysis.json").exists()
+            entry.has_plan = (self._data_folder / f"{name}.plan.json").exists()
+            entry.has_actions = (self._data_folder / f"{name}.actions.json").exists()
+        with self._lock:
+            self._entries = entries
+        print(f"📚 SongCatalog: {len(entries)} songs")
+        return len(entries)
+
+    @property
+    def entries(self) -> List[CatalogEntry]:
+        return list(self._entries.values())
+
+    @property
+    def loaded_songs(self) -> List[str]:
+        """Names of the loaded songs, least recently used first."""
+        with self._lock:
+            return list(self._loaded)
+
+    @property
+    def memory_used(self) -> int:
+        with self._lock:
+            return sum(loaded.nbytes for loaded in self._loaded.values())
+
+    def _stamp(self, song_name: str) -> Tuple:
+        stamp = []
+        for part in DATA_FILES:
+            path = self._data_folder / f"{song_name}.{part}.json"
+            stamp.append(path.stat().st_mtime if path.exists() else None)
+        return tuple(stamp)
+
+    def _load(self, song_name: str, warm: bool = False) -> LoadedSong:
+        from ..app_data import AppData
+        song = Song(song_name, base_folder=str(self._base_folder))
+        if warm:
+            song.analysis.load()
+        plan = Plan.read_plan(self._data_folder, song) or []
+        actions = ActionList.read_actions(self._data_folder, song) or []
+        actions, report = validate_actions(actions, AppData().fixtures)
+        if not report.ok:
+            print(f"⚠️ SongCatalog '{song_name}' -> {report}")
+        return LoadedSong(song=song, plan=plan, actions=actions, validation=report, stamp=self._stamp(song_name))
+
+    @staticmethod
+    def _estimate(loaded: LoadedSong) -> int:
+        canvas = len(loaded.canvas["frames"]) * FRAME_BYTES if loaded.canvas else 0
+        return (_object_bytes(loaded.song.analysis.loaded) + canvas
+                + len(loaded.actions) * ACTION_BYTES + len(loaded.plan) * PLAN_ENTRY_BYTES)
+
+    def _insert(self, song_name: str, loaded: LoadedSong):
+        loaded.nbytes = self._estimate(loaded)
+        with self._lock:
+            self._loaded[song_name] = loaded
+            self._loaded.move_to_end(song_name)
+            used = sum(item.nbytes for item in self._loaded.values())
+            for name in list(self._loaded):
+                if used <= self._memory_budget or name == song_name:
+                    break
+                used -= self._loaded.pop(name).nbytes
+                print(f"🗑️ SongCatalog: evicted '{name}'")
+
+    def get(self, song_name: str) -> LoadedSong:
+        """Return a loaded song, from the LRU or loaded now (waiting for a running preload)."""
+        with self._lock:
+            thread = self._loading.get(song_name)
+        if thread is not None:
+            thread.join()
+        with self._lock:
+            loaded = self._loaded.get(song_name)
+            if loaded is not None and loaded.stamp == self._stamp(song_name):
+                self._loaded.move_to_end(song_name)
+                return loaded
+            self._loaded.pop(song_name, None)
+        loaded = self._load(song_name)
+        self._insert(song_name, loaded)
+        return loaded
+
+    def store(self, loaded: LoadedSong):
+        """Put back the current state of a song (edited plan/actions, rendered canvas) when leaving it."""
+        loaded.stamp = self._stamp(loaded.song.name)
+        self._insert(loaded.song.name, loaded)
+
+    def preload(self, song_name: str) -> Optional[threading.Thread]:
+        """Load a song on a background thread, unless it is loaded or being loaded already."""
+        with self._lock:
+            if song_name in self._loaded or song_name in self._loading or song_name not in self._entries:
+                return None
+
+            def run():
+                try:
+                    self._insert(song_name, self._load(song_name, warm=True))
+                    print(f"📚 SongCatalog: preloaded '{song_name}'")
+                except Exception as e:
+                    print(f"⚠️ SongCatalog: preloading '{song_name}' failed: {e}")
+                finally:
+                    with self._lock:
+                        self._loading.pop(song_name, None)
+
+            thread = threading.Thread(target=run, name=f"preload-{song_name}", daemon=True)
+            self._loading[song_name] = thread
+        thread.start()
+        return thread
+
+    def next_song(self, song_name: str) -> Optional[str]:
+        """Song after `song_name` in the setlist (None at the end or outside of it)."""
+        if song_name not in self.setlist:
+            return None
+        index = self.setlist.index(song_name) + 1
+        return self.setlist[index] if index < len(self.setlist) else None
+
+    def preload_next(self, song_name: str) -> Optional[threading.Thread]:
+        next_song = self.next_song(song_name)
+        return self.preload(next_song) if next_song else None
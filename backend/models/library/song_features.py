@@ -0,0 +1,106 @@
+"""Fixed-length feature vector of a song for similarity search.
+
+Built from the analysis output ("{song}.analysis.json"), every feature
+scaled to roughly [0, 1]:
+
+  tempo      - bpm (and its half/double time folded into 60-180)
+  key        - position on the circle of fifths (sin, cos) and mode
+  energy     - mean, spread, share of loud passages and a coarse profile
+  spectral   - median and spread of the spectral centroid
+  rhythm     - kick and snare onsets per second
+  vocals     - share of the song with vocals
+  structure  - section count, mean section length and share of each
+               section type
+
+FEATURE_WEIGHTS balances the groups, so a 16-point energy profile does
+not outweigh the tempo.
+"""
+
+import math
+import re
+from typing import Any, Dict, List
+
+import numpy as np
+
+ENERGY_PROFILE_POINTS = 16
+SECTION_TYPES = ["intro", "verse", "chorus", "bridge", "instrumental", "outro"]
+PITCH_CLASSES = {"c": 0, "d": 2, "e": 4, "f": 5, "g": 7, "a": 9, "b": 11}
+KEY_PATTERN = re.compile(r"^\s*([a-g])([#b]?)\s*(m|min|minor|maj|major)?\b", re.IGNORECASE)
+
+FEATURE_NAMES: List[str] = (
+    ["tempo", "key_sin", "key_cos", "key_minor",
+     "energy_mean", "energy_std", "energy_loud",
+     "centroid_median", "centroid_std",
+     "kicks_per_sec", "snares_per_sec", "vocals",
+     "section_count", "section_length"]
+    + [f"energy_{index}" for index in range(ENERGY_PROFILE_POINTS)]
+    + [f"section_{name}" for name in SECTION_TYPES]
+)
+
+# per-feature weight so that every group weighs about the same in the distance
+FEATURE_WEIGHTS = np.asarray(
+    [3.0, 1.0, 1.0, 1.0,
+     1.0, 1.0, 1.0,
+     1.5, 1.5,
+     1.5, 1.5, 2.0,
+     1.0, 1.0]
+    + [3.0 / ENERGY_PROFILE_POINTS] * ENERGY_PROFILE_POINTS
+    + [2.0 / len(SECTION_TYPES)] * len(SECTION_TYPES)
+)
+
+
+def _fold_tempo(bpm: float) -> float:
+    # 70 and 140 bpm share the beat grid, compare them as the same tempo
+    while bpm and bpm < 60:
+        bpm *= 2
+    while bpm > 180:
+        bpm /= 2
+    return bpm
+
+
+def _key_features(key: str) -> List[float]:
+    """(sin, cos) of the circle of fifths position and mode (1 minor, 0 major, 0.5 unknown)."""
+    match = KEY_PATTERN.match(key or "")
+    if not match:
+        return [0.0, 0.0, 0.5]
+    root, accidental, mode = match.groups()
+    pitch = (PITCH_CLASSES[root.lower()] + {"#": 1, "b": -1}.get(accidental, 0)) % 12
+    angle = 2 * math.pi * ((pitch * 7) % 12) / 12
+    minor = 0.5 if mode is None else float(mode.lower() in ("m", "min", "minor"))
+    return [math.sin(angle) / 2 + 0.5, math.cos(angle) / 2 + 0.5, minor]
+
+
+def song_features(analysis: Dict[str, Any], duration: float) -> np.ndarray:
+    """Return the feature vector (see FEATURE_NAMES) of an analyzed song."""
+    duration = duration or 1.0
+    tempo = _fold_tempo(float(analysis.get("tempo") or 0.0))
+
+    energy = np.asarray(analysis.get("energy_curve", []), dtype=float)
+    if len(energy) and energy.max() > 0:
+        energy = energy / energy.max()
+        profile = [float(chunk.mean()) for chunk in np.array_split(energy, ENERGY_PROFILE_POINTS) if len(chunk)]
+        profile += [profile[-1]] * (ENERGY_PROFILE_POINTS - len(profile))
+        energy_stats = [float(energy.mean()), float(energy.std()) * 2, float((energy > 0.6).mean())]
+    else:
+        profile = [0.0] * ENERGY_PROFILE_POINTS
+        energy_stats = [0.0, 0.0, 0.0]
+
+    centroid = np.asarray(analysis.get("spectral_emotion", {}).get("spectral_features", {}).get("spectral_centroid", []), dtype=float)
+    spectral = [float(np.median(centroid)) / 8000, float(centroid.std()) / 4000] if len(centroid) else [0.0, 0.0]
+
+    drums = analysis.get("drums", {})
+    rhythm = [len(drums.get("kick_onsets", [])) / duration / 4, len(drums.get("snare_onsets", [])) / duration / 4]
+
+    vocal_time = sum(max(0.0, v["end"] - v["start"]) for v in analysis.get("vocals", {}).get("active_sections", []))
+
+    structure = analysis.get("structure", [])
+    shares = dict.fromkeys(SECTION_TYPES, 0.0)
+    for section in structure:
+        kind = section.get("section", "").lower()
+        if kind in shares:
+            shares[kind] += (section["end"] - section["start"]) / duration
+    layout = [len(structure) / 20, (duration / len(structure)) / 60 if structure else 0.0]
+
+    vector = [tempo / 200, *_key_features(analysis.get("key", "")), *energy_stats, *spectral, *rhythm,
+              min(vocal_time / duration, 1.0), *layout, *profile, *shares.values()]
+    return np.clip(np.asarray(vector, dtype=float), 0.0, 2.0)
@@ -0,0 +1,182 @@
+"""Nearest-neighbor index of the song library.
+
+Every song with an analysis file in the data folder gets a feature
+vector (see song_features). Vectors are kept in one numpy matrix and
+persisted to "{cache_folder}/song_index.npz"; a song is re-featurized only
+when its analysis file changes. Queries are a single vectorized weighted
+distance over the matrix.
+
+`suggest()` finds the closest song that already has a plan and returns
+its plan entries and validated actions (read as Plan / ActionList read
+them, from the song bundle when it is up to date) re-timed to the beat grid of the target
+song: times are converted to beat indices on the source tempo map and
+back to seconds on the target tempo map, so effects stay on the beat.
+"""
+
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from common.models.song.song import Song
+from ..lighting.action_list import ActionEntry, ActionList
+from ..lighting.action_validator import validate_actions
+from ..lighting.plan import Plan, PlanEntry
+from .song_features import FEATURE_NAMES, FEATURE_WEIGHTS, song_features
+
+
+@dataclass
+class PlanSuggestion:
+    """Plan and actions of a similar song, re-timed to the target song."""
+    song: str  # target song
+    source: str  # song the plan comes from
+    distance: float
+    plan: List[PlanEntry] = field(default_factory=list)
+    actions: List[ActionEntry] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "song": self.song,
+            "source": self.source,
+            "distance": round(self.distance, 4),
+            "plan": [entry.__dict__ for entry in self.plan],
+            "action_count": len(self.actions),
+        }
+
+
+class SongIndex:
+    """Feature vectors of all analyzed songs with nearest-neighbor queries."""
+
+    def __init__(self, base_folder: Path, cache_folder: Path):
+        self._base_folder = Path(base_folder)
+        self._data_folder = self._base_folder / "data"
+        self._index_file = Path(cache_folder) / "song_index.npz"
+        self._names: List[str] = []
+        self._mtimes: Dict[str, float] = {}
+        self._vectors = np.empty((0, len(FEATURE_NAMES)))
+        self._load()
+
+    def _load(self):
+        if not self._index_file.exists():
+            return
+        try:
+            with np.load(self._index_file) as data:
+                if list(data["features"]) != FEATURE_NAMES:
+                    return  # feature layout changed, rebuild
+                self._names = [str(name) for name in data["names"]]
+                self._mtimes = dict(zip(self._names, data["mtimes"].tolist()))
+                self._vectors = data["vectors"]
+        except (OSError, ValueError, KeyError):
+            print(f"⚠️ SongIndex: ignoring unreadable {self._index_file}")
+
+    def _save(self):
+        os.makedirs(self._index_file.parent, exist_ok=True)
+        tmp_file = self._index_file.with_name("song_index.tmp.npz")
+        np.savez(tmp_file, names=np.asarray(self._names), mtimes=np.asarray([self._mtimes[name] for name in self._names]),
+                 vectors=self._vectors, features=np.asarray(FEATURE_NAMES))
+        os.replace(tmp_file, self._index_file)
+
+    def refresh(self) -> int:
+        """Add new songs, re-featurize changed ones and drop removed ones; returns the number of updated songs."""
+        files = {path.name[:-len(".analysis.json")]: path for path in self._data_folder.glob("*.analysis.json")}
+        rows = {name: self._vectors[index] for index, name in enumerate(self._names) if name in files}
+        updated = 0
+        for name, path in files.items():
+            mtime = path.stat().st_mtime
+            if name in rows and self._mtimes.get(name) == mtime:
+                continue
+            try:
+                # fields come from the song bundle while it is up to date (see SongAnalysis)
+                song = Song(name, base_folder=str(self._base_folder))
+                rows[name] = song_features(song.analysis, self._duration(song))
+            except (OSError, ValueError) as e:
+                print(f"⚠️ SongIndex: skipping {name}: {e}")
+                rows.pop(name, None)
+                continue
+            self._mtimes[name] = mtime
+            updated += 1
+
+        if updated or len(rows) != len(self._names):
+            self._names = sorted(rows)
+            self._mtimes = {name: self._mtimes[name] for name in self._names}
+            self._vectors = np.vstack([rows[name] for name in self._names]) if rows else np.empty((0, len(FEATURE_NAMES)))
+            self._save()
+        return updated
+
+    @staticmethod
+    def _duration(song: Song) -> float:
+        """Song duration from its metadata, else the time of the last analyzed beat."""
+        if song.duration:
+            return float(song.duration)
+        beats = song.analysis.get("beats", [])
+        return float(beats[-1]) if len(beats) else 0.0
+
+    @property
+    def songs(self) -> List[str]:
+        return list(self._names)
+
+    def vector(self, song_name: str) -> Optional[np.ndarray]:
+        if song_name not in self._names:
+            return None
+        return self._vectors[self._names.index(song_name)]
+
+    def nearest(self, song_name: str, k: int = 3, candidates: Optional[List[str]] = None) -> List[Tuple[str, float]]:
+        """Return up to k (song, distance) pairs closest to a song, excluding the song itself."""
+        query = self.vector(song_name)
+        if query is None or not len(self._names):
+            return []
+        distances = np.sqrt((((self._vectors - query) ** 2) * FEATURE_WEIGHTS).sum(axis=1))
+        allowed = set(candidates) if candidates is not None else None
+        ranked = []
+        for index in np.argsort(distances):
+            name = self._names[index]
+            if name == song_name or (allowed is not None and name not in allowed):
+                continue
+            ranked.append((name, float(distances[index])))
+            if len(ranked) == k:
+                break
+        return ranked
+
+    def suggest(self, song_name: str) -> Optional[PlanSuggestion]:
+        """Plan and actions of the closest planned song, re-timed to `song_name`."""
+        self.refresh()
+        planned = [name for name in self._names if (self._data_folder / f"{name}.plan.json").exists()]
+        nearest = self.nearest(song_name, k=1, candidates=planned)
+        if not nearest:
+            return None
+        source_name, distance = nearest[0]
+
+        source = Song(source_name, base_folder=str(self._base_folder))
+        target = Song(song_name, base_folder=str(self._base_folder))
+        source_map, target_map = source.tempo_map, target.tempo_map
+        duration = self._duration(target) or float("inf")
+        suggestion = PlanSuggestion(song=song_name, source=source_name, distance=distance)
+
+        for entry in Plan.read_plan(self._data_folder, source) or []:
+            if source_map and target_map:
+                entry.anchor_to_beats(source_map)
+                entry.resolve_timing(target_map)
+            if entry.start < duration:
+                entry.end = min(entry.end, duration)
+                suggestion.plan.append(entry)
+
+        actions = ActionList.read_actions(self._data_folder, source) or []
+        if actions:
+            from ..app_data import AppData
+            actions, report = validate_actions(actions, AppData().fixtures)
+            if not report.ok:
+                print(f"⚠️ SongIndex.suggest '{source_name}' -> {report}")
+        for action in actions:
+            if source_map and target_map:
+                if not action.is_beat_relative:
+                    action.anchor_to_beats(source_map)
+                action.resolve_timing(target_map)
+            if action.start_time < duration:
+                suggestion.actions.append(action)
+
+        print(f"🧭 SongIndex: '{song_name}' is closest to '{source_name}' (distance {distance:.3f}), "
+              f"{len(suggestion.plan)} plan entries / {len(suggestion.actions)} actions re-timed")
+        return suggestion
+
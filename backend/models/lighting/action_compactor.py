@@ -0,0 +1,288 @@
+"""Compaction of redundant lighting actions before rendering.
+
+LLM generated action lists frequently contain actions that never reach
+the DMX output: exact duplicates, or holds that a later action fully
+overwrites. Rendering them is wasted work because every action walks
+its whole frame range on the canvas.
+
+`compact_actions` runs three passes over an action list (in render
+order, later actions win):
+
+1. Quantize start times up to the first rendered frame (as DMXCanvas.render),
+   only where the rendered output cannot change.
+2. Sweep the list backwards per DMX channel, keeping a set of frame
+   intervals already written by later actions, and drop every action
+   whose frames are all covered (or that writes no frame at all).
+3. Merge adjacent or overlapping identical holds (`set_channel` with
+   the same fixture, channels and value) into a single action.
+
+Actions whose written channels cannot be resolved (unknown fixture,
+action or channel) are treated as opaque: they are always kept, never
+hide other actions and block merges on their fixture.
+
+Example:
+    kept, report = compact_actions(actions, fixtures, fps=50, frame_count=6788)
+    print(report)
+"""
+
+from __future__ import annotations
+import math
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from .action_list import ActionEntry
+
+if TYPE_CHECKING:
+    from ..fixtures.fixture_list import FixtureList
+
+# Actions that hold a constant value over their whole time range
+_HOLD_ACTIONS = {'set_channel'}
+
+# Tolerance used when mapping times onto the frame grid
+_EPSILON = 1e-6
+
+# DMX channel -> (first frame, last frame), None when the footprint is unknown
+Footprint = Optional[Dict[int, Tuple[int, int]]]
+
+
+@dataclass
+class CompactionReport:
+    """Summary of what `compact_actions` changed.
+
+    Attributes
+    ----------
+    total : int
+        Number of actions received.
+    kept : int
+        Number of actions left to render.
+    quantized : int
+        Number of actions whose start time was snapped to the frame grid.
+    removed : list[tuple[ActionEntry, str]]
+        Dropped actions with the reason ('occluded' or 'out_of_range').
+    merged : list[tuple[ActionEntry, ActionEntry]]
+        Pairs of holds that were merged (earlier, later).
+    """
+    total: int = 0
+    kept: int = 0
+    quantized: int = 0
+    removed: List[Tuple[ActionEntry, str]] = field(default_factory=list)
+    merged: List[Tuple[ActionEntry, ActionEntry]] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        occluded = sum(1 for _, reason in self.removed if reason == 'occluded')
+        out_of_range = len(self.removed) - occluded
+        return (f"{self.kept}/{self.total} actions kept "
+                f"({occluded} occluded, {out_of_range} out of range, "
+                f"{len(self.merged)} holds merged, {self.quantized} quantized)")
+
+
+class _Coverage:
+    """Sorted set of disjoint, inclusive frame intervals."""
+
+    def __init__(self):
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+
+    def covers(self, first: int, last: int) -> bool:
+        i = bisect_right(self._starts, first) - 1
+        return i >= 0 and self._ends[i] >= last
+
+    def add(self, first: int, last: int) -> None:
+        i = bisect_right(self._starts, first) - 1
+        if i >= 0 and self._ends[i] >= first - 1:
+            lo = i
+            first = self._starts[i]
+        else:
+            lo = i + 1
+        hi = lo
+        while hi < len(self._starts) and self._starts[hi] <= last + 1:
+            last = max(last, self._ends[hi])
+            hi += 1
+        self._starts[lo:hi] = [first]
+        self._ends[lo:hi] = [last]
+
+
+def _frame_key(index: int, fps: int) -> float:
+    """Time of a canvas frame, rounded as DMXCanvas.init_canvas does."""
+    return round(index * (1.0 / fps), 2)
+
+
+def _rendered_range(start_time: float, duration: float, fps: int, frame_count: int) -> Tuple[int, int]:
+    """Frames DMXCanvas.render visits (start_time <= frame time <= start_time + duration), as an index range."""
+    end_time = start_time + duration if duration > 0 else float('inf')
+    first = max(0, math.ceil(start_time * fps - _EPSILON))
+    while first > 0 and _frame_key(first - 1, fps) >= start_time:
+        first -= 1
+    while first < frame_count and _frame_key(first, fps) < start_time:
+        first += 1
+    last = frame_count - 1 if end_time == float('inf') else min(math.floor(end_time * fps + _EPSILON), frame_count - 1)
+    while last + 1 < frame_count and _frame_key(last + 1, fps) <= end_time:
+        last += 1
+    while last >= 0 and _frame_key(last, fps) > end_time:
+        last -= 1
+    return first, last
+
+
+def _quantize(action: ActionEntry, fps: int, frame_count: int) -> ActionEntry:
+    """Move the start time of an action to the first frame it renders, when the rendered output stays the same.
+
+    Like DMXCanvas.render, the start snaps up (ceil) to the next frame. Holds
+    keep their end time (the duration shrinks accordingly); actions whose
+    output depends on the render progress (fades) are only snapped when they
+    run until the end of the canvas (duration 0, progress always 1).
+    """
+    if action.duration > 0 and action.action not in _HOLD_ACTIONS:
+        return action
+    first, last = _rendered_range(action.start_time, action.duration, fps, frame_count)
+    if first >= frame_count or first > last:
+        return action
+    start_time = _frame_key(first, fps)
+    if start_time == action.start_time:
+        return action
+    duration = action.duration
+    if duration > 0:
+        duration = round(action.start_time + action.duration - start_time, 6)
+        if duration <= 0 or _rendered_range(start_time, duration, fps, frame_count) != (first, last):
+            return action
+    return action.replace(start_time=start_time, duration=duration)
+
+
+def _frame_window(action: ActionEntry, fps: int, frame_count: int) -> Optional[Tuple[int, int]]:
+    """Return the inclusive frame range rendered by the action (None if empty)."""
+    first = max(0, math.ceil(action.start_time * fps - _EPSILON))
+    if action.duration > 0:
+        last = math.floor((action.start_time + action.duration) * fps + _EPSILON)
+    else:
+        # duration 0 renders until the end of the canvas
+        last = frame_count - 1
+    last = min(last, frame_count - 1)
+    if first > last:
+        return None
+    return first, last
+
+
+def _footprint(action: ActionEntry, fixtures: FixtureList, fps: int, frame_count: int) -> Footprint:
+    fixture = fixtures.get_fixture_by_id(action.fixture_id)
+    if not fixture:
+        return None
+    fixture_action = next((a for a in fixture.actions if a.name == action.action), None)
+    if not fixture_action or not fixture_action.channel_resolver:
+        return None
+    try:
+        channel_names = fixture_action.channel_resolver(action.parameters)
+        if channel_names is None:
+            return None
+        channels = [fixture.channels[c] for c in channel_names]
+    except (KeyError, TypeError):
+        return None
+
+    window = _frame_window(action, fps, frame_count)
+    if window is None:
+        return {}
+    return {channel: window for channel in channels}
+
+
+def _hold_key(action: ActionEntry) -> Optional[tuple]:
+    if action.action not in _HOLD_ACTIONS or action.duration <= 0:
+        return None
+    params = {k: v for k, v in action.parameters.items() if k not in ('start_time', 'duration')}
+    return (action.fixture_id, action.action, repr(sorted(params.items())))
+
+
+def compact_actions(actions: List[ActionEntry], fixtures: FixtureList, fps: int, frame_count: int) -> Tuple[List[ActionEntry], CompactionReport]:
+    """Remove actions that do not affect the rendered output.
+
+    Parameters
+    ----------
+    actions : list[ActionEntry]
+        Actions in render order. The input entries are not modified;
+        quantized and merged actions are returned as new entries.
+    fixtures : FixtureList
+        Fixtures used to resolve the DMX channels written by each action.
+    fps, frame_count : int
+        Frame grid of the target DMX canvas.
+
+    Returns
+    -------
+    (list[ActionEntry], CompactionReport)
+        Actions left to render (same relative order) and the report.
+    """
+    report = CompactionReport(total=len(actions))
+
+    # 1. quantize start times to the frame grid
+    quantized: List[ActionEntry] = []
+    for action in actions:
+        snapped = _quantize(action, fps, frame_count)
+        if snapped is not action:
+            report.quantized += 1
+        quantized.append(snapped)
+
+    footprints = [_footprint(action, fixtures, fps, frame_count) for action in quantized]
+
+    # 2. backwards sweep: drop actions fully overwritten by later ones
+    coverage: Dict[int, _Coverage] = {}
+    visible = [True] * len(quantized)
+    for i in range(len(quantized) - 1, -1, -1):
+        footprint = footprints[i]
+        if footprint is None:
+            continue
+        if not footprint:
+            visible[i] = False
+            report.removed.append((actions[i], 'out_of_range'))
+            continue
+        if all(channel in coverage and coverage[channel].covers(*window) for channel, window in footprint.items()):
+            visible[i] = False
+            report.removed.append((actions[i], 'occluded'))
+            continue
+        for channel, window in footprint.items():
+            coverage.setdefault(channel, _Coverage()).add(*window)
+    report.removed.reverse()
+
+    # 3. merge adjacent identical holds
+    kept: List[Optional[ActionEntry]] = []
+    kept_footprints: List[Footprint] = []
+    for i, action in enumerate(quantized):
+        if visible[i]:
+            kept.append(action)
+            kept_footprints.append(footprints[i])
+
+    # hold key -> [index in kept, first frame, last frame, frame windows written since on its channels]
+    pending: Dict[tuple, list] = {}
+    for i, action in enumerate(kept):
+        footprint = kept_footprints[i]
+        key = _hold_key(action) if footprint else None
+        window = next(iter(footprint.values())) if key else None
+        hold = pending.get(key) if key else None
+        if hold is not None:
+            union = (min(window[0], hold[1]), max(window[1], hold[2]))
+            adjacent = window[0] <= hold[2] + 1 and hold[1] <= window[1] + 1
+            blocked = any(a <= union[1] and b >= union[0] for a, b in hold[3])
+            if adjacent and not blocked:
+                previous = kept[hold[0]]
+                start_time = min(previous.start_time, action.start_time)
+                end_time = max(previous.start_time + previous.duration, action.start_time + action.duration)
+                report.merged.append((previous, action))
+                kept[hold[0]] = None
+                kept[i] = action.replace(start_time=start_time, duration=round(end_time - start_time, 6))
+                window = union
+
+        # writes on the channels of other pending holds prevent merging across them
+        for other_key, other in pending.items():
+            if other_key == key:
+                continue
+            if footprint is None:
+                if other_key[0] == action.fixture_id:
+                    other[3].append((0, frame_count))
+                continue
+            other_channels = kept_footprints[other[0]]
+            for channel, channel_window in footprint.items():
+                if channel in other_channels:
+                    other[3].append(channel_window)
+
+        if key:
+            pending[key] = [i, window[0], window[1], []]
+
+    result = [action for action in kept if action is not None]
+    report.kept = len(result)
+    return result, report
@@ -20,10 +20,16 @@ Example:
     al.save()
 """
 
-from typing import Any
+from typing import TYPE_CHECKING, Any, Optional
 import json
 from pathlib import Path
 
+from common.models.song.song_bundle import decode_actions
+
+if TYPE_CHECKING:
+    from common.models.song.song import Song
+    from common.models.song.tempo_map import TempoMap
+
 
 class ActionEntry:
     """Represents a single lighting action/effect for a fixture.
@@ -41,6 +47,12 @@ class ActionEntry:
     parameters : dict[str, Any]
         Arbitrary key/value parameters that describe the action. Typical
         keys include things like 'intensity', 'color', 'pan', 'tilt', etc.
+    start_beat : float | None
+        Optional beat-relative start (fractional beat index on the song
+        tempo map). When set, start_time is derived from it at render
+        time, so the action follows re-analyzed beat grids.
+    duration_beats : float | None
+        Optional duration in beats, resolved like start_beat.
 
     Notes
     -----
@@ -49,7 +61,8 @@ class ActionEntry:
     straightforward (ActionList.save uses entry.__dict__).
     """
 
-    def __init__(self, start_time: float, action:str, duration: float, fixture_id: str, parameters: dict[str, Any]):
+    def __init__(self, start_time: float, action:str, duration: float, fixture_id: str, parameters: dict[str, Any],
+                 start_beat: Optional[float] = None, duration_beats: Optional[float] = None):
         """Initialize a new ActionEntry.
 
         Parameters
@@ -62,17 +75,59 @@ class ActionEntry:
             Target fixture identifier.
         parameters:
             Dictionary of action-specific parameters.
+        start_beat, duration_beats:
+            Optional beat-relative timing (see class docstring).
         """
         self.start_time = start_time
         self.duration = duration
         self.action = action
         self.fixture_id = fixture_id
         self.parameters = parameters
+        self.start_beat = start_beat
+        self.duration_beats = duration_beats
         
         # add or update start_time and duration to the parameters dictionary
         self.parameters['start_time'] = start_time
         self.parameters['duration'] = duration
 
+    @property
+    def is_beat_relative(self) -> bool:
+        """True when the timing is expressed in beats."""
+        return self.start_beat is not None
+
+    def replace(self, **changes: Any) -> "ActionEntry":
+        """Return a copy with the given attributes replaced (parameters are copied)."""
+        fields = {
+            'start_time': self.start_time,
+            'action': self.action,
+            'duration': self.duration,
+            'fixture_id': self.fixture_id,
+            'parameters': dict(self.parameters),
+            'start_beat': self.start_beat,
+            'duration_beats': self.duration_beats,
+        }
+        fields.update(changes)
+        return ActionEntry(**fields)
+
+    def resolve_timing(self, tempo_map: "TempoMap") -> None:
+        """Derive start_time/duration in seconds from the beat-relative timing."""
+        if self.start_beat is None:
+            return
+        self.start_time = round(tempo_map.beat_to_time(self.start_beat), 4)
+        if self.duration_beats is not None:
+            self.duration = round(tempo_map.beats_to_duration(self.start_beat, self.duration_beats), 4)
+        self.parameters['start_time'] = self.start_time
+        self.parameters['duration'] = self.duration
+
+    def anchor_to_beats(self, tempo_map: "TempoMap") -> None:
+        """Express the current start_time/duration in beats on the given tempo map.
+
+        A duration of 0 (until the end of the song) stays in seconds.
+        """
+        self.start_beat = round(tempo_map.time_to_beat(self.start_time), 4)
+        if self.duration > 0:
+            self.duration_beats = round(tempo_map.time_to_beat(self.start_time + self.duration) - self.start_beat, 4)
+
     def __repr__(self) -> str:
         """Return a concise, readable representation for debugging."""
         return f"Action(start_time={self.start_time}, duration={self.duration}, fixture_id={self.fixture_id}, parameters={self.parameters})"
@@ -108,6 +163,7 @@ class ActionList:
             the value is taken from AppData().data_folder.
         """
         self.action_list: list[ActionEntry] = []
+        self.validation_report = None
         self._data_folder = data_folder
         if self._data_folder == '':
             from ..app_data import AppData
@@ -144,25 +200,72 @@ class ActionList:
         """Remove all actions from the list (in-memory only)."""
         self.action_list = []
 
-    def load(self) -> None:
-        """Load actions from the per-song JSON file into memory.
-
-        If the file does not exist this function returns without error.
-        On JSON parsing or IO errors a message is printed and loading
-        stops.
+    def resolve_timing(self, tempo_map: "TempoMap") -> None:
+        """Re-derive the times of all beat-relative actions from a tempo map."""
+        for action in self.action_list:
+            action.resolve_timing(tempo_map)
+
+    def anchor_to_beats(self, tempo_map: "TempoMap") -> None:
+        """Convert all absolute actions to beat-relative timing."""
+        for action in self.action_list:
+            if not action.is_beat_relative:
+                action.anchor_to_beats(tempo_map)
+
+    @staticmethod
+    def read_actions(data_folder, song: "Song") -> Optional[list[ActionEntry]]:
+        """Read the (not yet validated) actions of any song.
+
+        The song bundle is used while it is up to date, otherwise the
+        "{song_name}.actions.json" file. Returns None if neither exists;
+        on JSON parsing or IO errors a message is printed and the actions
+        read so far are returned.
         """
-        actions_file = self._actions_file()
-        if not Path(actions_file).exists():
-            return
-        self.clear_all()
+        bundle = song.bundle
+        data = bundle.part("actions") if bundle and bundle.path.parent == Path(data_folder) else None
+        if data is not None:
+            # bundled actions are column arrays (see common.models.song.song_bundle)
+            return [ActionEntry(**entry) for entry in decode_actions(data)]
+        actions_file = Path(data_folder) / f"{song.name}.actions.json"
+        if not actions_file.exists():
+            return None
+        actions: list[ActionEntry] = []
         with open(actions_file, 'r') as f:
             try:
                 data = json.load(f)
                 for entry in data:
                     # Expect data items to match ActionEntry constructor
-                    self.action_list.append(ActionEntry(**entry))
+                    actions.append(ActionEntry(**entry))
             except Exception as e:
                 print(f"Failed to load actions: {e}")
+        return actions
+
+    def load(self) -> None:
+        """Load actions from the per-song JSON file into memory.
+
+        If the file does not exist this function returns without error.
+        On JSON parsing or IO errors a message is printed and loading
+        stops. Loaded actions are validated (see `validate`).
+        """
+        from ..app_data import AppData
+        actions = self.read_actions(self._data_folder, AppData().song)
+        if actions is None:
+            return
+        self.action_list = actions
+        self.validate()
+
+    def validate(self):
+        """Validate the in-memory actions against the fixture action schemas.
+
+        Invalid actions are dropped and unknown parameters stripped, so
+        the list can be rendered without further checks. The structured
+        report is returned and kept in `validation_report`.
+        """
+        from ..app_data import AppData
+        from .action_validator import validate_actions
+        self.action_list, self.validation_report = validate_actions(self.action_list, AppData().fixtures)
+        if not self.validation_report.ok:
+            print(f"⚠️ ActionList.validate -> {self.validation_report}")
+        return self.validation_report
 
     def save(self) -> None:
         """Persist current actions to the per-song JSON file.
@@ -0,0 +1,247 @@
+"""Batch validation of lighting actions against the fixture action schemas.
+
+Actions are validated once, when they enter the application
+(`ActionList.load` / `ActionList.validate` and
+`EffectTranslator.parse_actions`), so rendering can assume clean input.
+
+Each fixture action is compiled once into an `ActionSchema` holding the
+accepted parameter names and types, the parameters the handler cannot
+default, and the fixture channels. `validate_actions` then checks a
+whole list with dictionary lookups only:
+
+- unknown fixture or action: the action is dropped
+- missing required parameter, wrong parameter type or unknown channel:
+  the action is dropped
+- unknown parameter: the parameter is stripped, the action is kept
+
+Every problem is recorded as an `ActionError` in a `ValidationReport`.
+
+`actions_json_schema` turns the same registry into a JSON schema for
+constrained (structured output) generation of action lists.
+"""
+
+from __future__ import annotations
+import inspect
+import typing
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from .action_list import ActionEntry
+
+if TYPE_CHECKING:
+    from ..fixtures.fixture_list import FixtureList
+
+
+@dataclass
+class ActionError:
+    """A single validation problem.
+
+    Attributes
+    ----------
+    index : int
+        Position of the action in the validated list.
+    fixture_id, action : str
+        Target fixture and action name of the offending entry.
+    code : str
+        One of 'unknown_fixture', 'unknown_action', 'missing_parameter',
+        'invalid_parameter', 'unknown_channel', 'unknown_parameter'.
+    message : str
+        Human readable description.
+    fatal : bool
+        True when the action was dropped, False when it was repaired.
+    """
+    index: int
+    fixture_id: str
+    action: str
+    code: str
+    message: str
+    fatal: bool = True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.__dict__.copy()
+
+
+@dataclass
+class ValidationReport:
+    """Result of validating a list of actions."""
+    total: int = 0
+    valid: int = 0
+    errors: List[ActionError] = field(default_factory=list)
+
+    @property
+    def dropped(self) -> int:
+        return self.total - self.valid
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def merge(self, other: ValidationReport) -> None:
+        """Append the report of the actions validated right after these ones."""
+        self.errors.extend(replace(error, index=error.index + self.total) for error in other.errors)
+        self.total += other.total
+        self.valid += other.valid
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "valid": self.valid,
+            "dropped": self.dropped,
+            "errors": [error.to_dict() for error in self.errors],
+        }
+
+    def __str__(self) -> str:
+        repaired = sum(1 for error in self.errors if not error.fatal)
+        return f"{self.valid}/{self.total} actions valid ({self.dropped} dropped, {repaired} repaired)"
+
+
+@dataclass(frozen=True)
+class ActionSchema:
+    """Compiled parameter schema of one fixture action."""
+    parameters: Dict[str, Callable[[Any], bool]]
+    required: FrozenSet[str]
+    list_parameters: FrozenSet[str]
+    channels: FrozenSet[str]
+    channel_resolver: Any = None
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_channel_list(value: Any) -> bool:
+    return isinstance(value, str) or (isinstance(value, list) and all(isinstance(v, str) for v in value))
+
+
+def _type_check(param_type: Any) -> Callable[[Any], bool]:
+    if param_type in (float, int):
+        return _is_number
+    if typing.get_origin(param_type) is list:
+        return _is_channel_list
+    return lambda value: True
+
+
+def compile_action_schemas(fixtures: FixtureList) -> Dict[Tuple[str, str], ActionSchema]:
+    """Compile the action schemas of every fixture, keyed by (fixture_id, action)."""
+    schemas: Dict[Tuple[str, str], ActionSchema] = {}
+    for fixture in fixtures:
+        for action in fixture.actions:
+            # a parameter is required when the handler has no default for it
+            handler_params = inspect.signature(action.handler).parameters
+            required = frozenset(
+                param.name for param in action.parameters
+                if param.name in handler_params and handler_params[param.name].default is inspect.Parameter.empty
+            )
+            schemas[(fixture.id, action.name)] = ActionSchema(
+                parameters={param.name: _type_check(param.type) for param in action.parameters},
+                required=required,
+                list_parameters=frozenset(param.name for param in action.parameters if typing.get_origin(param.type) is list),
+                channels=frozenset(fixture.channels),
+                channel_resolver=action.channel_resolver,
+            )
+    return schemas
+
+
+def _json_type(param_type: Any) -> Dict[str, Any]:
+    if param_type in (float, int):
+        return {"type": "number"}
+    if typing.get_origin(param_type) is list:
+        return {"type": "array", "items": {"type": "string"}}
+    if param_type is bool:
+        return {"type": "boolean"}
+    return {"type": "string"}
+
+
+def actions_json_schema(fixtures: FixtureList) -> Dict[str, Any]:
+    """JSON schema of `{"actions": [...]}` accepting every visible fixture action.
+
+    Each action name becomes one item variant restricted to the fixtures
+    providing it; start_time and duration are top-level item fields.
+    """
+    schemas = fixtures.action_schemas
+    variants: Dict[str, Dict[str, Any]] = {}
+    for fixture in fixtures:
+        for action in fixture.actions:
+            if action.hidden:
+                continue
+            variant = variants.get(action.name)
+            if variant is None:
+                parameters = [param for param in action.parameters if param.name not in ("start_time", "duration")]
+                variant = variants[action.name] = {
+                    "type": "object",
+                    "properties": {
+                        "action": {"type": "string", "enum": [action.name]},
+                        "fixture_id": {"type": "string", "enum": []},
+                        "start_time": {"type": "number"},
+                        "duration": {"type": "number"},
+                        "parameters": {
+                            "type": "object",
+                            "properties": {param.name: _json_type(param.type) for param in parameters},
+                            "required": sorted(param.name for param in parameters if param.name in schemas[(fixture.id, action.name)].required),
+                            "additionalProperties": False,
+                        },
+                    },
+                    "required": ["action", "fixture_id", "start_time", "parameters"],
+                }
+            variant["properties"]["fixture_id"]["enum"].append(fixture.id)
+
+    return {
+        "type": "object",
+        "properties": {"actions": {"type": "array", "items": {"anyOf": list(variants.values())}}},
+        "required": ["actions"],
+    }
+
+
+def validate_actions(actions: List[ActionEntry], fixtures: FixtureList) -> Tuple[List[ActionEntry], ValidationReport]:
+    """Validate a list of actions in one pass.
+
+    Returns the clean actions (same relative order; repaired entries are
+    copies) and the validation report.
+    """
+    schemas = fixtures.action_schemas
+    fixture_ids = {fixture.id for fixture in fixtures}
+    report = ValidationReport(total=len(actions))
+    clean: List[ActionEntry] = []
+
+    for index, action in enumerate(actions):
+        def error(code: str, message: str, fatal: bool = True):
+            report.errors.append(ActionError(index, action.fixture_id, action.action, code, message, fatal))
+
+        schema = schemas.get((action.fixture_id, action.action))
+        if schema is None:
+            if action.fixture_id not in fixture_ids:
+                error('unknown_fixture', f"Unknown fixture '{action.fixture_id}'")
+            else:
+                error('unknown_action', f"Action '{action.action}' is not available on fixture '{action.fixture_id}'")
+            continue
+
+        params = action.parameters
+        # a single channel name is accepted where a list is expected
+        if any(isinstance(params.get(name), str) for name in schema.list_parameters):
+            params = {name: [value] if name in schema.list_parameters and isinstance(value, str) else value for name, value in params.items()}
+        unknown = [name for name in params if name not in schema.parameters]
+        missing = [name for name in schema.required if name not in params]
+        invalid = [name for name, value in params.items() if name in schema.parameters and not schema.parameters[name](value)]
+        if missing:
+            error('missing_parameter', f"Missing required parameter(s): {', '.join(sorted(missing))}")
+            continue
+        if invalid:
+            error('invalid_parameter', f"Invalid value for parameter(s): {', '.join(f'{n}={params[n]!r}' for n in invalid)}")
+            continue
+
+        if schema.channel_resolver:
+            channel_names: Optional[List[str]] = schema.channel_resolver(params)
+            bad_channels = [c for c in channel_names or [] if c not in schema.channels]
+            if bad_channels:
+                error('unknown_channel', f"Unknown channel(s) on fixture '{action.fixture_id}': {', '.join(bad_channels)}")
+                continue
+
+        if unknown:
+            error('unknown_parameter', f"Ignored unknown parameter(s): {', '.join(unknown)}", fatal=False)
+            params = {name: value for name, value in params.items() if name in schema.parameters}
+        if params is not action.parameters:
+            action = action.replace(parameters=params)
+        clean.append(action)
+
+    report.valid = len(clean)
+    return clean, report
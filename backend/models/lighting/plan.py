@@ -1,7 +1,12 @@
 from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
 import json
 
+if TYPE_CHECKING:
+    from common.models.song.song import Song
+    from common.models.song.tempo_map import TempoMap
+
 
 @dataclass
 class PlanEntry:
@@ -10,6 +15,20 @@ class PlanEntry:
     end: float
     name: str
     description: str
+    start_beat: Optional[float] = None  # beat-relative start on the song tempo map (overrides start)
+    end_beat: Optional[float] = None  # beat-relative end on the song tempo map (overrides end)
+
+    def resolve_timing(self, tempo_map: "TempoMap"):
+        """Derive start/end in seconds from the beat-relative timing."""
+        if self.start_beat is not None:
+            self.start = round(tempo_map.beat_to_time(self.start_beat), 4)
+        if self.end_beat is not None:
+            self.end = round(tempo_map.beat_to_time(self.end_beat), 4)
+
+    def anchor_to_beats(self, tempo_map: "TempoMap"):
+        """Express the current start/end in beats on the given tempo map."""
+        self.start_beat = round(tempo_map.time_to_beat(self.start), 4)
+        self.end_beat = round(tempo_map.time_to_beat(self.end), 4)
 
 class Plan:
     def __init__(self):
@@ -23,18 +42,30 @@ class Plan:
         from ..app_data import AppData
         return str(Path(self._data_folder) / f"{AppData().song_name}.plan.json")
 
-    def load_plan(self):
-        """Load plans from data folder (e.g., data/born_slippy.plan.json) or create an empty one."""
-        plan_path = self._actions_file()
-        if not Path(plan_path).exists():
-            self.plans = []
-            return
+    @staticmethod
+    def read_plan(data_folder, song: "Song") -> Optional[List[PlanEntry]]:
+        """Read the plan of any song from its bundle or plan file (None if it can not be read)."""
+        bundle = song.bundle
+        data = bundle.part("plan") if bundle and bundle.path.parent == Path(data_folder) else None
+        if data is not None:
+            return [PlanEntry(**entry) for entry in data]
+        plan_path = Path(data_folder) / f"{song.name}.plan.json"
+        if not plan_path.exists():
+            return []
         with open(plan_path, 'r') as f:
             try:
                 data = json.load(f)
-                self.plans = [PlanEntry(**entry) for entry in data]
+                return [PlanEntry(**entry) for entry in data]
             except Exception as e:
                 print(f"Failed to load plan: {e}")
+                return None
+
+    def load_plan(self):
+        """Load plans from data folder (e.g., data/born_slippy.plan.json) or create an empty one."""
+        from ..app_data import AppData
+        plans = self.read_plan(self._data_folder, AppData().song)
+        if plans is not None:
+            self.plans = plans
 
     def save_plan(self):
         """Save plan to data folder (e.g., data/born_slippy.plan.json)."""
@@ -54,6 +85,11 @@ class Plan:
         """Remove a PlanEntry from the list of plans."""
         self.plans.remove(plan)
 
+    def resolve_timing(self, tempo_map: "TempoMap"):
+        """Re-derive the times of all beat-relative plan entries from a tempo map."""
+        for plan in self.plans:
+            plan.resolve_timing(tempo_map)
+
     def get_plans(self):
         """Return the list of all PlanEntry objects."""
         return self.plans
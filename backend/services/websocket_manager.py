@@ -2,6 +2,7 @@ import json
 from typing import Dict, Any
 from flask_socketio import emit
 from backend.models.app_data import AppData
+from backend.agents.telemetry import LLMTelemetry
 
 def get_app_state() -> Dict[str, Any]:
     """
@@ -81,6 +82,99 @@ def handle_seek_audio(params: Dict[str, Any]):
     emit('app_state', app_state, broadcast=True)
     print(f"⏭️ Audio seeked to {time:.2f}s")
 
+def handle_get_llm_telemetry(params: Dict[str, Any]):
+    """
+    Send the aggregated LLM call telemetry to the requesting client
+    """
+    recent = int(params.get('recent', 20))
+    emit('llm_telemetry', {
+        "type": "llm_telemetry",
+        "data": LLMTelemetry().summary(recent=recent)
+    })
+    print(f"📊 Sent llm_telemetry")
+
+def handle_suggest_plan(params: Dict[str, Any]):
+    """
+    Suggest the plan and actions of the most similar planned song, re-timed to the current song.
+    With apply=True they replace the current plan and action list.
+    """
+    app_data = AppData()
+    suggestion = app_data.song_index.suggest(app_data.song_name)
+    if suggestion is None:
+        emit('plan_suggestion', {"type": "plan_suggestion", "data": None})
+        print(f"🧭 No similar planned song for '{app_data.song_name}'")
+        return
+
+    if params.get('apply', False):
+        app_data.plan.clear_plan()
+        for entry in suggestion.plan:
+            app_data.plan.add_plan(entry)
+        app_data.plan.save_plan()
+        app_data.action_list.clear_all()
+        for action in suggestion.actions:
+            app_data.action_list.add_action(action)
+        app_data.action_list.validate()
+        app_data.action_list.save()
+
+    emit('plan_suggestion', {
+        "type": "plan_suggestion",
+        "data": {**suggestion.to_dict(), "applied": bool(params.get('apply', False))}
+    })
+    print(f"🧭 Sent plan_suggestion from '{suggestion.source}'")
+
+def get_song_catalog() -> Dict[str, Any]:
+    """
+    Return the song library with the loaded (LRU) songs and the setlist
+    """
+    catalog = AppData().song_catalog
+    return {
+        "type": "song_catalog",
+        "data": {
+            "songs": [entry.to_dict() for entry in catalog.entries],
+            "loaded": catalog.loaded_songs,
+            "setlist": catalog.setlist,
+            "memory_used": catalog.memory_used
+        }
+    }
+
+def handle_list_songs(params: Dict[str, Any]):
+    """
+    Send the song catalog to the requesting client (rescan=True re-reads the songs and data folders)
+    """
+    if params.get('rescan', False):
+        AppData().song_catalog.scan()
+    emit('song_catalog', get_song_catalog())
+    print(f"📚 Sent song_catalog")
+
+def handle_load_song(params: Dict[str, Any]):
+    """
+    Switch to another song of the catalog and broadcast the new app state
+    """
+    song_name = params.get('song', '')
+    app_data = AppData()
+    if song_name not in {entry.name for entry in app_data.song_catalog.entries}:
+        print(f"⚠️ Unknown song: {song_name}")
+        emit('error', {'error': f'Unknown song: {song_name}'})
+        return
+    app_data.is_playing = False
+    app_data.current_time = 0.0
+    app_data.load_song(song_name)
+    emit('app_state', get_app_state(), broadcast=True)
+    print(f"🎶 Loaded song '{song_name}'")
+
+def handle_set_setlist(params: Dict[str, Any]):
+    """
+    Set the setlist (ordered song names); the song after the current one is preloaded
+    """
+    app_data = AppData()
+    catalog = app_data.song_catalog
+    known = {entry.name for entry in catalog.entries}
+    catalog.setlist = [name for name in params.get('songs', []) if name in known]
+    if app_data.song is not None:
+        catalog.preload_next(app_data.song_name)
+    emit('song_catalog', get_song_catalog(), broadcast=True)
+    print(f"📚 Setlist set: {len(catalog.setlist)} songs")
+
 # Example schema for reference:
 # {
 #  "type": "app_state",
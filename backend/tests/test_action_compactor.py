@@ -0,0 +1,49 @@
+"""Compaction must not change the rendered DMX canvas."""
+
+from typing import Dict, List
+
+import pytest
+
+from backend.models.app_data import AppData
+from backend.models.lighting.action_compactor import compact_actions
+from backend.models.lighting.action_list import ActionEntry
+
+
+@pytest.fixture(scope="module")
+def app_data() -> AppData:
+    app_data = AppData()
+    app_data.load_song("born_slippy")
+    return app_data
+
+
+def _render(app_data: AppData, actions: List[ActionEntry]) -> Dict[float, bytes]:
+    """Render actions as FixtureList.render_actions does, without compaction."""
+    canvas = app_data.dmx_canvas
+    canvas.init_canvas()
+    fixtures = app_data.fixtures
+    handlers = {(fixture.id, action.name): action.handler for fixture in fixtures for action in fixture.actions}
+    fixtures.arm_all_fixtures()
+    for action in actions:
+        handlers[(action.fixture_id, action.action)](**action.parameters)
+    return {time: bytes(frame) for time, frame in canvas.frames.items()}
+
+
+def _assert_same_canvas(app_data: AppData, actions: List[ActionEntry]):
+    canvas = app_data.dmx_canvas
+    before = _render(app_data, actions)
+    kept, report = compact_actions(actions, app_data.fixtures, canvas.fps, canvas.frame_count)
+    after = _render(app_data, kept)
+    changed = [time for time in before if before[time] != after[time]]
+    assert not changed, f"{len(changed)} frames changed by compaction ({report}), first at {changed[:5]}"
+
+
+def test_song_actions_render_unchanged(app_data):
+    _assert_same_canvas(app_data, list(app_data.action_list.action_list))
+
+
+@pytest.mark.parametrize("offset", [0.003, 0.007, 0.01, 0.013])
+def test_off_grid_actions_render_unchanged(app_data, offset):
+    # start times between frames (e.g. 1.37s on a 50 fps grid) must not render one frame early
+    actions = [action.replace(start_time=round(action.start_time + offset, 6))
+               for action in app_data.action_list.action_list]
+    _assert_same_canvas(app_data, actions)
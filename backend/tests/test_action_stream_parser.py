@@ -0,0 +1,41 @@
+"""ActionStreamParser on streamed responses."""
+
+import pytest
+
+from backend.agents.effect_tramslator.action_stream_parser import ActionStreamParser
+from backend.models.lighting.action_list import ActionEntry
+
+
+def _parse_line(line: str) -> ActionEntry:
+    # "flash parcan_l at 0.21"
+    action, fixture_id, _, start_time = line.split()[:4]
+    return ActionEntry(float(start_time), action, 0.0, fixture_id, {})
+
+
+def _parse(response: str, chunk_size: int) -> ActionStreamParser:
+    parser = ActionStreamParser(_parse_line)
+    for index in range(0, len(response), chunk_size):
+        parser.feed(response[index:index + chunk_size])
+    parser.close()
+    return parser
+
+
+RESPONSES = {
+    "fence at line start": "Here you go:\n```actions\nflash parcan_pl at 0.01\nflash parcan_l at 0.21\n```\nflash parcan_r at 0.41",
+    "fence after text": 'agent: "```actions\nflash parcan_pl at 0.01\nflash parcan_l at 0.21\n```"\nflash parcan_r at 0.41',
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1000])
+@pytest.mark.parametrize("response", RESPONSES.values(), ids=RESPONSES.keys())
+def test_actions_block(response, chunk_size):
+    parser = _parse(response, chunk_size)
+    assert parser.found_block
+    assert [(action.fixture_id, action.start_time) for action in parser.actions] == [("parcan_pl", 0.01), ("parcan_l", 0.21)]
+    assert not parser.errors
+
+
+def test_no_actions_block():
+    parser = _parse("sorry no actions", 4)
+    assert not parser.found_block
+    assert not parser.actions
@@ -0,0 +1,27 @@
+"""AnalysisSummarizer token budget and segment clipping."""
+
+import pytest
+
+from backend.agents.lighting_planner.analysis_summarizer import AnalysisSummarizer
+from backend.models.app_data import AppData
+
+
+@pytest.fixture(scope="module")
+def summarizer() -> AnalysisSummarizer:
+    app_data = AppData()
+    app_data.load_song("born_slippy")
+    return AnalysisSummarizer(app_data.song_analysis, app_data.prompts_folder)
+
+
+@pytest.mark.parametrize("token_budget", [200, 400, 800])
+def test_summary_fits_budget(summarizer, token_budget):
+    summary = summarizer.summarize(0, None, token_budget)
+    assert summarizer.estimate_tokens(summary) <= token_budget
+    assert summary["sections"]
+
+
+def test_sections_are_clipped_to_segment(summarizer):
+    summary = summarizer.summarize(30, 60, 800)
+    assert summary["sections"]
+    for section in summary["sections"]:
+        assert 30 <= section["start"] < section["end"] <= 60
@@ -0,0 +1,26 @@
+"""Switching songs with AppData.load_song."""
+
+from backend.models.app_data import AppData
+
+
+def test_load_song_keeps_validation_report():
+    app_data = AppData()
+    app_data.load_song("born_slippy")
+    report = app_data.action_list.validation_report
+    assert report is not None
+    assert report.valid == len(app_data.action_list.action_list)
+
+
+def test_load_song_retimes_beat_anchored_plan():
+    app_data = AppData()
+    app_data.load_song("born_slippy")
+    entry = app_data.plan.plans[0]
+    saved = (entry.start, entry.start_beat)
+    try:
+        # a plan entry anchored to beat 4 with seconds from an older beat grid
+        entry.start, entry.start_beat = 999.0, 4.0
+        app_data.load_song("born_slippy")
+        entry = app_data.plan.plans[0]
+        assert entry.start == round(app_data.song.tempo_map.beat_to_time(4.0), 4)
+    finally:
+        entry.start, entry.start_beat = saved
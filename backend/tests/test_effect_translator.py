@@ -0,0 +1,71 @@
+"""EffectTranslator against the fake Ollama server."""
+
+import pytest
+
+from backend.agents import llm_session
+from backend.agents.effect_tramslator.effect_translator import EffectTranslator
+from backend.agents.effect_tramslator.translation_cache import TranslationCache
+from backend.agents.model_race import ModelRacePolicy
+from backend.agents.response_cache import ResponseCache
+from backend.benchmarks.fake_ollama import FakeOllama
+from backend.models.app_data import AppData
+from backend.models.lighting.action_list import ActionEntry
+from backend.models.lighting.plan import PlanEntry
+
+
+@pytest.fixture(scope="module")
+def app_data() -> AppData:
+    app_data = AppData()
+    app_data.load_song("born_slippy")
+    return app_data
+
+
+@pytest.fixture
+def translator(app_data, tmp_path) -> EffectTranslator:
+    translator = EffectTranslator(live_render=False)
+    translator.response_cache = ResponseCache(tmp_path)
+    translator.translation_cache = TranslationCache(tmp_path)
+    return translator
+
+
+def test_llm_is_asked_again_after_fallback(app_data, translator):
+    plan_entry = app_data.plan.plans[0]
+    with FakeOllama(script=["sorry no actions"], ttft=0, token_rate=0) as server:
+        translator.server_url = server.url
+        for _ in range(2):
+            actions = llm_session.run(translator._translate_entry(plan_entry, echo=False))
+            assert actions  # rule-based fallback
+        assert len(server.requests) == 2
+    assert translator.response_cache.stats["entries"] == 0
+
+
+def test_apply_actions_keeps_neighbour_entry_actions(app_data, translator):
+    first = PlanEntry(id=1, start=0.0, end=10.0, name="first", description="")
+    second = PlanEntry(id=2, start=10.0, end=20.0, name="second", description="")
+
+    def flash(start_time: float) -> ActionEntry:
+        return ActionEntry(start_time, "flash", 0.5, "parcan_l", {})
+
+    saved = app_data.action_list.action_list
+    try:
+        app_data.action_list.action_list = []
+        translator.apply_actions([flash(1.0), flash(9.0)], save=False, plan_entry=first)
+        # the second entry starts its effect a little early, over the first entry's actions
+        translator.apply_actions([flash(8.5), flash(15.0)], save=False, plan_entry=second)
+        assert sorted(action.start_time for action in app_data.action_list.action_list) == [1.0, 8.5, 9.0, 15.0]
+    finally:
+        app_data.action_list.action_list = saved
+
+
+def test_race_candidates_bypass_response_cache(app_data, translator, tmp_path):
+    plan_entry = app_data.plan.plans[0]
+    translator.race_models = ["cogito:8b", "qwen3:8b"]
+    translator.race_policy = ModelRacePolicy(tmp_path)
+    response = f"```actions\nflash parcan_l at {plan_entry.start + 1:.2f}\n```"
+    with FakeOllama(script=[response], models=translator.race_models, ttft=0, token_rate=0) as server:
+        translator.server_url = server.url
+        for _ in range(2):
+            actions, _ = llm_session.run(translator._generate_actions(translator.build_request(plan_entry), False, None))
+            assert actions
+        assert len(server.requests) == 4
+    assert translator.response_cache.stats["entries"] == 0
@@ -0,0 +1,16 @@
+"""Candidate selection of ModelRacePolicy."""
+
+from backend.agents.model_race import ModelRacePolicy
+
+
+def test_candidates_explore_least_raced_model(tmp_path):
+    policy = ModelRacePolicy(tmp_path)
+    for _ in range(5):
+        policy.record("EffectTranslator", ["fast", "good", "slow"], "fast")
+    policy.record("EffectTranslator", ["fast", "good"], "good")
+
+    candidates = policy.candidates("EffectTranslator", ["fast", "good", "slow"], width=2)
+    # "slow" never won, but it was raced less than "good" and gets the exploration slot
+    assert candidates == ["fast", "slow"]
+    assert policy.candidates("EffectTranslator", ["fast", "good", "slow"], width=1) == ["fast"]
+    assert policy.candidates("EffectTranslator", ["fast", "good"], width=3) == ["fast", "good"]
@@ -1,7 +1,12 @@
+from .analysis import SongAnalysis
 from .beat import Beat
+from .beat_index import BeatIndex
 from .chord import Chord
+from .chord_track import ChordTrack
 from .key_moment import KeyMoment
 from .section import Section
 from .song import Song
+from .song_bundle import SongBundle
+from .tempo_map import TempoMap
 
-__all__ = ["Beat", "Chord", "KeyMoment", "Section", "Song"]
+__all__ = ["Beat", "BeatIndex", "Chord", "ChordTrack", "KeyMoment", "Section", "Song", "SongAnalysis", "SongBundle", "TempoMap"]
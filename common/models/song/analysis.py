@@ -0,0 +1,134 @@
+import json
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .song_bundle import SongBundle
+
+# large analysis curves by name, with their path in the analysis document;
+# every curve is sampled evenly over the whole song
+CURVES: Dict[str, Tuple[str, ...]] = {
+    "energy_curve": ("energy_curve",),
+    "pitch_contour": ("vocals", "pitch_contour"),
+    "spectral_centroid": ("spectral_emotion", "spectral_features", "spectral_centroid"),
+    "spectral_flux": ("spectral_emotion", "spectral_features", "spectral_flux"),
+    "chroma_features": ("spectral_emotion", "spectral_features", "chroma_features"),
+}
+
+
+class SongAnalysis(Mapping):
+    '''
+    Lazy, field-level view of the analysis of a song (data/{song}.analysis.json).
+
+    Behaves as a read-only dict of the top-level analysis fields, loaded on
+    first access. While the song bundle is up to date every field comes
+    from the bundle on its own, with its numeric lists as memory maps, so
+    unread fields (and unread parts of a curve) are never loaded. Without a
+    fresh bundle the JSON file is parsed once, on the first access.
+
+    `curve()` returns the large curves (see CURVES) as read-only float
+    arrays and `window()` the samples of a curve within a time window.
+    All cached values are dropped when the analysis file changes on disk.
+    '''
+
+    def __init__(self, data_folder: str, song_name: str, bundle: Optional[SongBundle] = None, duration: Optional[float] = None):
+        self._file = Path(data_folder) / f"{song_name}.analysis.json"
+        self._bundle = bundle
+        self._duration = duration
+        self._stamp: Optional[Tuple[float, int]] = None
+        self._checked = False
+        self._from_bundle = False
+        self._document: Optional[Dict[str, Any]] = None
+        self._fields: Dict[str, Any] = {}
+        self._curves: Dict[str, np.ndarray] = {}
+
+    def _check(self):
+        '''Drop the caches when the analysis file changed since they were filled.'''
+        stat = self._file.stat() if self._file.exists() else None
+        stamp = (stat.st_mtime, stat.st_size) if stat else None
+        if self._checked and stamp == self._stamp:
+            return
+        if self._checked:
+            print(f"🔄 SongAnalysis: {self._file.name} changed, reloading")
+        self._checked = True
+        self._stamp = stamp
+        self._from_bundle = self._bundle is not None and self._bundle.is_fresh("analysis")
+        self._document = None
+        self._fields = {}
+        self._curves = {}
+
+    def _load_document(self) -> Dict[str, Any]:
+        if self._document is None:
+            self._document = {}
+            if self._stamp is not None:
+                with open(self._file, "r") as f:
+                    self._document = json.load(f)
+        return self._document
+
+    def _keys(self) -> List[str]:
+        self._check()
+        return self._bundle.keys("analysis") if self._from_bundle else list(self._load_document())
+
+    def __getitem__(self, key: str) -> Any:
+        self._check()
+        if key not in self._fields:
+            if self._from_bundle:
+                if key not in self._bundle.keys("analysis"):
+                    raise KeyError(key)
+                self._fields[key] = self._bundle.field("analysis", key)
+            else:
+                self._fields[key] = self._load_document()[key]
+        return self._fields[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return len(self._keys())
+
+    def __contains__(self, key) -> bool:
+        return key in self._keys()
+
+    @property
+    def duration(self) -> float:
+        return float(self._duration or 0.0)
+
+    @property
+    def loaded(self) -> Dict[str, Any]:
+        '''The analysis data held in memory (the whole document once the JSON file was parsed).'''
+        return self._document if self._document is not None else dict(self._fields)
+
+    def load(self, fields: Optional[List[str]] = None):
+        '''Load some (default: all) top-level fields now, e.g. before the song is needed.'''
+        for key in fields if fields is not None else self._keys():
+            if key in self:
+                self[key]
+
+    def curve(self, name: str) -> np.ndarray:
+        '''A large curve of the analysis (see CURVES) as a read-only float array (empty if missing).'''
+        self._check()
+        if name not in self._curves:
+            path = CURVES[name]
+            value: Any = self.get(path[0], {})
+            for key in path[1:]:
+                value = value.get(key, {}) if isinstance(value, Mapping) else {}
+            curve = np.asarray(value if len(value) else [], dtype=float)
+            curve.flags.writeable = False
+            self._curves[name] = curve
+        return self._curves[name]
+
+    def curve_times(self, name: str) -> np.ndarray:
+        '''Sample times of a curve (sampled evenly over the song duration).'''
+        return np.linspace(0.0, self.duration, num=len(self.curve(name)), endpoint=False)
+
+    def window(self, name: str, start: float = 0.0, end: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        '''(times, values) of the curve samples with start <= time < end (values are a view).'''
+        curve = self.curve(name)
+        if not len(curve) or not self.duration:
+            return np.empty(0), curve[:0]
+        rate = len(curve) / self.duration
+        lower = max(int(np.ceil(start * rate)), 0)
+        upper = len(curve) if end is None else min(max(int(np.ceil(end * rate)), lower), len(curve))
+        return np.arange(lower, upper) / rate, curve[lower:upper]
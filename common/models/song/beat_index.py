@@ -0,0 +1,106 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .beat import Beat
+
+
+class BeatIndex:
+    '''
+    Sorted NumPy arrays of the song beat grid with O(log n) lookups.
+
+    Holds the beat times, volumes and energies as read-only arrays plus
+    the bar number and downbeat flag of every beat (bar 1 starts at beat 0,
+    as in TempoMap). Time windows are resolved with `searchsorted` into
+    slices, so range queries return array views without scanning the grid.
+    '''
+
+    def __init__(self, times, volumes=None, energies=None, beats_per_bar: int = 4):
+        times = np.asarray(times, dtype=float)
+        order = np.argsort(times, kind="stable")
+        self._times = times[order]
+        self._volumes = np.asarray(volumes, dtype=float)[order] if volumes is not None else np.zeros(len(times))
+        self._energies = np.asarray(energies, dtype=float)[order] if energies is not None else np.zeros(len(times))
+        self._beats_per_bar = beats_per_bar
+        positions = np.arange(len(self._times))
+        self._bars = positions // beats_per_bar + 1
+        self._downbeats = positions % beats_per_bar == 0
+        for array in (self._times, self._volumes, self._energies, self._bars, self._downbeats):
+            array.flags.writeable = False
+
+    @classmethod
+    def from_beats(cls, beats: List[Beat], beats_per_bar: int = 4) -> "BeatIndex":
+        return cls([beat.time for beat in beats], [beat.volume for beat in beats], [beat.energy for beat in beats], beats_per_bar)
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    @property
+    def times(self) -> np.ndarray:
+        return self._times
+
+    @property
+    def volumes(self) -> np.ndarray:
+        return self._volumes
+
+    @property
+    def energies(self) -> np.ndarray:
+        return self._energies
+
+    @property
+    def bars(self) -> np.ndarray:
+        '''1-based bar number of every beat.'''
+        return self._bars
+
+    @property
+    def downbeats(self) -> np.ndarray:
+        '''Times of the first beat of every bar.'''
+        return self._times[self._downbeats]
+
+    @property
+    def beats_per_bar(self) -> int:
+        return self._beats_per_bar
+
+    def window(self, start: float = 0.0, end: Optional[float] = None) -> slice:
+        '''Slice of the beats with start <= time < end (end None = until the last beat).'''
+        lower = int(np.searchsorted(self._times, start, side="left"))
+        upper = len(self._times) if end is None else int(np.searchsorted(self._times, end, side="left"))
+        return slice(lower, max(lower, upper))
+
+    def times_in(self, start: float = 0.0, end: Optional[float] = None) -> np.ndarray:
+        '''Beat times with start <= time < end (a read-only view).'''
+        return self._times[self.window(start, end)]
+
+    def downbeats_in(self, start: float = 0.0, end: Optional[float] = None) -> np.ndarray:
+        '''Downbeat times with start <= time < end.'''
+        window = self.window(start, end)
+        return self._times[window][self._downbeats[window]]
+
+    def nearest(self, time: float) -> int:
+        '''Index of the beat closest to `time` (-1 without beats).'''
+        if not len(self._times):
+            return -1
+        index = int(np.searchsorted(self._times, time))
+        if index == len(self._times) or (index > 0 and time - self._times[index - 1] <= self._times[index] - time):
+            index -= 1
+        return index
+
+    def snap(self, time: float) -> float:
+        '''Time of the beat closest to `time` (the time itself without beats).'''
+        index = self.nearest(time)
+        return float(self._times[index]) if index >= 0 else time
+
+    def snap_all(self, times) -> np.ndarray:
+        '''Vectorized snap of an array of times to their closest beats.'''
+        times = np.asarray(times, dtype=float)
+        if not len(self._times):
+            return times
+        upper = np.clip(np.searchsorted(self._times, times), 1, len(self._times) - 1) if len(self._times) > 1 else np.zeros(len(times), dtype=int)
+        lower = np.maximum(upper - 1, 0)
+        pick_lower = np.abs(times - self._times[lower]) <= np.abs(self._times[upper] - times)
+        return np.where(pick_lower, self._times[lower], self._times[upper])
+
+    def position(self, time: float) -> Tuple[int, int]:
+        '''(bar, beat in bar) of the beat closest to `time`, both 1-based.'''
+        index = max(self.nearest(time), 0)
+        return int(self._bars[index]) if len(self._bars) else 1, index % self._beats_per_bar + 1
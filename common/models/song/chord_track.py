@@ -0,0 +1,101 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .chord import Chord
+
+# label of beats without a recognized chord
+NO_CHORD = "N"
+
+
+class ChordTrack:
+    '''
+    Time-indexed chord sequence of a song (from data/{song}.chords.json).
+
+    The chord entries are kept as sorted NumPy arrays; consecutive entries
+    with the same chord (and bass) are merged into segments, so "chord at t"
+    and the chord changes within a window are `searchsorted` lookups.
+    Summaries of a time window are cached per (start, end).
+    '''
+
+    def __init__(self, entries: List[Dict[str, Any]], end_time: Optional[float] = None):
+        entries = sorted(entries, key=lambda entry: entry["time"])
+        self._entries = entries
+        self._chords: Optional[List[Chord]] = None
+        self._times = np.asarray([entry["time"] for entry in entries], dtype=float)
+        labels = [self._label(entry) for entry in entries]
+
+        # segment starts: first entry and every change of label
+        starts = [index for index in range(len(labels)) if index == 0 or labels[index] != labels[index - 1]]
+        self._segment_starts = self._times[np.asarray(starts, dtype=int)] if starts else np.empty(0)
+        if starts:
+            # the last chord lasts until end_time (the song end), or ends at its own entry
+            last_end = max(end_time or 0.0, float(self._times[-1]))
+            self._segment_ends = np.append(self._segment_starts[1:], last_end)
+        else:
+            self._segment_ends = np.empty(0)
+        self._segment_labels = [labels[index] for index in starts]
+        self._summaries: Dict[Tuple[float, float], Dict[str, Any]] = {}
+
+    @staticmethod
+    def _label(entry: Dict[str, Any]) -> str:
+        chord = entry.get("chord") or NO_CHORD
+        bass = entry.get("bass")
+        return f"{chord}/{bass}" if bass and chord != NO_CHORD else chord
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def chords(self) -> List[Chord]:
+        '''Chord objects in time order (built on first access).'''
+        if self._chords is None:
+            self._chords = [Chord(**entry) for entry in self._entries]
+        return self._chords
+
+    @property
+    def segments(self) -> List[Tuple[float, float, str]]:
+        '''(start, end, label) of every run of the same chord.'''
+        return list(zip(self._segment_starts.tolist(), self._segment_ends.tolist(), self._segment_labels))
+
+    def _segment_at(self, time: float) -> int:
+        return int(np.searchsorted(self._segment_starts, time, side="right")) - 1
+
+    def chord_at(self, time: float) -> Optional[str]:
+        '''Chord label sounding at `time` (None before the first chord or where no chord was detected).'''
+        index = self._segment_at(time)
+        if index < 0 or time >= self._segment_ends[index]:
+            return None
+        label = self._segment_labels[index]
+        return None if label == NO_CHORD else label
+
+    def changes(self, start: float = 0.0, end: Optional[float] = None) -> List[Tuple[float, str]]:
+        '''(time, new chord) of every chord change with start <= time < end.'''
+        lower = int(np.searchsorted(self._segment_starts, start, side="left"))
+        upper = len(self._segment_starts) if end is None else int(np.searchsorted(self._segment_starts, end, side="left"))
+        return [(float(self._segment_starts[index]), self._segment_labels[index]) for index in range(lower, upper)]
+
+    def summary(self, start: float = 0.0, end: Optional[float] = None) -> Dict[str, Any]:
+        '''Chords of a window by share of time (no-chord excluded), with the number of changes.'''
+        end = float(self._segment_ends[-1]) if end is None and len(self._segment_ends) else (end or 0.0)
+        key = (round(start, 3), round(end, 3))
+        if key not in self._summaries:
+            overlap = np.clip(np.minimum(self._segment_ends, end) - np.maximum(self._segment_starts, start), 0, None)
+            shares: Dict[str, float] = {}
+            for label, seconds in zip(self._segment_labels, overlap.tolist()):
+                if seconds > 0 and label != NO_CHORD:
+                    shares[label] = shares.get(label, 0.0) + seconds
+            total = end - start
+            ranked = sorted(shares.items(), key=lambda item: item[1], reverse=True)
+            self._summaries[key] = {
+                "main": ranked[0][0] if ranked else None,
+                "chords": [label for label, _ in ranked],
+                "shares": {label: round(seconds / total, 2) for label, seconds in ranked} if total > 0 else {},
+                "changes": len(self.changes(start, end)),
+            }
+        return self._summaries[key]
+
+    def section_summaries(self, sections) -> List[Dict[str, Any]]:
+        '''Summary of every section (objects with name/start/end), cached like summary().'''
+        return [{"section": section.name, "start": section.start, "end": section.end, **self.summary(section.start, section.end)}
+                for section in sections]
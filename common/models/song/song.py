@@ -2,10 +2,17 @@ from dataclasses import dataclass, field
 from typing import List, Optional
 import os
 
+import numpy as np
+
+from .analysis import SongAnalysis
 from .beat import Beat
+from .beat_index import BeatIndex
 from .chord import Chord
+from .chord_track import ChordTrack
 from .key_moment import KeyMoment
 from .section import Section
+from .song_bundle import SongBundle, decode_chords
+from .tempo_map import TempoMap
 import json
 
 class Song:
@@ -17,8 +24,12 @@ class Song:
         self._mp3_file: Optional[str] = None
         self._sections: List[Section] = []
         self._key_moments: List[KeyMoment] = []
-        self._chords: List[Chord] = []
+        self._chord_track: Optional[ChordTrack] = None
+        self._analysis: Optional[SongAnalysis] = None
         self._beats: List[Beat] = []
+        self._beat_index: Optional[BeatIndex] = None
+        self._tempo_map: Optional[TempoMap] = None
+        self._version: str = name
         self.base_folder = base_folder
 
         # check if base folder exists
@@ -28,25 +39,43 @@ class Song:
         # set data folder
         self._data_folder = os.path.join(self.base_folder, "data")
 
+        # binary bundle (see song_bundle), its fresh parts replace the JSON files
+        self._bundle: Optional[SongBundle] = SongBundle.open(self._data_folder, self._name)
+
         # load basic metadata
         meta_file = os.path.join(self._data_folder, f"{self._name}.meta.json")
-        if os.path.exists(meta_file):
+        meta_data = self._bundle.part("meta") if self._bundle else None
+        if meta_data is not None:
+            self._version = f"{self._name}@{self._bundle.source_mtime('meta')}"
+        elif os.path.exists(meta_file):
+            self._version = f"{self._name}@{os.path.getmtime(meta_file)}"
             with open(meta_file, "r") as f:
                 meta_data = json.load(f)
-                self._genre = meta_data.get("genre")
-                self._duration = meta_data.get("duration")
-                self._bpm = meta_data.get("bpm")
-                self._sections = [Section(**sec) for sec in meta_data.get("sections", [])]
-                self._key_moments = [KeyMoment(**km) for km in meta_data.get("key_moments", [])]
         else:
             # create an empty metadata file
             with open(meta_file, "w") as f:
                 json.dump({}, f)
+        if meta_data:
+            self._genre = meta_data.get("genre")
+            self._duration = meta_data.get("duration")
+            self._bpm = meta_data.get("bpm")
+            self._sections = [Section(**sec) for sec in meta_data.get("sections", [])]
+            self._key_moments = [KeyMoment(**km) for km in meta_data.get("key_moments", [])]
 
     @property
     def name(self) -> str:
         return self._name
 
+    @property
+    def bundle(self) -> Optional[SongBundle]:
+        '''The binary bundle of the song, if one was converted.'''
+        return self._bundle
+
+    @property
+    def version(self) -> str:
+        '''Identifies the loaded song metadata (changes when the meta file changes).'''
+        return self._version
+
     @property
     def genre(self) -> Optional[str]:
         return self._genre
@@ -75,28 +104,118 @@ class Song:
     def key_moments(self) -> List[KeyMoment]:
         return self._key_moments
 
+    @property
+    def chord_track(self) -> ChordTrack:
+        '''Time-indexed chords, loaded from data/born_slippy.chords.json on first access.'''
+        if self._chord_track is None:
+            chords_file = os.path.join(self._data_folder, f"{self._name}.chords.json")
+            bundled = self._bundle.part("chords") if self._bundle else None
+            entries: List[dict] = decode_chords(bundled) if bundled is not None else []
+            if bundled is None and os.path.exists(chords_file):
+                with open(chords_file, "r") as f:
+                    entries = json.load(f)
+            self._chord_track = ChordTrack(entries, end_time=self._duration)
+        return self._chord_track
+
     @property
     def chords(self) -> List[Chord]:
-        return self._chords
+        return self.chord_track.chords
+
+    @property
+    def analysis(self) -> SongAnalysis:
+        '''Lazy view of data/{song}.analysis.json, fields are loaded on first access.'''
+        if self._analysis is None:
+            self._analysis = SongAnalysis(self._data_folder, self._name, bundle=self._bundle, duration=self._duration)
+        return self._analysis
+
+    def reload_chords(self):
+        '''Drop the cached chord track so it is read again on next access.'''
+        self._chord_track = None
+
+    def chord_at(self, time: float) -> Optional[str]:
+        '''Chord label sounding at a time in seconds (None where no chord was detected).'''
+        return self.chord_track.chord_at(time)
+
+    @property
+    def section_chords(self) -> List[dict]:
+        '''Chord summary (main chord, chords by share, number of changes) of every section.'''
+        return self.chord_track.section_summaries(self._sections)
+
+    @property
+    def beat_index(self) -> BeatIndex:
+        '''Sorted NumPy arrays of the beat grid, loaded from data/born_slippy.beats.json once.'''
+        if self._beat_index is None:
+            bundled = self._bundle.part("beats") if self._bundle else None
+            if bundled is not None:
+                self._beat_index = BeatIndex(bundled["time"], bundled["volume"], bundled["energy"])
+                return self._beat_index
+            beats_file = os.path.join(self._data_folder, f"{self._name}.beats.json")
+            beats: List[dict] = []
+            if os.path.exists(beats_file):
+                with open(beats_file, "r") as f:
+                    beats = json.load(f)
+            self._beat_index = BeatIndex(
+                [beat["time"] for beat in beats],
+                [beat.get("volume", 0.0) for beat in beats],
+                [beat.get("energy", 0.0) for beat in beats],
+            )
+        return self._beat_index
 
     @property
     def beats(self) -> List[Beat]:
-        '''Load beats from data/born_slippy.beats.json.'''
-        if len(self._beats) > 0:
-            return self._beats
-        beats_file = os.path.join(self._data_folder, f"{self._name}.beats.json")
-        if os.path.exists(beats_file):
-            with open(beats_file, "r") as f:
-                self._beats = [Beat(**beat) for beat in json.load(f)]
+        '''Beat objects in time order (built from the beat index on first access).'''
+        if not self._beats and len(self.beat_index):
+            index = self.beat_index
+            self._beats = [Beat(time, volume, energy) for time, volume, energy in zip(index.times.tolist(), index.volumes.tolist(), index.energies.tolist())]
         return self._beats
 
+    def reload_beats(self):
+        '''Drop the cached beat grid (and tempo map) so it is read again on next access.'''
+        self._beats = []
+        self._beat_index = None
+        self._tempo_map = None
 
-    def get_beats(self, start: float = 0 , end: float = 0) -> List[Beat]:
-        '''Get beats within a specific time range.'''
+    @property
+    def tempo_map(self) -> Optional[TempoMap]:
+        '''Tempo map built from the beat grid, cached until the beats are reloaded.
+        None when the song has no usable beat grid (fewer than two beats and no bpm).'''
+        if self._tempo_map is None:
+            if len(self.beat_index.times) < 2 and not self._bpm:
+                return None
+            self._tempo_map = TempoMap(self.beat_index.times, bpm=self._bpm)
+        return self._tempo_map
+
+    def _window(self, start: float, end: float) -> slice:
         if end == 0:
             end = self._duration
-        return [beat for beat in self.beats if start <= beat.time < end]
+        return self.beat_index.window(start, end)
+
+    def get_beats(self, start: float = 0 , end: float = 0) -> List[Beat]:
+        '''Get beats within a specific time range.'''
+        return self.beats[self._window(start, end)]
 
     def get_beats_array(self, start: float = 0 , end: float = 0) -> List[float]:
         '''Get an array of beat times.'''
-        return [beat.time for beat in self.get_beats(start, end)]
+        return self.beat_index.times[self._window(start, end)].tolist()
+
+    def get_beat_times(self, start: float = 0, end: float = 0) -> np.ndarray:
+        '''Beat times within a time range as a read-only NumPy view.'''
+        return self.beat_index.times[self._window(start, end)]
+
+    def snap_to_beat(self, time: float) -> float:
+        '''Time of the beat closest to `time`.'''
+        return self.beat_index.snap(time)
+
+    def time_to_beat(self, time: float) -> float:
+        '''Fractional beat index at a time in seconds (see TempoMap).'''
+        return self._require_tempo_map().time_to_beat(time)
+
+    def beat_to_time(self, beat: float) -> float:
+        '''Time in seconds of a fractional beat index (see TempoMap).'''
+        return self._require_tempo_map().beat_to_time(beat)
+
+    def _require_tempo_map(self) -> TempoMap:
+        tempo_map = self.tempo_map
+        if tempo_map is None:
+            raise ValueError(f"Song '{self._name}' has no beat grid to convert beats and times")
+        return tempo_map
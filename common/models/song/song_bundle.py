@@ -0,0 +1,290 @@
+'''
+Single-file binary bundle of everything stored for a song.
+
+Layout of "data/{song}.bundle":
+
+    preamble: magic | format version | header offset | header length
+    array 0 | padding | array 1 | padding | ... | header (UTF-8 JSON)
+
+The header holds the small metadata as JSON (meta, plan, the scalar parts
+of the analysis) plus a table {name: {dtype, shape, offset}} of the
+arrays (analysis curves, beats, chords, actions). Arrays are aligned to
+64 bytes and memory-mapped with numpy, so they are neither read nor
+parsed until used.
+
+Every part records the mtime and size of the JSON file it was converted
+from. A part is used only while that file is unchanged (or gone), so
+editing or re-analyzing a song falls back to the JSON files until the
+bundle is converted again:
+
+    python -m common.models.song.song_bundle born_slippy   # no name: every song
+'''
+
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+MAGIC = b"LSBUNDLE"
+FORMAT_VERSION = 1
+# magic, format version, reserved (uint32), header offset and length (uint64)
+PREAMBLE_SIZE = 32
+ALIGNMENT = 64
+# numeric lists with at least this many values are stored as arrays
+MIN_ARRAY_SIZE = 32
+
+# bundle part -> source JSON file suffix
+PARTS = {
+    "meta": "meta.json",
+    "beats": "beats.json",
+    "chords": "chords.json",
+    "analysis": "analysis.json",
+    "plan": "plan.json",
+    "actions": "actions.json",
+}
+
+
+def _source_stamp(path: Path) -> Optional[Dict[str, float]]:
+    if not path.exists():
+        return None
+    stat = path.stat()
+    return {"mtime": stat.st_mtime, "size": stat.st_size}
+
+
+def _as_array(value: Any) -> Optional[np.ndarray]:
+    """The numeric array of a (nested) list of numbers, None for anything else."""
+    if not isinstance(value, list) or len(value) == 0 or isinstance(value[0], (dict, str, bool)):
+        return None
+    try:
+        array = np.asarray(value)
+    except ValueError:
+        return None  # ragged
+    if array.dtype.kind not in "if" or array.size < MIN_ARRAY_SIZE:
+        return None
+    return array
+
+
+def _extract_arrays(value: Any, name: str, arrays: Dict[str, np.ndarray]) -> Any:
+    """Replace the large numeric lists of a JSON document with {"$array": name} references."""
+    array = _as_array(value)
+    if array is not None:
+        arrays[name] = array
+        return {"$array": name}
+    if isinstance(value, dict):
+        return {key: _extract_arrays(item, f"{name}/{key}", arrays) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_extract_arrays(item, f"{name}/{index}", arrays) for index, item in enumerate(value)]
+    return value
+
+
+class SongBundle:
+    """Read access to a song bundle; arrays are memory-mapped on first use."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            preamble = f.read(PREAMBLE_SIZE)
+            version = int(np.frombuffer(preamble[8:12], dtype="<u4")[0]) if len(preamble) == PREAMBLE_SIZE else None
+            if preamble[:len(MAGIC)] != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"{self.path} is not a version {FORMAT_VERSION} song bundle")
+            header_offset, header_length = np.frombuffer(preamble[16:32], dtype="<u8").tolist()
+            f.seek(header_offset)
+            self.header: Dict[str, Any] = json.loads(f.read(header_length))
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    @staticmethod
+    def path_for(data_folder, song_name: str) -> Path:
+        return Path(data_folder) / f"{song_name}.bundle"
+
+    @classmethod
+    def open(cls, data_folder, song_name: str) -> Optional["SongBundle"]:
+        """The bundle of a song, None if there is none (or it cannot be read)."""
+        path = cls.path_for(data_folder, song_name)
+        if not path.exists():
+            return None
+        try:
+            return cls(path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ SongBundle: ignoring {path}: {e}")
+            return None
+
+    def is_fresh(self, part: str) -> bool:
+        """True when the part is in the bundle and its source JSON file has not changed since."""
+        if part not in self.header.get("parts", {}):
+            return False
+        source = self.path.parent / f"{self.header['song']}.{PARTS[part]}"
+        stamp = self.header["sources"].get(part)
+        current = _source_stamp(source)
+        return current is None or current == stamp
+
+    def source_mtime(self, part: str) -> Optional[float]:
+        stamp = self.header.get("sources", {}).get(part)
+        return stamp["mtime"] if stamp else None
+
+    def part(self, part: str) -> Any:
+        """The JSON document of a fresh part (arrays resolved to memory maps), None otherwise."""
+        if not self.is_fresh(part):
+            return None
+        return self._resolve(self.header["parts"][part])
+
+    def keys(self, part: str) -> List[str]:
+        """Top-level keys of a part stored as a JSON object."""
+        document = self.header.get("parts", {}).get(part)
+        return list(document) if isinstance(document, dict) else []
+
+    def field(self, part: str, key: str) -> Any:
+        """One top-level field of a part, resolving only its own arrays (the part must be fresh)."""
+        return self._resolve(self.header["parts"][part][key])
+
+    def array(self, name: str) -> np.ndarray:
+        """A read-only memory map of a bundled array."""
+        if name not in self._arrays:
+            entry = self.header["arrays"][name]
+            shape = tuple(entry["shape"])
+            if not np.prod(shape):
+                self._arrays[name] = np.empty(shape, dtype=entry["dtype"])
+            else:
+                self._arrays[name] = np.memmap(self.path, dtype=entry["dtype"], mode="r", offset=entry["offset"], shape=shape)
+        return self._arrays[name]
+
+    def _resolve(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            if set(value) == {"$array"}:
+                return self.array(value["$array"])
+            return {key: self._resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._resolve(item) for item in value]
+        return value
+
+    @staticmethod
+    def write(path: Path, header: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+        """Write a bundle atomically: the aligned arrays followed by the header JSON."""
+        table: Dict[str, Dict[str, Any]] = {}
+        tmp_path = Path(path).with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(b"\0" * PREAMBLE_SIZE)
+            for name, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                f.write(b"\0" * (-f.tell() % ALIGNMENT))
+                table[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": f.tell()}
+                f.write(array.tobytes())
+            header_offset = f.tell()
+            header_bytes = json.dumps({**header, "arrays": table}, separators=(",", ":")).encode("utf-8")
+            f.write(header_bytes)
+            f.seek(0)
+            f.write(MAGIC + np.asarray([FORMAT_VERSION, 0], dtype="<u4").tobytes()
+                    + np.asarray([header_offset, len(header_bytes)], dtype="<u8").tobytes())
+        os.replace(tmp_path, path)
+
+
+def _beats_arrays(beats: List[Dict[str, float]], arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    for field in ("time", "volume", "energy"):
+        arrays[f"beats/{field}"] = np.asarray([beat.get(field, 0.0) for beat in beats], dtype=float)
+    return {field: {"$array": f"beats/{field}"} for field in ("time", "volume", "energy")}
+
+
+def _chords_arrays(chords: List[Dict[str, Any]], arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    labels = sorted({chord["chord"] for chord in chords})
+    basses = sorted({chord["bass"] for chord in chords if chord.get("bass")})
+    arrays["chords/time"] = np.asarray([chord["time"] for chord in chords], dtype=float)
+    arrays["chords/bar_num"] = np.asarray([chord["bar_num"] for chord in chords], dtype=np.int32)
+    arrays["chords/beat_num"] = np.asarray([chord["beat_num"] for chord in chords], dtype=np.int32)
+    arrays["chords/chord"] = np.asarray([labels.index(chord["chord"]) for chord in chords], dtype=np.int16)
+    arrays["chords/bass"] = np.asarray([basses.index(chord["bass"]) if chord.get("bass") else -1 for chord in chords], dtype=np.int16)
+    return {"labels": labels, "basses": basses, **{field: {"$array": f"chords/{field}"} for field in ("time", "bar_num", "beat_num", "chord", "bass")}}
+
+
+def _actions_arrays(actions: List[Dict[str, Any]], arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    fixtures = sorted({action["fixture_id"] for action in actions})
+    names = sorted({action["action"] for action in actions})
+    params = [json.dumps(action.get("parameters", {}), separators=(",", ":")).encode("utf-8") for action in actions]
+
+    def optional(field: str) -> np.ndarray:
+        return np.asarray([np.nan if action.get(field) is None else action[field] for action in actions], dtype=float)
+
+    arrays["actions/start_time"] = np.asarray([action["start_time"] for action in actions], dtype=float)
+    arrays["actions/duration"] = np.asarray([action.get("duration", 0.0) for action in actions], dtype=float)
+    arrays["actions/start_beat"] = optional("start_beat")
+    arrays["actions/duration_beats"] = optional("duration_beats")
+    arrays["actions/fixture"] = np.asarray([fixtures.index(action["fixture_id"]) for action in actions], dtype=np.int32)
+    arrays["actions/action"] = np.asarray([names.index(action["action"]) for action in actions], dtype=np.int32)
+    arrays["actions/parameters"] = np.frombuffer(b"".join(params), dtype=np.uint8)
+    arrays["actions/parameter_offsets"] = np.cumsum([0] + [len(item) for item in params], dtype=np.int64)
+    fields = ("start_time", "duration", "start_beat", "duration_beats", "fixture", "action", "parameters", "parameter_offsets")
+    return {"fixtures": fixtures, "actions": names, **{field: {"$array": f"actions/{field}"} for field in fields}}
+
+
+def decode_chords(part: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Chord entries (as in chords.json) of a bundled chords part."""
+    labels, basses = part["labels"], part["basses"]
+    return [{"bar_num": bar, "beat_num": beat, "time": time, "chord": labels[chord], "bass": basses[bass] if bass >= 0 else None}
+            for time, bar, beat, chord, bass in zip(part["time"].tolist(), part["bar_num"].tolist(), part["beat_num"].tolist(),
+                                                    part["chord"].tolist(), part["bass"].tolist())]
+
+
+def decode_actions(part: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Action entries (as in actions.json) of a bundled actions part."""
+    blob = bytes(part["parameters"])
+    offsets = part["parameter_offsets"].tolist()
+    fixtures, names = part["fixtures"], part["actions"]
+
+    def optional(value: float) -> Optional[float]:
+        return None if value != value else value  # NaN
+
+    return [{
+        "start_time": start_time,
+        "duration": duration,
+        "action": names[action],
+        "fixture_id": fixtures[fixture],
+        "parameters": json.loads(blob[offsets[index]:offsets[index + 1]]),
+        "start_beat": optional(start_beat),
+        "duration_beats": optional(duration_beats),
+    } for index, (start_time, duration, start_beat, duration_beats, fixture, action) in enumerate(zip(
+        part["start_time"].tolist(), part["duration"].tolist(), part["start_beat"].tolist(),
+        part["duration_beats"].tolist(), part["fixture"].tolist(), part["action"].tolist()))]
+
+
+def convert_song(data_folder, song_name: str) -> Path:
+    """Build data/{song}.bundle from the song JSON files."""
+    data_folder = Path(data_folder)
+    header: Dict[str, Any] = {"song": song_name, "parts": {}, "sources": {}}
+    arrays: Dict[str, np.ndarray] = {}
+    encoders = {
+        "meta": lambda data: data,
+        "beats": lambda data: _beats_arrays(data, arrays),
+        "chords": lambda data: _chords_arrays(data, arrays),
+        "analysis": lambda data: _extract_arrays(data, "analysis", arrays),
+        "plan": lambda data: data,
+        "actions": lambda data: _actions_arrays(data, arrays),
+    }
+    for part, suffix in PARTS.items():
+        source = data_folder / f"{song_name}.{suffix}"
+        if not source.exists():
+            continue
+        stamp = _source_stamp(source)
+        with open(source, "r") as f:
+            header["parts"][part] = encoders[part](json.load(f))
+        header["sources"][part] = stamp
+
+    path = SongBundle.path_for(data_folder, song_name)
+    SongBundle.write(path, header, arrays)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the per-song JSON files into a binary song bundle.")
+    parser.add_argument("songs", nargs="*", help="song names (default: every song with a meta.json)")
+    parser.add_argument("--data-folder", type=Path, default=Path(__file__).resolve().parents[3] / "data")
+    args = parser.parse_args()
+
+    songs = args.songs or sorted(path.name[:-len(".meta.json")] for path in args.data_folder.glob("*.meta.json"))
+    for song_name in songs:
+        path = convert_song(args.data_folder, song_name)
+        print(f"📦 {song_name} -> {path} ({path.stat().st_size / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
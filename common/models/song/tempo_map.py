@@ -0,0 +1,99 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class TempoMap:
+    '''
+    Maps between seconds and musical positions using the song beat grid.
+
+    Beat positions are float beat indices: 0.0 is the first beat of the grid,
+    1.5 is halfway between the second and third beat. Between two beats the
+    time is interpolated linearly; before the first and after the last beat
+    the nearest beat interval is extrapolated.
+
+    Bars and beats are 1-based (bar 1, beat 1 is beat index 0.0) and the
+    subdivision is the fraction of a beat (0.5 = the "and" of the beat).
+    Lookups are O(log n) searches over a sorted NumPy array of beat times;
+    beats_to_times / times_to_beats convert whole arrays at once.
+    '''
+
+    def __init__(self, beat_times: List[float], beats_per_bar: int = 4, bpm: Optional[float] = None):
+        self._times = np.sort(np.asarray(beat_times, dtype=float))
+        self._beats_per_bar = beats_per_bar
+        if len(self._times) >= 2:
+            self._first_interval = float(self._times[1] - self._times[0])
+            self._last_interval = float(self._times[-1] - self._times[-2])
+        elif bpm:
+            self._first_interval = self._last_interval = 60.0 / bpm
+            if not len(self._times):
+                self._times = np.zeros(1)
+        else:
+            raise ValueError("TempoMap needs at least two beats or a bpm")
+
+    @property
+    def beats_per_bar(self) -> int:
+        return self._beats_per_bar
+
+    @property
+    def beat_count(self) -> int:
+        return len(self._times)
+
+    @property
+    def times(self) -> np.ndarray:
+        return self._times
+
+    def beat_to_time(self, beat: float) -> float:
+        '''Return the time in seconds of a (fractional) beat index.'''
+        last = len(self._times) - 1
+        if beat <= 0:
+            return float(self._times[0] + beat * self._first_interval)
+        if beat >= last:
+            return float(self._times[last] + (beat - last) * self._last_interval)
+        index = int(beat)
+        fraction = beat - index
+        return float(self._times[index] + fraction * (self._times[index + 1] - self._times[index]))
+
+    def time_to_beat(self, time: float) -> float:
+        '''Return the (fractional) beat index at a time in seconds.'''
+        last = len(self._times) - 1
+        if time <= self._times[0]:
+            return float((time - self._times[0]) / self._first_interval)
+        if time >= self._times[last]:
+            return float(last + (time - self._times[last]) / self._last_interval)
+        index = int(np.searchsorted(self._times, time, side="right")) - 1
+        return float(index + (time - self._times[index]) / (self._times[index + 1] - self._times[index]))
+
+    def beats_to_times(self, beats) -> np.ndarray:
+        '''Vectorized beat_to_time.'''
+        beats = np.asarray(beats, dtype=float)
+        last = len(self._times) - 1
+        times = np.interp(beats, np.arange(last + 1), self._times)
+        times = np.where(beats < 0, self._times[0] + beats * self._first_interval, times)
+        return np.where(beats > last, self._times[last] + (beats - last) * self._last_interval, times)
+
+    def times_to_beats(self, times) -> np.ndarray:
+        '''Vectorized time_to_beat.'''
+        times = np.asarray(times, dtype=float)
+        last = len(self._times) - 1
+        beats = np.interp(times, self._times, np.arange(last + 1)) if last else np.zeros_like(times)
+        beats = np.where(times < self._times[0], (times - self._times[0]) / self._first_interval, beats)
+        return np.where(times > self._times[last], last + (times - self._times[last]) / self._last_interval, beats)
+
+    def position_to_beat(self, bar: int, beat: int = 1, subdivision: float = 0.0) -> float:
+        '''Return the beat index of a bar/beat/subdivision position.'''
+        return (bar - 1) * self._beats_per_bar + (beat - 1) + subdivision
+
+    def beat_to_position(self, beat: float) -> Tuple[int, int, float]:
+        '''Return the (bar, beat, subdivision) position of a beat index.'''
+        whole = int(beat // 1)
+        bar, beat_in_bar = divmod(whole, self._beats_per_bar)
+        return bar + 1, beat_in_bar + 1, round(beat - whole, 6)
+
+    def position_to_time(self, bar: int, beat: int = 1, subdivision: float = 0.0) -> float:
+        '''Return the time in seconds of a bar/beat/subdivision position.'''
+        return self.beat_to_time(self.position_to_beat(bar, beat, subdivision))
+
+    def beats_to_duration(self, start_beat: float, beats: float) -> float:
+        '''Return the length in seconds of `beats` beats starting at `start_beat`.'''
+        return self.beat_to_time(start_beat + beats) - self.beat_to_time(start_beat)
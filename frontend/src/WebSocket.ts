@@ -10,6 +10,112 @@ export interface AppState {
   };
 }
 
+// LLM telemetry (request with sendMessage("get_llm_telemetry", { recent?: number }))
+export interface LlmHistogram {
+  count: number;
+  mean: number | null;
+  min: number | null;
+  max: number | null;
+  p50: number | null;
+  p90: number | null;
+  buckets: { le: number | null; count: number }[];
+}
+
+export interface LlmAgentTelemetry {
+  agent: string;
+  model: string;
+  calls: number;
+  cached: number;
+  prefix_reused: number;
+  errors: number;
+  retries: number;
+  parse_ok: number;
+  parse_failed: number;
+  parse_success_rate: number | null;
+  histograms: {
+    queue_wait: LlmHistogram;
+    ttft: LlmHistogram;
+    duration: LlmHistogram;
+    tokens_per_sec: LlmHistogram;
+    prompt_tokens: LlmHistogram;
+    prompt_eval_time: LlmHistogram;
+    eval_tokens: LlmHistogram;
+  };
+}
+
+export interface LlmCallRecord {
+  agent: string;
+  model: string;
+  timestamp: number;
+  queue_wait: number;
+  ttft: number | null;
+  duration: number;
+  prompt_tokens: number | null;
+  prompt_eval_time: number | null;
+  eval_tokens: number | null;
+  tokens_per_sec: number | null;
+  cached: boolean;
+  prefix_hash: string | null;
+  prefix_reused: boolean;
+  retries: number;
+  error: string | null;
+}
+
+export interface LlmTelemetry {
+  type: "llm_telemetry";
+  data: {
+    agents: LlmAgentTelemetry[];
+    recent_calls: LlmCallRecord[];
+  };
+}
+
+// Plan of the most similar song (request with sendMessage("suggest_plan", { apply?: boolean }))
+export interface SuggestedPlanEntry {
+  id: number;
+  start: number;
+  end: number;
+  name: string;
+  description: string;
+  start_beat: number | null;
+  end_beat: number | null;
+}
+
+export interface PlanSuggestion {
+  type: "plan_suggestion";
+  data: {
+    song: string;
+    source: string;
+    distance: number;
+    plan: SuggestedPlanEntry[];
+    action_count: number;
+    applied: boolean;
+  } | null;
+}
+
+// Song library (request with sendMessage("list_songs", { rescan?: boolean }),
+// switch with sendMessage("load_song", { song }), preload with sendMessage("set_setlist", { songs }))
+export interface CatalogSong {
+  name: string;
+  audio_file: string | null;
+  duration: number | null;
+  bpm: number | null;
+  genre: string | null;
+  sections: number;
+  has_analysis: boolean;
+  has_plan: boolean;
+  has_actions: boolean;
+}
+
+export interface SongCatalog {
+  type: "song_catalog";
+  data: {
+    songs: CatalogSong[];
+    loaded: string[];
+    setlist: string[];
+    memory_used: number;
+  };
+}
+
 export interface WebSocketManager {
   socket: Socket | null;
   isConnected: boolean;
@@ -17,6 +123,9 @@ export interface WebSocketManager {
   disconnect: () => void;
   sendMessage: (action: string, params?: any) => void;
   onAppState: (callback: (state: AppState) => void) => void;
+  onLlmTelemetry: (callback: (telemetry: LlmTelemetry) => void) => void;
+  onPlanSuggestion: (callback: (suggestion: PlanSuggestion) => void) => void;
+  onSongCatalog: (callback: (catalog: SongCatalog) => void) => void;
   onError: (callback: (error: any) => void) => void;
 }
 
@@ -27,6 +136,9 @@ class WebSocketService implements WebSocketManager {
   private maxReconnectAttempts: number = 5;
   private reconnectDelay: number = 1000;
   private appStateCallbacks: ((state: AppState) => void)[] = [];
+  private llmTelemetryCallbacks: ((telemetry: LlmTelemetry) => void)[] = [];
+  private planSuggestionCallbacks: ((suggestion: PlanSuggestion) => void)[] = [];
+  private songCatalogCallbacks: ((catalog: SongCatalog) => void)[] = [];
   private errorCallbacks: ((error: any) => void)[] = [];
 
   constructor() {
@@ -81,6 +193,18 @@ class WebSocketService implements WebSocketManager {
     this.appStateCallbacks.push(callback);
   }
 
+  public onLlmTelemetry(callback: (telemetry: LlmTelemetry) => void): void {
+    this.llmTelemetryCallbacks.push(callback);
+  }
+
+  public onPlanSuggestion(callback: (suggestion: PlanSuggestion) => void): void {
+    this.planSuggestionCallbacks.push(callback);
+  }
+
+  public onSongCatalog(callback: (catalog: SongCatalog) => void): void {
+    this.songCatalogCallbacks.push(callback);
+  }
+
   public onError(callback: (error: any) => void): void {
     this.errorCallbacks.push(callback);
   }
@@ -124,6 +248,39 @@ class WebSocketService implements WebSocketManager {
       this.notifyAppState(data);
     });
 
+    this.socket.on("llm_telemetry", (data: LlmTelemetry) => {
+      console.log("📊 Received llm_telemetry:", data);
+      this.llmTelemetryCallbacks.forEach(callback => {
+        try {
+          callback(data);
+        } catch (error) {
+          console.error("Error in llm telemetry callback:", error);
+        }
+      });
+    });
+
+    this.socket.on("plan_suggestion", (data: PlanSuggestion) => {
+      console.log("🧭 Received plan_suggestion:", data);
+      this.planSuggestionCallbacks.forEach(callback => {
+        try {
+          callback(data);
+        } catch (error) {
+          console.error("Error in plan suggestion callback:", error);
+        }
+      });
+    });
+
+    this.socket.on("song_catalog", (data: SongCatalog) => {
+      console.log("📚 Received song_catalog:", data);
+      this.songCatalogCallbacks.forEach(callback => {
+        try {
+          callback(data);
+        } catch (error) {
+          console.error("Error in song catalog callback:", error);
+        }
+      });
+    });
+
     // Generic message handler for other messages
     this.socket.on("message", (data: any) => {
       console.log("📨 Received message:", data);
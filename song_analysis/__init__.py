@@ -5,6 +5,6 @@ for driving automated lighting design. See `analyze_song.py` for the
 CLI entrypoint and `README.md` for schema details.
 """
 
-from . import audio_io, rhythm, harmony, vocals, energy, structure, events, stems, schema  # noqa: F401
+from . import audio_io, features, pipeline, stage_cache, streaming, rhythm, harmony, vocals, energy, structure, events, stems, schema  # noqa: F401
 
-__all__ = ['audio_io', 'rhythm', 'harmony', 'vocals', 'energy', 'structure', 'events', 'stems', 'schema']
+__all__ = ['audio_io', 'features', 'pipeline', 'stage_cache', 'streaming', 'rhythm', 'harmony', 'vocals', 'energy', 'structure', 'events', 'stems', 'schema']
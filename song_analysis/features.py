@@ -0,0 +1,141 @@
+"""Shared per-audio feature store.
+
+Several extractors need the same transforms of the same signal (STFT
+magnitude, chroma, onset strength envelope, RMS). A `FeatureStore` wraps
+one audio signal and computes each transform once, on first use, at a
+fixed frame layout (n_fft=2048, hop_length=512, the librosa defaults the
+extractors used before). `analyze_song.analyze` creates one store per
+signal (mix, drums stem, vocals stem) and hands it to every extractor;
+extractors called without a store create their own.
+
+With a `cache_folder`, the costly arrays (SHARED_FEATURES) are also saved
+there as .npy files and later stores of the same signal (e.g. in other worker processes of
+the analysis pipeline) memory-map them instead of computing them again.
+
+Every derived feature is computed from the cached spectrogram with the
+same librosa call the extractors made on the raw signal (e.g.
+`spectral_centroid(S=magnitude)` instead of `spectral_centroid(y=y)`),
+so the results do not change.
+"""
+from __future__ import annotations
+import os
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
+
+try:
+    import librosa  # type: ignore
+except ImportError:  # pragma: no cover
+    librosa = None  # type: ignore
+
+N_FFT = 2048
+HOP_LENGTH = 512
+# features written to / read from the cache folder (the rest is cheap to derive in-process)
+SHARED_FEATURES = ('magnitude', 'onset_envelope', 'beat_envelope')
+
+def frame_slice(start: float, end: float, sr: int, hop_length: int = HOP_LENGTH) -> slice:
+    """STFT frames whose center lies in [start, end) seconds."""
+    lower = int(np.ceil(start * sr / hop_length))
+    upper = int(np.ceil(end * sr / hop_length))
+    return slice(max(lower, 0), max(upper, lower))
+
+class FeatureStore:
+    """Lazily computed, cached transforms of one mono audio signal."""
+
+    def __init__(self, y: np.ndarray, sr: int, n_fft: int = N_FFT, hop_length: int = HOP_LENGTH,
+                 cache_folder: Optional[str] = None):
+        self.y = y
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.cache_folder = cache_folder
+        self._cache: Dict[str, np.ndarray] = {}
+        self._rms: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def _cached(self, name: str, compute) -> np.ndarray:
+        if name not in self._cache:
+            shared = self.cache_folder and name in SHARED_FEATURES
+            path = os.path.join(self.cache_folder, f"{name}.npy") if shared else None
+            if path and os.path.exists(path):
+                self._cache[name] = np.load(path, mmap_mode='r')
+            else:
+                self._cache[name] = compute()
+                if path:
+                    # write then rename, other processes may be saving the same array
+                    os.makedirs(self.cache_folder, exist_ok=True)
+                    tmp_path = f"{path[:-4]}.{os.getpid()}.tmp.npy"
+                    np.save(tmp_path, self._cache[name])
+                    os.replace(tmp_path, path)
+        return self._cache[name]
+
+    def compute(self, names: Iterable[str]) -> None:
+        """Compute (or load) the named features now, e.g. to share them through the cache folder."""
+        for name in names:
+            getattr(self, name)
+
+    @property
+    def duration(self) -> float:
+        return len(self.y) / self.sr
+
+    @property
+    def magnitude(self) -> np.ndarray:
+        """|STFT| (1 + n_fft/2 bins x frames)."""
+        return self._cached('magnitude', lambda: np.abs(librosa.stft(self.y, n_fft=self.n_fft, hop_length=self.hop_length)))
+
+    @property
+    def power(self) -> np.ndarray:
+        """|STFT|^2."""
+        return self._cached('power', lambda: self.magnitude ** 2)
+
+    @property
+    def log_power(self) -> np.ndarray:
+        """Power spectrogram in dB relative to its maximum."""
+        return self._cached('log_power', lambda: librosa.power_to_db(self.power, ref=np.max))
+
+    @property
+    def freqs(self) -> np.ndarray:
+        """Center frequency of every STFT bin."""
+        return self._cached('freqs', lambda: librosa.fft_frequencies(sr=self.sr, n_fft=self.n_fft))
+
+    @property
+    def chroma(self) -> np.ndarray:
+        """STFT chromagram (12 x frames)."""
+        return self._cached('chroma', lambda: librosa.feature.chroma_stft(S=self.power, sr=self.sr))
+
+    @property
+    def chroma_cqt(self) -> np.ndarray:
+        """Constant-Q chromagram (12 x CQT frames), used for key estimation."""
+        return self._cached('chroma_cqt', lambda: librosa.feature.chroma_cqt(y=self.y, sr=self.sr, hop_length=self.hop_length))
+
+    @property
+    def log_mel(self) -> np.ndarray:
+        """Log mel spectrogram (dB), the input of the onset envelopes."""
+        return self._cached('log_mel', lambda: librosa.power_to_db(librosa.feature.melspectrogram(S=self.power, sr=self.sr)))
+
+    @property
+    def onset_envelope(self) -> np.ndarray:
+        """Onset strength envelope (spectral flux of the log mel spectrogram, mean over bands), one value per frame."""
+        return self._cached('onset_envelope', lambda: librosa.onset.onset_strength(
+            S=self.log_mel, sr=self.sr, hop_length=self.hop_length))
+
+    @property
+    def beat_envelope(self) -> np.ndarray:
+        """Onset strength envelope with the median over bands, as librosa.beat.beat_track(y=...) builds it."""
+        return self._cached('beat_envelope', lambda: librosa.onset.onset_strength(
+            S=self.log_mel, sr=self.sr, hop_length=self.hop_length, aggregate=np.median))
+
+    def rms(self, frame_length: Optional[int] = None, hop_length: Optional[int] = None) -> np.ndarray:
+        """RMS energy per frame of the waveform, cached per (frame_length, hop_length)."""
+        key = (frame_length or self.n_fft, hop_length or self.hop_length)
+        if key not in self._rms:
+            self._rms[key] = librosa.feature.rms(y=self.y, frame_length=key[0], hop_length=key[1])[0]
+        return self._rms[key]
+
+    def frames(self, start: float, end: float) -> slice:
+        """STFT frames whose center lies in [start, end) seconds."""
+        return frame_slice(start, end, self.sr, self.hop_length)
+
+    def frame_to_time(self, frame: int) -> float:
+        return frame * self.hop_length / self.sr
+
+    def time_to_frame(self, time: float) -> int:
+        return int(np.floor(time * self.sr / self.hop_length))
@@ -1,7 +1,8 @@
 """Pitch & key related extraction."""
 from __future__ import annotations
-from typing import List
+from typing import List, Optional
 import numpy as np
+from song_analysis.features import FeatureStore
 
 try:
     import librosa  # type: ignore
@@ -15,7 +16,7 @@ except ImportError:  # pragma: no cover
     essentia = None  # type: ignore
     es = None  # type: ignore
 
-def estimate_key(y: np.ndarray, sr: int) -> str:
+def estimate_key(y: np.ndarray, sr: int, features: Optional[FeatureStore] = None) -> str:
     """Estimate musical key (rough).
 
     Order: Essentia KeyExtractor -> simple chroma peak -> "Unknown".
@@ -28,18 +29,28 @@ def estimate_key(y: np.ndarray, sr: int) -> str:
         except Exception:  # pragma: no cover
             pass
     if librosa is not None:
-        chroma = librosa.feature.chroma_cqt(y=y, sr=sr)
-        pitch_class = chroma.mean(axis=1).argmax()
-        key_map = ['C','C#','D','D#','E','F','F#','G','G#','A','A#','B']
-        return key_map[pitch_class]
+        return key_from_chroma((features or FeatureStore(y, sr)).chroma_cqt.mean(axis=1))
     return "Unknown"
 
-def extract_pitch_contour(y: np.ndarray, sr: int) -> List[float]:
-    """Crude f0 track via librosa piptrack (peak per frame)."""
-    contour: List[float] = []
+def key_from_chroma(chroma_mean: np.ndarray) -> str:
+    """Key name of the strongest pitch class of a time-averaged chromagram (12 values)."""
+    key_map = ['C','C#','D','D#','E','F','F#','G','G#','A','A#','B']
+    return key_map[int(np.argmax(chroma_mean))]
+
+def extract_pitch_contour(y: np.ndarray, sr: int, features: Optional[FeatureStore] = None) -> List[float]:
+    """Crude f0 track via librosa piptrack (peak per frame) on the shared magnitude spectrogram."""
     if librosa is None:
-        return contour
-    pitches, mags = librosa.piptrack(y=y, sr=sr)
+        return []
+    return pitch_contour_from_magnitude((features or FeatureStore(y, sr)).magnitude, sr)
+
+def pitch_contour_from_magnitude(S: np.ndarray, sr: int) -> List[float]:
+    """Strongest piptrack pitch of every frame of a magnitude spectrogram (unvoiced frames skipped).
+
+    Frames are independent, so the contour of consecutive blocks of frames
+    is the concatenation of their contours.
+    """
+    contour: List[float] = []
+    pitches, mags = librosa.piptrack(S=S, sr=sr)
     for frame in range(pitches.shape[1]):
         idx = mags[:, frame].argmax()
         f0 = pitches[idx, frame]
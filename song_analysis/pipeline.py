@@ -0,0 +1,506 @@
+"""Dependency graph executor for the song analysis.
+
+The analysis is declared as a DAG of stages (`STAGES`): every stage names
+the values it reads (pipeline inputs or the outputs of other stages) and
+produces one output named after itself. `Pipeline.run` starts each stage
+on a process pool as soon as its inputs are ready, so independent stages
+(key, energy, structure, vocals, ...) run concurrently.
+
+Large arrays never go through the pool: the decoded audio and the shared
+mix spectrogram are written to a work folder as .npy files and
+memory-mapped by the stages that need them (see FeatureStore
+`cache_folder`); stage outputs are the small JSON-ready analysis values.
+
+Memory is bounded by `memory_budget` (bytes): every stage declares its
+peak memory as a multiple of the decoded audio size, and a stage is only
+started while the running stages fit in the budget (a stage always runs
+when nothing else does).
+
+With `streaming=True`, `run_analysis` runs STREAMING_STAGES instead: the
+mix and the stems are read block by block (see song_analysis.streaming)
+and reduced to per-frame curves, so memory no longer grows with the track
+length; stage memory is then counted in multiples of one audio block.
+
+With a `StageCache`, every stage output is stored under a key chaining the
+stage name, version, code and parameters with the keys of its inputs (see
+`Pipeline.keys`); stages found in the cache are not run. Stages whose
+output only lives for one run (the decoded audio in the work folder) are
+not cached and only run when a stage that reads them has to.
+
+Every stage is reported (`StageReport`) with its wall time and the peak
+RSS of the worker while running it; on Linux the peak is reset before
+each stage, elsewhere it is the peak of the worker process so far.
+"""
+from __future__ import annotations
+import functools
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+from song_analysis import (audio_io, events as events_module, features as features_module, harmony as harmony_module,
+                           rhythm as rhythm_module, schema, spectral as spectral_module, stems as stems_module,
+                           streaming as streaming_module, energy as energy_module, structure as structure_module,
+                           vocals as vocals_module)
+from song_analysis.audio_io import load_audio
+from song_analysis.energy import compute_energy_curve
+from song_analysis.events import detect_events
+from song_analysis.features import HOP_LENGTH, SHARED_FEATURES, FeatureStore, librosa
+from song_analysis.harmony import estimate_key, key_from_chroma
+from song_analysis.rhythm import beats_from_onset_envelope, classify_onsets, detect_percussive_onsets, estimate_tempo_and_beats
+from song_analysis.spectral import analyze_spectral_emotion, spectral_emotion_from_series
+from song_analysis.stage_cache import StageCache
+from song_analysis.stems import ensure_stems
+from song_analysis.streaming import BLOCK_SECONDS, analyze_file
+from song_analysis.structure import sections_from_energy, segment_structure
+from song_analysis.vocals import active_sections, detect_vocals_activity
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore
+
+@dataclass(frozen=True)
+class Stage:
+    """One step of the analysis.
+
+    Attributes:
+        name: Stage name, also the name of its output.
+        func: Module-level function (it runs in a worker process), called
+            with the inputs as keyword arguments.
+        inputs: Names of the pipeline inputs / stage outputs it reads.
+        memory: Peak memory as a multiple of the decoded audio size.
+        params: Extra keyword arguments of `func` (part of the cache key).
+        version: Bumped by hand to invalidate cached outputs.
+        code: Modules whose source is part of the cache key (the source of
+            `func` always is), so editing an extractor reruns its stages.
+        cache: False when the output is only valid during the run (files in
+            the work folder); such stages only run when a reader has to.
+    """
+    name: str
+    func: Callable[..., Any]
+    inputs: Tuple[str, ...] = ()
+    memory: float = 1.0
+    params: Dict[str, Any] = field(default_factory=dict)
+    version: str = "1"
+    code: Tuple[Any, ...] = ()
+    cache: bool = True
+
+@dataclass
+class StageReport:
+    """Wall time (s) and peak RSS (bytes) of a stage run (zeros when taken from the cache)."""
+    name: str
+    wall_time: float
+    peak_rss: int
+    pid: int
+    cached: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+def _reset_peak_rss() -> None:
+    # Linux: writing 5 to clear_refs resets the peak RSS (VmHWM) of the process
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+def _peak_rss() -> int:
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is not None:
+        return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss) * 1024  # KB on Linux
+    return 0
+
+# libraries whose version can change stage outputs
+ENVIRONMENT = {'numpy': np.__version__, 'librosa': getattr(librosa, '__version__', None)}
+
+@functools.lru_cache(maxsize=None)
+def _source_hash(obj: Any) -> str:
+    try:
+        source = inspect.getsource(obj)
+    except (OSError, TypeError):  # no source available (builtins, interactive code)
+        source = f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', repr(obj))}"
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+def _value_key(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def _run_stage(name: str, func: Callable[..., Any], kwargs: Dict[str, Any]) -> Tuple[Any, StageReport]:
+    _reset_peak_rss()
+    start = time.perf_counter()
+    output = func(**kwargs)
+    return output, StageReport(name, time.perf_counter() - start, _peak_rss(), os.getpid())
+
+class Pipeline:
+    """A DAG of stages, checked on creation and executed by `run`."""
+
+    def __init__(self, stages: Iterable[Stage], inputs: Iterable[str] = ()):
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage: {stage.name}")
+            self.stages[stage.name] = stage
+        self.inputs = set(inputs)
+        for stage in self.stages.values():
+            unknown = [name for name in stage.inputs if name not in self.stages and name not in self.inputs]
+            if unknown:
+                raise ValueError(f"Stage {stage.name} reads unknown values: {unknown}")
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        order: List[str] = []
+        state: Dict[str, int] = {}  # 1 visiting, 2 done
+
+        def visit(name: str, path: List[str]):
+            if state.get(name) == 2 or name not in self.stages:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"Cycle in pipeline: {' -> '.join(path + [name])}")
+            state[name] = 1
+            for dependency in self.stages[name].inputs:
+                visit(dependency, path + [name])
+            state[name] = 2
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+    def keys(self, input_keys: Dict[str, str]) -> Dict[str, str]:
+        """Cache key of every stage, chained from the keys of the pipeline inputs.
+
+        A stage key hashes the stage name, version, params, the source of its
+        code, the library versions and the keys of the values it reads.
+        """
+        keys = dict(input_keys)
+        for name in self.order:
+            stage = self.stages[name]
+            payload = {
+                'stage': name,
+                'version': stage.version,
+                'params': stage.params,
+                'code': [_source_hash(obj) for obj in (stage.func,) + tuple(stage.code)],
+                'environment': ENVIRONMENT,
+                'inputs': {dependency: keys[dependency] for dependency in stage.inputs},
+            }
+            keys[name] = _value_key(payload)
+        return {name: keys[name] for name in self.order}
+
+    def _pending(self, values: Dict[str, Any]) -> List[str]:
+        """Stages to run: the cached stages without a value and the uncached stages they read."""
+        needed = {name for name, stage in self.stages.items() if stage.cache and name not in values}
+        for name in reversed(self.order):
+            if name in needed:
+                needed.update(dependency for dependency in self.stages[name].inputs
+                              if dependency in self.stages and dependency not in values)
+        return [name for name in self.order if name in needed]
+
+    def run(self, inputs: Dict[str, Any], workers: Optional[int] = None, memory_budget: Optional[int] = None,
+            audio_bytes: Callable[[Dict[str, Any]], int] = lambda values: 0, cache: Optional[StageCache] = None,
+            input_keys: Optional[Dict[str, str]] = None) -> Tuple[Dict[str, Any], List[StageReport]]:
+        """Run every stage whose output is not already in `inputs` (or in the cache).
+
+        Args:
+            inputs: Pipeline inputs (and optionally outputs of stages to skip).
+            workers: Worker processes (default: CPU count); 0 runs the stages
+                in this process, in topological order.
+            memory_budget: Bytes the running stages may use together (None: unbounded).
+            audio_bytes: Size of the decoded audio given the values so far
+                (the unit of Stage.memory).
+            cache: Stage output cache; outputs are read from and written to it.
+            input_keys: Cache keys of the pipeline inputs, e.g. content hashes
+                of files (default: a hash of the input value).
+        Returns:
+            (all values by name, stage reports: cache hits first, then runs in completion order)
+        Raises:
+            RuntimeError: If a stage fails (the stages still running are awaited).
+        """
+        values = dict(inputs)
+        missing = sorted(self.inputs - set(values))
+        if missing:
+            raise ValueError(f"Missing pipeline inputs: {missing}")
+        reports: List[StageReport] = []
+        keys: Dict[str, str] = {}
+        if cache is not None:
+            input_keys = input_keys or {}
+            keys = self.keys({name: input_keys[name] if name in input_keys else _value_key(values[name])
+                              for name in self.inputs})
+            for name in self.order:
+                if self.stages[name].cache and name not in values:
+                    found, output = cache.get(keys[name])
+                    if found:
+                        values[name] = output
+                        reports.append(StageReport(name, 0.0, 0, os.getpid(), cached=True))
+        pending = self._pending(values)
+
+        def store(stage: Stage, output: Any):
+            values[stage.name] = output
+            if cache is not None and stage.cache:
+                cache.put(keys[stage.name], output)
+
+        if workers == 0 or not pending:
+            for name in pending:
+                stage = self.stages[name]
+                output, report = self._execute(stage, lambda: _run_stage(name, stage.func, self._kwargs(stage, values)))
+                store(stage, output)
+                reports.append(report)
+            return values, reports
+
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            running: Dict[Future, Tuple[Stage, float]] = {}
+            while pending or running:
+                used = sum(memory for _stage, memory in running.values())
+                for name in [name for name in pending if all(dep in values for dep in self.stages[name].inputs)]:
+                    stage = self.stages[name]
+                    memory = stage.memory * audio_bytes(values)
+                    if running and memory_budget is not None and used + memory > memory_budget:
+                        continue
+                    running[pool.submit(_run_stage, name, stage.func, self._kwargs(stage, values))] = (stage, memory)
+                    pending.remove(name)
+                    used += memory
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, _memory = running.pop(future)
+                    output, report = self._execute(stage, future.result)
+                    store(stage, output)
+                    reports.append(report)
+        return values, reports
+
+    @staticmethod
+    def _kwargs(stage: Stage, values: Dict[str, Any]) -> Dict[str, Any]:
+        return dict({name: values[name] for name in stage.inputs}, **stage.params)
+
+    @staticmethod
+    def _execute(stage: Stage, call: Callable[[], Tuple[Any, StageReport]]) -> Tuple[Any, StageReport]:
+        try:
+            return call()
+        except Exception as e:
+            raise RuntimeError(f"Analysis stage '{stage.name}' failed: {e}") from e
+
+# ---- analysis stages (module level so they can run in worker processes) ----
+
+SAMPLE_RATE = 44100  # load_audio default
+
+def _mix(audio: Dict[str, Any]) -> Tuple[np.ndarray, int, FeatureStore]:
+    y = np.load(audio['path'], mmap_mode='r')
+    return y, audio['sr'], FeatureStore(y, audio['sr'], cache_folder=audio['features'])
+
+def load_stage(mp3_path: str, work_folder: str) -> Dict[str, Any]:
+    y, sr = load_audio(mp3_path)
+    path = os.path.join(work_folder, 'audio.npy')
+    np.save(path, y)
+    return {'path': path, 'sr': sr, 'samples': len(y), 'features': os.path.join(work_folder, 'mix_features')}
+
+def stems_stage(mp3_path: str, stems_folder: str) -> str:
+    ensure_stems(mp3_path, stems_folder)
+    return stems_folder
+
+def mix_features_stage(audio: Dict[str, Any]) -> Dict[str, Any]:
+    if librosa is not None:
+        _mix(audio)[2].compute(SHARED_FEATURES)
+    return audio
+
+def tempo_stage(mix_features: Dict[str, Any]) -> Dict[str, Any]:
+    tempo, beats = estimate_tempo_and_beats(*_mix(mix_features))
+    return {'tempo': tempo, 'beats': beats}
+
+def key_stage(audio: Dict[str, Any]) -> str:
+    return estimate_key(*_mix(audio))
+
+def energy_stage(audio: Dict[str, Any]) -> List[float]:
+    y, sr, features = _mix(audio)
+    return compute_energy_curve(y, sr, features=features)
+
+def structure_stage(audio: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [s.to_dict() for s in segment_structure(*_mix(audio))]
+
+def drums_stage(mix_features: Dict[str, Any], stems: str) -> Dict[str, List[float]]:
+    y, sr, features = _mix(mix_features)
+    return detect_percussive_onsets(y, sr, os.path.join(stems, 'drums.wav'), features)
+
+def vocals_stage(stems: str) -> Dict[str, Any]:
+    active_sections, pitch_contour = detect_vocals_activity(os.path.join(stems, 'vocals.wav'))
+    return {'active_sections': active_sections, 'pitch_contour': pitch_contour}
+
+def events_stage(energy: List[float], tempo: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [e.to_dict() for e in detect_events(energy, tempo['beats'], SAMPLE_RATE)]
+
+def spectral_stage(mix_features: Dict[str, Any], structure: List[Dict[str, Any]]) -> Dict[str, Any]:
+    y, sr, features = _mix(mix_features)
+    return analyze_spectral_emotion(y, sr, structure, features)
+
+STAGES: List[Stage] = [
+    Stage('audio', load_stage, ('mp3_path', 'work_folder'), memory=2, code=(audio_io,), cache=False),
+    Stage('stems', stems_stage, ('mp3_path', 'stems_folder'), memory=8, code=(stems_module,), cache=False),
+    Stage('mix_features', mix_features_stage, ('audio',), memory=8, code=(features_module,), cache=False),
+    Stage('tempo', tempo_stage, ('mix_features',), memory=2, code=(rhythm_module,)),
+    Stage('key', key_stage, ('audio',), memory=4, code=(harmony_module, features_module)),
+    Stage('energy', energy_stage, ('audio',), memory=1.5, code=(energy_module, features_module)),
+    Stage('structure', structure_stage, ('audio',), memory=1.5, code=(structure_module, features_module, schema)),
+    Stage('drums', drums_stage, ('mix_features', 'stems'), memory=8, code=(rhythm_module, audio_io)),
+    Stage('vocals', vocals_stage, ('stems',), memory=8, code=(vocals_module, harmony_module, features_module, audio_io)),
+    Stage('events', events_stage, ('energy', 'tempo'), memory=0, code=(events_module, schema)),
+    Stage('spectral', spectral_stage, ('mix_features', 'structure'), memory=8, code=(spectral_module,)),
+]
+
+PIPELINE_INPUTS = ('mp3_path', 'stems_folder', 'work_folder')
+
+# ---- streaming stages: block-wise passes over the audio files, then light stages on their curves ----
+
+def _rms_layout(window_s: float) -> Tuple[int, int]:
+    hop_length = int(window_s * SAMPLE_RATE / 2)
+    return 2 * hop_length, hop_length
+
+def mix_stream_stage(mp3_path: str, block_seconds: float) -> Dict[str, Any]:
+    return analyze_file(mp3_path, SAMPLE_RATE, block_seconds, spectral=True, onset=True, bands=True, key=True,
+                        rms=[_rms_layout(energy_module.WINDOW_S), _rms_layout(structure_module.WINDOW_S)])
+
+def drums_stream_stage(stems: str, block_seconds: float) -> Optional[np.ndarray]:
+    drums_path = os.path.join(stems, 'drums.wav')
+    if not os.path.exists(drums_path):
+        return None
+    print(f"-- drums: {drums_path}")
+    return analyze_file(drums_path, SAMPLE_RATE, block_seconds, onset=True)['onset_envelope']
+
+def vocals_stream_stage(stems: str, block_seconds: float) -> Optional[Dict[str, Any]]:
+    vocals_path = os.path.join(stems, 'vocals.wav')
+    print(f"-- vocals: {vocals_path}")
+    if not os.path.exists(vocals_path):
+        return None
+    return analyze_file(vocals_path, SAMPLE_RATE, block_seconds, pitch=True,
+                        rms=[(vocals_module.FRAME_LENGTH, vocals_module.HOP_LENGTH)])
+
+def stream_tempo_stage(mix_stream: Dict[str, Any]) -> Dict[str, Any]:
+    tempo, beats = beats_from_onset_envelope(mix_stream['beat_envelope'], mix_stream['sr'])
+    return {'tempo': tempo, 'beats': beats}
+
+def stream_key_stage(mix_stream: Dict[str, Any]) -> str:
+    return key_from_chroma(mix_stream['chroma_cqt'])
+
+def stream_energy_stage(mix_stream: Dict[str, Any]) -> List[float]:
+    return mix_stream['rms'][_rms_layout(energy_module.WINDOW_S)].astype(float).tolist()
+
+def stream_structure_stage(mix_stream: Dict[str, Any]) -> List[Dict[str, Any]]:
+    frame_length, hop_length = _rms_layout(structure_module.WINDOW_S)
+    sections = sections_from_energy(mix_stream['rms'][(frame_length, hop_length)], mix_stream['sr'], hop_length,
+                                    mix_stream['samples'] / mix_stream['sr'])
+    return [s.to_dict() for s in sections]
+
+def stream_drums_stage(mix_stream: Dict[str, Any], drums_stream: Optional[np.ndarray]) -> Dict[str, List[float]]:
+    onset_env = drums_stream if drums_stream is not None else mix_stream['onset_envelope']
+    return classify_onsets(onset_env, mix_stream['kick_energy'], mix_stream['snare_energy'], mix_stream['sr'])
+
+def stream_vocals_stage(vocals_stream: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if vocals_stream is None:
+        return {'active_sections': [], 'pitch_contour': []}
+    rms = vocals_stream['rms'][(vocals_module.FRAME_LENGTH, vocals_module.HOP_LENGTH)]
+    return {'active_sections': active_sections(rms, vocals_stream['sr'], vocals_module.HOP_LENGTH),
+            'pitch_contour': vocals_stream['pitch_contour']}
+
+def stream_spectral_stage(mix_stream: Dict[str, Any], structure: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return spectral_emotion_from_series(mix_stream, mix_stream['sr'], mix_stream['samples'], structure, HOP_LENGTH)
+
+# modules behind the curves of a streaming pass
+_STREAM_CODE = (streaming_module, features_module, rhythm_module, harmony_module)
+
+STREAMING_STAGES: List[Stage] = [
+    Stage('mix_stream', mix_stream_stage, ('mp3_path', 'block_seconds'), memory=12,
+          code=_STREAM_CODE + (energy_module, structure_module)),
+    # Spleeter decodes the whole file itself
+    Stage('stems', stems_stage, ('mp3_path', 'stems_folder'), memory=0, code=(stems_module,), cache=False),
+    Stage('drums_stream', drums_stream_stage, ('stems', 'block_seconds'), memory=8, code=_STREAM_CODE),
+    Stage('vocals_stream', vocals_stream_stage, ('stems', 'block_seconds'), memory=8, code=_STREAM_CODE + (vocals_module,)),
+    Stage('tempo', stream_tempo_stage, ('mix_stream',), memory=0, code=(rhythm_module,)),
+    Stage('key', stream_key_stage, ('mix_stream',), memory=0, code=(harmony_module,)),
+    Stage('energy', stream_energy_stage, ('mix_stream',), memory=0, code=(energy_module,)),
+    Stage('structure', stream_structure_stage, ('mix_stream',), memory=0, code=(structure_module, schema)),
+    Stage('drums', stream_drums_stage, ('mix_stream', 'drums_stream'), memory=0, code=(rhythm_module,)),
+    Stage('vocals', stream_vocals_stage, ('vocals_stream',), memory=0, code=(vocals_module,)),
+    Stage('events', events_stage, ('energy', 'tempo'), memory=0, code=(events_module, schema)),
+    Stage('spectral', stream_spectral_stage, ('mix_stream', 'structure'), memory=0, code=(spectral_module, features_module)),
+]
+
+STREAMING_INPUTS = ('mp3_path', 'stems_folder', 'block_seconds')
+
+def _audio_bytes(values: Dict[str, Any]) -> int:
+    audio = values.get('audio')
+    return audio['samples'] * 4 if audio else 0  # float32 samples
+
+def _stems_key(cache: StageCache, stems_folder: str) -> str:
+    """Content key of the stems the stages read ('-' for a missing stem)."""
+    paths = [os.path.join(stems_folder, name) for name in ('drums.wav', 'vocals.wav')]
+    return ':'.join(cache.file_hash(path) if os.path.exists(path) else '-' for path in paths)
+
+def run_analysis(mp3_path: str, stems_folder: str, workers: Optional[int] = None,
+                 memory_budget: Optional[int] = None, streaming: bool = False,
+                 block_seconds: float = BLOCK_SECONDS,
+                 cache_folder: Optional[str] = None) -> Tuple[Dict[str, Any], List[StageReport]]:
+    """Run the analysis DAG of a song; returns (analysis JSON data, stage reports).
+
+    With `streaming`, the audio is analyzed in blocks of `block_seconds`
+    (memory independent of the track length, see song_analysis.streaming).
+    With `cache_folder`, stage outputs are cached by content (see
+    song_analysis.stage_cache): an unchanged song runs no stage at all.
+    """
+    if streaming:
+        pipeline = Pipeline(STREAMING_STAGES, STREAMING_INPUTS)
+        block_bytes = int(block_seconds * SAMPLE_RATE) * 4
+        audio_bytes: Callable[[Dict[str, Any]], int] = lambda values: block_bytes
+    else:
+        pipeline = Pipeline(STAGES, PIPELINE_INPUTS)
+        audio_bytes = _audio_bytes
+    start = time.perf_counter()
+    cache = StageCache(cache_folder) if cache_folder else None
+    input_keys: Dict[str, str] = {}
+    if cache is not None:
+        input_keys = {'mp3_path': cache.file_hash(mp3_path), 'stems_folder': _stems_key(cache, stems_folder),
+                      'work_folder': '', 'block_seconds': repr(block_seconds)}
+    with tempfile.TemporaryDirectory(prefix='song_analysis_') as work_folder:
+        inputs = {'mp3_path': mp3_path, 'stems_folder': stems_folder, 'work_folder': work_folder,
+                  'block_seconds': block_seconds}
+        values, reports = pipeline.run(inputs, workers=workers, memory_budget=memory_budget, audio_bytes=audio_bytes,
+                                       cache=cache, input_keys=input_keys)
+    if cache is not None:
+        stems_key = _stems_key(cache, stems_folder)
+        if stems_key != input_keys['stems_folder']:
+            # the stems were separated during this run: file the outputs under the key of the stems now on disk
+            previous = pipeline.keys(input_keys)
+            input_keys['stems_folder'] = stems_key
+            for name, key in pipeline.keys(input_keys).items():
+                if key != previous[name] and pipeline.stages[name].cache and name in values:
+                    cache.put(key, values[name])
+    wall_time = time.perf_counter() - start
+    for report in reports:
+        if report.cached:
+            print(f"-- stage {report.name}: cached")
+        else:
+            print(f"-- stage {report.name}: {report.wall_time:.2f}s, peak RSS {report.peak_rss / 2**20:.0f} MB")
+    print(f"-- analysis: {wall_time:.2f}s wall, {sum(r.wall_time for r in reports):.2f}s in stages"
+          f", {sum(r.cached for r in reports)}/{sum(s.cache for s in pipeline.stages.values())} stages cached")
+
+    tempo = values['tempo']['tempo']
+    data: Dict[str, Any] = {
+        'tempo': round(tempo) if tempo else 0,
+        'key': values['key'],
+        'structure': values['structure'],
+        'beats': values['tempo']['beats'],
+        'drums': values['drums'],
+        'vocals': values['vocals'],
+        'energy_curve': values['energy'],
+        'events': values['events'],
+        'spectral_emotion': values['spectral']
+    }
+    return data, reports
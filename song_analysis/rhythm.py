@@ -10,6 +10,7 @@ import os
 import numpy as np
 
 from song_analysis.audio_io import load_audio
+from song_analysis.features import FeatureStore
 
 try:
     import librosa  # type: ignore
@@ -23,15 +24,15 @@ except ImportError:  # pragma: no cover
     essentia = None  # type: ignore
     es = None  # type: ignore
 
-def estimate_tempo_and_beats(y: np.ndarray, sr: int) -> Tuple[float, List[float]]:
+def estimate_tempo_and_beats(y: np.ndarray, sr: int, features: Optional[FeatureStore] = None) -> Tuple[float, List[float]]:
     """Estimate tempo (BPM) and beat timestamps.
 
     Priority: librosa -> Essentia -> fallback (0, []).
+    The beat tracker runs on the shared beat envelope of `features`
+    (median over mel bands, the envelope beat_track(y=...) computes).
     """
     if librosa is not None:
-        tempo, beat_frames = librosa.beat.beat_track(y=y, sr=sr, trim=False)
-        beats = librosa.frames_to_time(beat_frames, sr=sr).tolist()
-        return float(tempo), beats
+        return beats_from_onset_envelope((features or FeatureStore(y, sr)).beat_envelope, sr)
     if es is not None and hasattr(es, 'RhythmExtractor'):
         try:
             rhythm_extractor = es.RhythmExtractor(method='multifeature')  # type: ignore[attr-defined]
@@ -41,12 +42,25 @@ def estimate_tempo_and_beats(y: np.ndarray, sr: int) -> Tuple[float, List[float]
             pass
     return 0.0, []
 
-def detect_percussive_onsets(y: np.ndarray, sr: int, drums_path: Optional[str] = None) -> Dict[str, List[float]]:
+def beats_from_onset_envelope(onset_env: np.ndarray, sr: int) -> Tuple[float, List[float]]:
+    """Tempo (BPM) and beat timestamps from an onset strength envelope (librosa beat tracker).
+
+    Pass the median-aggregated envelope (FeatureStore.beat_envelope) to get
+    the beats of librosa.beat.beat_track(y=...).
+    """
+    tempo, beat_frames = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr, trim=False)
+    beats = librosa.frames_to_time(beat_frames, sr=sr).tolist()
+    return float(tempo), beats
+
+def detect_percussive_onsets(y: np.ndarray, sr: int, drums_path: Optional[str] = None,
+                             features: Optional[FeatureStore] = None) -> Dict[str, List[float]]:
     """Heuristic kick/snare onset classifier.
 
     Strategy:
         1. Use global onset detection (librosa onset strength) for candidate times.
         2. Classify each onset via low vs mid band energy ratio.
+    The band energies come from the mix spectrogram of `features`; the
+    onset envelope from the drums stem when available, else from the mix.
     Returns:
         { 'kick_onsets': [...], 'snare_onsets': [...] }
     Limitations:
@@ -56,6 +70,7 @@ def detect_percussive_onsets(y: np.ndarray, sr: int, drums_path: Optional[str] =
     if librosa is None:
         return results
     
+    features = features or FeatureStore(y, sr)
     # Use drums stem if available, otherwise use full mix
     if drums_path and os.path.exists(drums_path):
         print(f"-- drums: {drums_path}")
@@ -63,19 +78,33 @@ def detect_percussive_onsets(y: np.ndarray, sr: int, drums_path: Optional[str] =
         # Resample if necessary
         if drums_sr != sr:
             drums_y = librosa.resample(drums_y, orig_sr=drums_sr, target_sr=sr)
-        analysis_y = drums_y
+        onset_env = FeatureStore(drums_y, sr).onset_envelope
     else:
-        analysis_y = y
+        onset_env = features.onset_envelope
     
-    onset_env = librosa.onset.onset_strength(y=analysis_y, sr=sr)
-    onset_frames = librosa.onset.onset_detect(onset_envelope=onset_env, sr=sr, backtrack=True, pre_max=3, post_max=3, pre_avg=3, post_avg=5, delta=0.1, wait=5)
-    onsets = librosa.frames_to_time(onset_frames, sr=sr)
-    S = np.abs(librosa.stft(y))
-    freqs = librosa.fft_frequencies(sr=sr)
+    kick_energy, snare_energy = band_energies(features.magnitude, features.freqs)
+    return classify_onsets(onset_env, kick_energy, snare_energy, sr)
+
+def band_energies(S: np.ndarray, freqs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean magnitude per frame of the kick and snare bands of a magnitude spectrogram."""
     kick_band = (freqs >= 60) & (freqs <= 100)  # Narrower kick band
     snare_band = (freqs >= 150) & (freqs <= 4000)  # Broader snare band
-    kick_energy = S[kick_band].mean(axis=0)
-    snare_energy = S[snare_band].mean(axis=0)
+    return S[kick_band].mean(axis=0), S[snare_band].mean(axis=0)
+
+def classify_onsets(onset_env: np.ndarray, kick_energy: np.ndarray, snare_energy: np.ndarray,
+                    sr: int) -> Dict[str, List[float]]:
+    """Detect onsets in `onset_env` and classify them as kick or snare.
+
+    Args:
+        onset_env: Onset strength envelope (one value per STFT frame).
+        kick_energy, snare_energy: Band energies per frame (see band_energies).
+        sr: Sample rate.
+    Returns:
+        { 'kick_onsets': [...], 'snare_onsets': [...] }
+    """
+    results = {"kick_onsets": [], "snare_onsets": []}
+    onset_frames = librosa.onset.onset_detect(onset_envelope=onset_env, sr=sr, backtrack=True, pre_max=3, post_max=3, pre_avg=3, post_avg=5, delta=0.1, wait=5)
+    onsets = librosa.frames_to_time(onset_frames, sr=sr)
     for t in onsets:
         frame = librosa.time_to_frames([t], sr=sr)[0]
         ke = kick_energy[frame] if frame < len(kick_energy) else 0
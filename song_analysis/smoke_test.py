@@ -42,20 +42,22 @@ def _test_synthetic() -> Dict[str, Any]:
     from song_analysis.events import detect_events
     from song_analysis.vocals import detect_vocals_activity
     from song_analysis.audio_io import load_audio
+    from song_analysis.features import FeatureStore
 
     sr = 44100
     y = _synthetic_wave(sr=sr)
+    features = FeatureStore(y, sr)
 
     # Rhythm
-    tempo, beats = estimate_tempo_and_beats(y, sr)
-    drums = detect_percussive_onsets(y, sr)
+    tempo, beats = estimate_tempo_and_beats(y, sr, features)
+    drums = detect_percussive_onsets(y, sr, features=features)
 
     # Energy & structure
-    energy_curve = compute_energy_curve(y, sr)
-    sections = segment_structure(y, sr)
+    energy_curve = compute_energy_curve(y, sr, features=features)
+    sections = segment_structure(y, sr, features)
 
     # Key (heuristic) – may be Unknown in synthetic case
-    key = estimate_key(y, sr)
+    key = estimate_key(y, sr, features)
 
     # Events
     events = detect_events(energy_curve, beats)
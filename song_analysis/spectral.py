@@ -2,15 +2,19 @@
 from __future__ import annotations
 from typing import List, Dict, Tuple, Any, Optional
 import numpy as np
+from song_analysis.features import HOP_LENGTH, FeatureStore, frame_slice
 
 try:
     import librosa  # type: ignore
 except ImportError:  # pragma: no cover
     librosa = None  # type: ignore
 
-def compute_spectral_features(y: np.ndarray, sr: int) -> Dict[str, List[float]]:
+def compute_spectral_features(y: np.ndarray, sr: int, features: Optional[FeatureStore] = None,
+                              frames: slice = slice(None)) -> Dict[str, List[float]]:
     """Compute spectral features for lighting control.
 
+    All features come from the shared spectrogram of `features`; `frames`
+    restricts them to a range of STFT frames (see FeatureStore.frames).
     Returns:
         {
             'spectral_centroid': [...],  # Brightness indicator
@@ -18,39 +22,63 @@ def compute_spectral_features(y: np.ndarray, sr: int) -> Dict[str, List[float]]:
             'chroma_features': [...]     # Harmonic content
         }
     """
-    features = {
+    result = {
         'spectral_centroid': [],
         'spectral_flux': [],
         'chroma_features': []
     }
 
     if librosa is None:
-        return features
+        return result
 
-    # Compute spectral features with appropriate windowing
-    frame_length = 2048
-    hop_length = 512
+    store = features or FeatureStore(y, sr)
 
     # Spectral centroid (brightness)
-    centroid = librosa.feature.spectral_centroid(y=y, sr=sr, n_fft=frame_length, hop_length=hop_length)[0]
-    features['spectral_centroid'] = centroid.tolist()
+    centroid = librosa.feature.spectral_centroid(S=store.magnitude[:, frames], sr=sr)[0]
+    result['spectral_centroid'] = centroid.tolist()
 
     # Spectral flux (texture changes) - compute manually
-    S = np.abs(librosa.stft(y, n_fft=frame_length, hop_length=hop_length))
-    S_log = librosa.power_to_db(S**2, ref=np.max)
+    S_log = store.log_power[:, frames]
     flux = np.sqrt(np.sum(np.diff(S_log, axis=1)**2, axis=0))
-    features['spectral_flux'] = flux.tolist()
+    result['spectral_flux'] = flux.tolist()
 
     # Chroma features (harmonic content)
-    chroma = librosa.feature.chroma_stft(y=y, sr=sr, n_fft=frame_length, hop_length=hop_length)
+    chroma = store.chroma[:, frames]
     # Average chroma across all bins for a single time series
-    features['chroma_features'] = chroma.mean(axis=0).tolist()
+    result['chroma_features'] = chroma.mean(axis=0).tolist()
+
+    return result
 
-    return features
+def spectral_series(features: FeatureStore) -> Dict[str, np.ndarray]:
+    """Whole-song spectral curves of `features`, sliced by `slice_spectral_features`.
 
-def classify_mood_emotion(y: np.ndarray, sr: int) -> Dict[str, Any]:
+    Returns:
+        Centroid and mean chroma per frame; flux per pair of consecutive
+        frames (flux[i] is the change from frame i to frame i + 1).
+    """
+    return {
+        'spectral_centroid': librosa.feature.spectral_centroid(S=features.magnitude, sr=features.sr)[0],
+        'spectral_flux': np.sqrt(np.sum(np.diff(features.log_power, axis=1)**2, axis=0)),
+        'chroma_features': features.chroma.mean(axis=0)
+    }
+
+def slice_spectral_features(series: Dict[str, np.ndarray], frames: slice = slice(None)) -> Dict[str, List[float]]:
+    """Spectral features of a range of frames, cut from the whole-song `series`.
+
+    Same values as `compute_spectral_features` with the same `frames`.
+    """
+    start, stop, _step = frames.indices(len(series['spectral_centroid']))
+    return {
+        'spectral_centroid': series['spectral_centroid'][start:stop].tolist(),
+        'spectral_flux': series['spectral_flux'][start:max(stop - 1, start)].tolist(),
+        'chroma_features': series['chroma_features'][start:stop].tolist()
+    }
+
+def classify_mood_emotion(y: np.ndarray, sr: int, spectral_features: Optional[Dict[str, List[float]]] = None) -> Dict[str, Any]:
     """Classify mood and emotion using spectral analysis.
 
+    Pass the already computed `spectral_features` of the audio to avoid
+    computing them again.
     Returns:
         {
             'mood': str,           # Primary mood
@@ -72,7 +100,8 @@ def classify_mood_emotion(y: np.ndarray, sr: int) -> Dict[str, Any]:
 
     try:
         # Use spectral analysis for mood estimation
-        spectral_features = compute_spectral_features(y, sr)
+        if spectral_features is None:
+            spectral_features = compute_spectral_features(y, sr)
         if spectral_features['spectral_centroid']:
             avg_centroid = np.mean(spectral_features['spectral_centroid'])
             avg_flux = np.mean(spectral_features['spectral_flux']) if spectral_features['spectral_flux'] else 0
@@ -132,13 +161,16 @@ def classify_mood_emotion(y: np.ndarray, sr: int) -> Dict[str, Any]:
 
     return result
 
-def analyze_spectral_emotion(y: np.ndarray, sr: int, sections: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+def analyze_spectral_emotion(y: np.ndarray, sr: int, sections: Optional[List[Dict[str, Any]]] = None,
+                             features: Optional[FeatureStore] = None) -> Dict[str, Any]:
     """Complete spectral and emotional analysis.
 
     Args:
         y: Audio signal
         sr: Sample rate
         sections: Optional list of song sections with start/end times
+        features: Shared feature store of `y`; section features are the
+            frames of the song spectrogram within each section
 
     Returns:
         {
@@ -147,8 +179,30 @@ def analyze_spectral_emotion(y: np.ndarray, sr: int, sections: Optional[List[Dic
             'section_moods': [...]  # Only if sections provided
         }
     """
-    spectral_features = compute_spectral_features(y, sr)
-    mood_analysis = classify_mood_emotion(y, sr)
+    features = features or FeatureStore(y, sr)
+    if librosa is None:
+        series = {name: np.empty(0) for name in ('spectral_centroid', 'spectral_flux', 'chroma_features')}
+    else:
+        series = spectral_series(features)
+    return spectral_emotion_from_series(series, sr, len(y), sections, features.hop_length)
+
+def spectral_emotion_from_series(series: Dict[str, np.ndarray], sr: int, samples: int,
+                                 sections: Optional[List[Dict[str, Any]]] = None,
+                                 hop_length: int = HOP_LENGTH) -> Dict[str, Any]:
+    """Spectral and emotional analysis from whole-song spectral curves.
+
+    Args:
+        series: Curves of the song (see spectral_series)
+        sr: Sample rate
+        samples: Length of the audio in samples
+        sections: Optional list of song sections with start/end times
+        hop_length: STFT hop of the curves
+
+    Returns:
+        Same as analyze_spectral_emotion
+    """
+    spectral_features = slice_spectral_features(series)
+    mood_analysis = classify_mood_emotion(None, sr, spectral_features)
     
     result = {
         'spectral_features': spectral_features,
@@ -166,13 +220,13 @@ def analyze_spectral_emotion(y: np.ndarray, sr: int, sections: Optional[List[Dic
             start_sample = int(start_time * sr)
             end_sample = int(end_time * sr)
             
-            # Extract section audio
-            if start_sample < len(y) and end_sample <= len(y):
-                section_audio = y[start_sample:end_sample]
+            # Extract section frames
+            if start_sample < samples and end_sample <= samples:
+                frames = frame_slice(start_time, end_time, sr, hop_length)
                 
                 # Analyze this section
-                section_spectral = compute_spectral_features(section_audio, sr)
-                section_mood = classify_mood_emotion(section_audio, sr)
+                section_spectral = slice_spectral_features(series, frames)
+                section_mood = classify_mood_emotion(None, sr, section_spectral)
                 
                 section_analysis = {
                     'section': section['section'],
@@ -0,0 +1,94 @@
+"""Content-addressed on-disk cache of analysis stage outputs.
+
+A stage output is fully determined by the stage (name, version, code,
+parameters) and by its inputs, so it is stored under a hash of those
+(see `Pipeline.keys`), in "{cache_folder}/analysis/{key}.pkl". Input keys
+are content hashes of the audio files; the key of every other stage
+chains the keys of the stages it reads, so changing one extractor only
+changes the keys of its stage and of the stages downstream of it.
+
+Hashing a file reads all of it, so `file_hash` remembers the hash of every
+file by (size, mtime) in "{cache_folder}/analysis/files.json": checking an
+unchanged song costs a stat.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+class StageCache:
+    """Stage outputs by stage key, plus remembered content hashes of the input files."""
+
+    def __init__(self, cache_folder: str):
+        self._folder = Path(cache_folder) / "analysis"
+        self._files: Optional[Dict[str, Any]] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_file(self, key: str) -> Path:
+        return self._folder / f"{key}.pkl"
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return (True, output) for a cached stage output, (False, None) on a miss."""
+        try:
+            with open(self._entry_file(key), "rb") as f:
+                output = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, output
+
+    def put(self, key: str, output: Any) -> None:
+        """Store a stage output (written to a temporary file, then renamed)."""
+        os.makedirs(self._folder, exist_ok=True)
+        tmp_file = self._entry_file(key).with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, "wb") as f:
+            pickle.dump(output, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, self._entry_file(key))
+
+    def file_hash(self, path: str) -> str:
+        """SHA-256 of a file's content, recomputed only when its size or mtime changed."""
+        stat = os.stat(path)
+        path = os.path.abspath(path)
+        if self._files is None:
+            try:
+                with open(self._folder / "files.json", "r") as f:
+                    self._files = json.load(f)
+            except (OSError, ValueError):
+                self._files = {}
+        known = self._files.get(path)
+        if known and known["size"] == stat.st_size and known["mtime"] == stat.st_mtime_ns:
+            return known["sha256"]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        self._files[path] = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+        os.makedirs(self._folder, exist_ok=True)
+        tmp_file = self._folder / f"files.{os.getpid()}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(self._files, f)
+        os.replace(tmp_file, self._folder / "files.json")
+        return digest.hexdigest()
+
+    def clear(self) -> None:
+        """Remove all cached stage outputs (the file hashes are kept)."""
+        if not self._folder.exists():
+            return
+        for entry_file in self._folder.glob("*.pkl"):
+            entry_file.unlink(missing_ok=True)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size of the cache."""
+        files = list(self._folder.glob("*.pkl")) if self._folder.exists() else []
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(files),
+            "bytes": sum(f.stat().st_size for f in files),
+        }
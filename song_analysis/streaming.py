@@ -0,0 +1,247 @@
+"""Block-wise (streaming) feature extraction for long audio.
+
+`load_audio` decodes a whole file and the FeatureStore keeps whole-song
+spectrograms, so memory grows with the track length (an hour-long DJ mix
+is ~635 MB of samples and several GB of spectrogram). The streaming mode
+reads the file in blocks with `soundfile` and reduces every block to the
+small per-frame curves the extractors actually use (onset envelope,
+spectral centroid/flux/chroma, kick/snare band energies, RMS curves,
+pitch), so peak memory depends on the block size only.
+
+Frames are cut from the stream exactly as librosa's centered framing
+(n_fft // 2 zeros before the first sample and after the last one): each
+framer keeps the last `frame_length - hop_length` samples of a block
+(the overlap) and prepends them to the next one. Per-frame features are
+therefore the same as the whole-song computation, within float
+tolerance, with these approximations:
+
+- dB floors (`top_db=80` below the maximum) use the running maximum of
+  the stream instead of the maximum of the whole song, which only
+  changes bins more than 80 dB below the loudest one;
+- the chroma tuning is estimated on the first block;
+- the CQT chroma of the key estimate is averaged over blocks;
+- resampling (files not at `sr`) uses a streaming resampler (soxr) when
+  available, else resamples every block on its own.
+
+Beat tracking, onset picking and segmentation then run on the per-frame
+curves (a few floats per 11.6 ms frame) with the regular extractor
+helpers.
+"""
+from __future__ import annotations
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+
+from song_analysis.features import HOP_LENGTH, N_FFT
+from song_analysis.harmony import pitch_contour_from_magnitude
+from song_analysis.rhythm import band_energies
+
+try:
+    import librosa  # type: ignore
+except ImportError:  # pragma: no cover
+    librosa = None  # type: ignore
+
+try:
+    import soundfile as sf  # type: ignore
+except ImportError:  # pragma: no cover
+    sf = None  # type: ignore
+
+try:
+    import soxr  # type: ignore
+except ImportError:  # pragma: no cover
+    soxr = None  # type: ignore
+
+BLOCK_SECONDS = 30.0
+AMIN = 1e-10  # power floor of librosa.power_to_db
+TOP_DB = 80.0
+
+def read_blocks(path: str, sr: int = 44100, block_seconds: float = BLOCK_SECONDS) -> Iterator[np.ndarray]:
+    """Read an audio file as consecutive mono float32 blocks at `sr`.
+
+    Args:
+        path: Path to audio file.
+        sr: Sample rate of the blocks.
+        block_seconds: Block duration (in the file's sample rate).
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        RuntimeError: If soundfile is not installed.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    if sf is None:
+        raise RuntimeError("Need soundfile installed to stream audio")
+    with sf.SoundFile(path) as f:
+        native_sr = f.samplerate
+        resampler = None
+        if native_sr != sr and soxr is not None:
+            resampler = soxr.ResampleStream(native_sr, sr, 1, dtype='float32', quality='HQ')
+        blocks = f.blocks(blocksize=max(int(block_seconds * native_sr), 1), dtype='float32', always_2d=True)
+        for block in blocks:
+            y = block.mean(axis=1)
+            if resampler is not None:
+                y = resampler.resample_chunk(y)
+            elif native_sr != sr:
+                y = librosa.resample(y, orig_sr=native_sr, target_sr=sr)
+            if len(y):
+                yield y
+        if resampler is not None:
+            tail = resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+            if len(tail):
+                yield tail
+
+class _Framer:
+    """Centered frames (as librosa center=True, zero padded) of a signal pushed block by block."""
+
+    def __init__(self, frame_length: int, hop_length: int):
+        self.frame_length = frame_length
+        self.hop_length = hop_length
+        self._buffer = np.zeros(frame_length // 2, dtype=np.float32)
+
+    def push(self, block: np.ndarray) -> np.ndarray:
+        """Frames (frames x frame_length, a view) completed by `block`."""
+        buffer = np.concatenate([self._buffer, block.astype(np.float32, copy=False)])
+        count = 0 if len(buffer) < self.frame_length else 1 + (len(buffer) - self.frame_length) // self.hop_length
+        self._buffer = buffer[count * self.hop_length:]
+        if not count:
+            return np.empty((0, self.frame_length), dtype=np.float32)
+        windows = np.lib.stride_tricks.sliding_window_view(buffer, self.frame_length)
+        return windows[:(count - 1) * self.hop_length + 1:self.hop_length]
+
+    def flush(self) -> np.ndarray:
+        """The last frames, padded with frame_length // 2 zeros."""
+        return self.push(np.zeros(self.frame_length // 2, dtype=np.float32))
+
+class StreamAnalyzer:
+    """Per-frame features of one signal, computed block by block.
+
+    Push the blocks of the signal in order, then call `finish()` for the
+    curves. Only the requested features are computed:
+        spectral: spectral centroid, flux and mean chroma (see spectral_series)
+        onset: onset strength envelopes, mean and median over mel bands
+            (as FeatureStore.onset_envelope and FeatureStore.beat_envelope)
+        bands: kick / snare band energies (see rhythm.band_energies)
+        pitch: piptrack pitch contour
+        key: CQT chroma averaged over the signal
+        rms: RMS curves for these (frame_length, hop_length) layouts
+    """
+
+    def __init__(self, sr: int, spectral: bool = False, onset: bool = False, bands: bool = False,
+                 pitch: bool = False, key: bool = False, rms: Iterable[Tuple[int, int]] = (),
+                 n_fft: int = N_FFT, hop_length: int = HOP_LENGTH):
+        if librosa is None:
+            raise RuntimeError("Need librosa installed to analyze audio")
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.spectral, self.onset, self.bands, self.pitch, self.key = spectral, onset, bands, pitch, key
+        self.samples = 0
+        self._stft = _Framer(n_fft, hop_length) if spectral or onset or bands or pitch else None
+        # periodic Hann window, as librosa.stft(window='hann')
+        self._window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n_fft) / n_fft)).astype(np.float32)
+        self._freqs = np.fft.rfftfreq(n_fft, 1.0 / sr)
+        self._frames = 0
+        self._max_power = AMIN
+        self._max_mel_db = -np.inf
+        self._previous_db: Optional[np.ndarray] = None
+        self._previous_mel_db: Optional[np.ndarray] = None
+        self._tuning: Optional[float] = None
+        self._mel_basis = librosa.filters.mel(sr=sr, n_fft=n_fft) if onset else None
+        self._chroma_sum = np.zeros(12)
+        self._chroma_frames = 0
+        self._rms = {tuple(layout): _Framer(*layout) for layout in rms}
+        self._rms_curves: Dict[Tuple[int, int], List[np.ndarray]] = {layout: [] for layout in self._rms}
+        self._curves: Dict[str, List[np.ndarray]] = {}
+        self._pitch_contour: List[float] = []
+
+    def _append(self, name: str, values: np.ndarray):
+        self._curves.setdefault(name, []).append(np.asarray(values, dtype=np.float32))
+
+    def push(self, block: np.ndarray):
+        """Analyze the next block of the signal."""
+        self.samples += len(block)
+        if self._stft is not None:
+            self._spectrum(self._stft.push(block))
+        for layout, framer in self._rms.items():
+            self._append_rms(layout, framer.push(block))
+        if self.key and len(block) >= self.sr:  # the CQT needs ~1s of signal
+            chroma = librosa.feature.chroma_cqt(y=block, sr=self.sr, hop_length=self.hop_length)
+            self._chroma_sum += chroma.sum(axis=1)
+            self._chroma_frames += chroma.shape[1]
+
+    def _append_rms(self, layout: Tuple[int, int], frames: np.ndarray):
+        if len(frames):
+            self._rms_curves[layout].append(np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1)))
+
+    def _spectrum(self, frames: np.ndarray):
+        if not len(frames):
+            return
+        self._frames += len(frames)
+        S = np.abs(np.fft.rfft(frames * self._window, axis=1)).T.astype(np.float32)
+        if self.bands:
+            kick, snare = band_energies(S, self._freqs)
+            self._append('kick_energy', kick)
+            self._append('snare_energy', snare)
+        if self.pitch:
+            self._pitch_contour.extend(pitch_contour_from_magnitude(S, self.sr))
+        if not (self.spectral or self.onset):
+            return
+        power = S ** 2
+        if self.spectral:
+            self._append('spectral_centroid', librosa.feature.spectral_centroid(S=S, sr=self.sr)[0])
+            if self._tuning is None:
+                self._tuning = float(librosa.estimate_tuning(S=power, sr=self.sr, bins_per_octave=12))
+            chroma = librosa.feature.chroma_stft(S=power, sr=self.sr, tuning=self._tuning)
+            self._append('chroma_features', chroma.mean(axis=0))
+            # flux of the dB spectrogram; the reference level cancels out in the difference
+            self._max_power = max(self._max_power, float(power.max()))
+            db = 10.0 * np.log10(np.maximum(power, AMIN))
+            db = np.maximum(db, 10.0 * np.log10(self._max_power) - TOP_DB)
+            self._append('spectral_flux', np.sqrt(np.sum(np.diff(self._with_previous(db, '_previous_db'), axis=1) ** 2, axis=0)))
+        if self.onset:
+            mel_db = librosa.power_to_db(self._mel_basis @ power, top_db=None)
+            self._max_mel_db = max(self._max_mel_db, float(mel_db.max()))
+            mel_db = np.maximum(mel_db, self._max_mel_db - TOP_DB)
+            rise = np.maximum(0.0, np.diff(self._with_previous(mel_db, '_previous_mel_db'), axis=1))
+            self._append('onset_envelope', rise.mean(axis=0))
+            self._append('beat_envelope', np.median(rise, axis=0))
+
+    def _with_previous(self, spectrogram: np.ndarray, attribute: str) -> np.ndarray:
+        """`spectrogram` preceded by the last frame of the previous block (for frame differences)."""
+        previous = getattr(self, attribute)
+        setattr(self, attribute, spectrogram[:, -1:])
+        return spectrogram if previous is None else np.hstack([previous, spectrogram])
+
+    def finish(self) -> Dict[str, Any]:
+        """Flush the framers and return the curves.
+
+        Returns:
+            {'sr', 'samples', 'frames' (STFT frames), the curves of the
+             requested features by name, 'rms': {(frame_length, hop_length): curve}}
+        """
+        if self._stft is not None:
+            self._spectrum(self._stft.flush())
+        for layout, framer in self._rms.items():
+            self._append_rms(layout, framer.flush())
+        result: Dict[str, Any] = {'sr': self.sr, 'samples': self.samples, 'frames': self._frames}
+        for name, parts in self._curves.items():
+            result[name] = np.concatenate(parts)
+        result['rms'] = {layout: np.concatenate(parts) if parts else np.empty(0, dtype=np.float32)
+                         for layout, parts in self._rms_curves.items()}
+        if self.onset:
+            # onset_strength(center=True) delays the envelope by lag + n_fft // (2 * hop) frames
+            delay = 1 + self.n_fft // (2 * self.hop_length)
+            for name in ('onset_envelope', 'beat_envelope'):
+                envelope = result.get(name, np.empty(0, dtype=np.float32))
+                result[name] = np.concatenate([np.zeros(delay, dtype=np.float32), envelope])[:self._frames]
+        if self.pitch:
+            result['pitch_contour'] = self._pitch_contour
+        if self.key:
+            result['chroma_cqt'] = self._chroma_sum / max(self._chroma_frames, 1)
+        return result
+
+def analyze_file(path: str, sr: int = 44100, block_seconds: float = BLOCK_SECONDS, **features) -> Dict[str, Any]:
+    """Stream an audio file through a StreamAnalyzer (keyword arguments select the features)."""
+    analyzer = StreamAnalyzer(sr, **features)
+    for block in read_blocks(path, sr, block_seconds):
+        analyzer.push(block)
+    return analyzer.finish()
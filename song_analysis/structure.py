@@ -1,7 +1,8 @@
 """Section segmentation heuristics."""
 from __future__ import annotations
-from typing import List
+from typing import List, Optional
 import numpy as np
+from song_analysis.features import FeatureStore
 from song_analysis.schema import SectionEntry
 
 try:
@@ -9,32 +10,45 @@ try:
 except ImportError:  # pragma: no cover
     librosa = None  # type: ignore
 
-def segment_structure(y: np.ndarray, sr: int) -> List[SectionEntry]:
+# window of the RMS curve the boundaries are found on (50% hop)
+WINDOW_S = 0.2
+
+def segment_structure(y: np.ndarray, sr: int, features: Optional[FeatureStore] = None) -> List[SectionEntry]:
     """Generate coarse section boundaries.
 
     Current approach:
         1. Attempt feature extraction & agglomerative boundary guess (if available).
         2. Fallback: even division into 6 parts.
     """
-    sections: List[SectionEntry] = []
     duration = len(y) / sr
+    hop_length = int(WINDOW_S * sr / 2)
+    energy = None
     if librosa is not None:
         try:
-            y_harm, _y_perc = librosa.effects.hpss(y)
             # Compute energy curve
-            hop_length = int(0.2 * sr / 2)
-            energy = librosa.feature.rms(y=y, frame_length=2*hop_length, hop_length=hop_length)[0]
-            # If agglomerative segmentation present, attempt it; else fallback.
-            if hasattr(librosa.segment, 'agglomerative'):
-                # Use energy curve for segmentation; target ~8 segments.
-                boundaries = librosa.segment.agglomerative(energy.reshape(1, -1), k=8)
-                boundary_times = librosa.frames_to_time(boundaries, sr=sr, hop_length=hop_length)
-            else:
-                raise RuntimeError('agglomerative not available')
-        except Exception:  # fallback evenly spaced
-            step = duration / 8
-            boundary_times = np.array([i * step for i in range(9)])
-    else:
+            energy = (features or FeatureStore(y, sr)).rms(frame_length=2*hop_length, hop_length=hop_length)
+        except Exception:
+            energy = None
+    return sections_from_energy(energy, sr, hop_length, duration)
+
+def sections_from_energy(energy: Optional[np.ndarray], sr: int, hop_length: int, duration: float) -> List[SectionEntry]:
+    """Section boundaries from an RMS energy curve (hop of `hop_length` samples).
+
+    Falls back to an even division when there is no curve or the
+    agglomerative segmentation fails.
+    """
+    sections: List[SectionEntry] = []
+    try:
+        if energy is None:
+            raise RuntimeError('no energy curve')
+        # If agglomerative segmentation present, attempt it; else fallback.
+        if hasattr(librosa.segment, 'agglomerative'):
+            # Use energy curve for segmentation; target ~8 segments.
+            boundaries = librosa.segment.agglomerative(energy.reshape(1, -1), k=8)
+            boundary_times = librosa.frames_to_time(boundaries, sr=sr, hop_length=hop_length)
+        else:
+            raise RuntimeError('agglomerative not available')
+    except Exception:  # fallback evenly spaced
         step = duration / 8
         boundary_times = np.array([i * step for i in range(9)])
     labels = ["intro","verse","verse","verse","instrumental","chorus","bridge","outro"]
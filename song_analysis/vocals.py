@@ -5,6 +5,7 @@ import os
 import numpy as np
 
 from song_analysis.audio_io import load_audio
+from song_analysis.features import FeatureStore
 from song_analysis.harmony import extract_pitch_contour
 
 try:
@@ -12,6 +13,10 @@ try:
 except ImportError:  # pragma: no cover
     librosa = None  # type: ignore
 
+# RMS frame layout of the vocals stem
+FRAME_LENGTH = 4096
+HOP_LENGTH = 1024
+
 def detect_vocals_activity(vocals_path: str) -> Tuple[List[Dict[str, float]], List[float]]:
     """Detect vocal active segments & pitch contour.
 
@@ -25,9 +30,19 @@ def detect_vocals_activity(vocals_path: str) -> Tuple[List[Dict[str, float]], Li
     y, sr = load_audio(vocals_path)
     if librosa is None:
         return [], []
-    frame_length = 4096
-    hop_length = 1024
-    rms = librosa.feature.rms(y=y, frame_length=frame_length, hop_length=hop_length)[0]
+    features = FeatureStore(y, sr)
+    rms = features.rms(frame_length=FRAME_LENGTH, hop_length=HOP_LENGTH)
+    sections = active_sections(rms, sr, HOP_LENGTH)
+    pitch = extract_pitch_contour(y, sr, features)
+    return sections, pitch
+
+def active_sections(rms: np.ndarray, sr: int, hop_length: int) -> List[Dict[str, float]]:
+    """Windows where the vocals RMS (hop of `hop_length` samples) is above its 40th percentile.
+
+    Windows shorter than 0.5s are dropped and gaps below 3s are merged.
+    """
+    if not len(rms):
+        return []
     times = librosa.frames_to_time(range(len(rms)), sr=sr, hop_length=hop_length)
     threshold = float(np.percentile(rms, 40))
     active_mask = rms > threshold
@@ -51,6 +66,4 @@ def detect_vocals_activity(vocals_path: str) -> Tuple[List[Dict[str, float]], Li
         else:
             merged_sections[-1]["end"] = sec["end"]
     
-    sections = merged_sections
-    pitch = extract_pitch_contour(y, sr)
-    return sections, pitch
+    return merged_sections